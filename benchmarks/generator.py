@@ -0,0 +1,112 @@
+"""Generatore di progetti sintetici per i benchmark
+
+Esempio:
+    python -m benchmarks.generator /tmp/demo --locales 20 --keys 10000 --depth 4
+
+Crea locales/<lingua>.json con lo stesso albero di chiavi (con una parte
+di chiavi mancanti o vuote nelle lingue diverse dal master, e segnaposto in
+una parte dei testi) e, se richiesto,
+alberi node_modules pieni di file JSON che la scansione deve ignorare.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+LANGUAGES = ["en", "it", "de", "fr", "es", "pt", "nl", "pl", "sv", "da", "fi", "cs", "ro", "hu", "el", "tr", "ru", "uk", "ja", "ko", "zh"]
+WORDS = ["salva", "annulla", "errore", "file", "progetto", "chiave", "valore", "lingua", "apri", "chiudi", "nuovo", "elimina"]
+BRANCHING = 10  # figli per ogni gruppo intermedio
+# Segnaposto aggiunti in fondo ai testi, uguali in tutte le lingue
+PLACEHOLDERS = ["{name}", "{count, plural, one {# file} other {# file}}", "%s", "{{user}}", "{n, select, a {A} other {B}}"]
+
+def language_codes(count):
+    return [LANGUAGES[n] if n < len(LANGUAGES) else f"x{n:03d}" for n in range(count)]
+
+def key_path(index, depth):
+    """Percorso della chiave index: depth - 1 gruppi intermedi e la foglia"""
+    groups = [f"g{level}_{index // BRANCHING ** (depth - 1 - level) % BRANCHING}" for level in range(depth - 1)]
+    return groups + [f"key{index}"]
+
+def generate_locale(language, keys, depth=3, value_length=24, missing_ratio=0.0, seed=0, placeholder_ratio=0.0):
+    """Contenuto annidato di un file di traduzione"""
+    rng = random.Random(f"{seed}:{language}")
+    data = {}
+    for index in range(keys):
+        if missing_ratio and rng.random() < missing_ratio:
+            continue
+        node = data
+        path = key_path(index, depth)
+        for part in path[:-1]:
+            node = node.setdefault(part, {})
+        text = f"{language} {index}"
+        while len(text) < value_length:
+            text += " " + rng.choice(WORDS)
+        text = text[:value_length]
+        # Scelta dipendente solo dall'indice: la stessa chiave ha gli stessi segnaposto in ogni lingua
+        if index * 2654435761 % 1000 < placeholder_ratio * 1000:
+            text += " " + PLACEHOLDERS[index % len(PLACEHOLDERS)]
+        node[path[-1]] = "" if missing_ratio and rng.random() < missing_ratio / 2 else text
+    return data
+
+def write_json(file_path, data, indent=2):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+        f.write("\n")
+
+def generate_project(root, locales=10, keys=5000, depth=3, value_length=24, missing_ratio=0.05,
+                     decoy_trees=2, decoy_files=200, seed=0, placeholder_ratio=0.2):
+    """Crea il progetto e restituisce {"path", "master_file", "languages", "files"}"""
+    languages = language_codes(locales)
+    locales_dir = os.path.join(root, "locales")
+    for language in languages:
+        ratio = 0.0 if language == languages[0] else missing_ratio
+        write_json(os.path.join(locales_dir, f"{language}.json"),
+                   generate_locale(language, keys, depth, value_length, ratio, seed, placeholder_ratio))
+
+    # Alberi node_modules: molti piccoli file JSON annidati, da ignorare nella scansione
+    rng = random.Random(seed)
+    for tree in range(decoy_trees):
+        base = os.path.join(root, "node_modules" if tree == 0 else os.path.join(f"packages/app{tree}", "node_modules"))
+        for n in range(decoy_files):
+            package = os.path.join(base, f"pkg{n % 50}", "node_modules", f"dep{n}")
+            write_json(os.path.join(package, "package.json"), {"name": f"dep{n}", "version": f"1.{rng.randrange(10)}.0"})
+
+    return {
+        "path": os.path.abspath(root),
+        "master_file": os.path.abspath(os.path.join(locales_dir, f"{languages[0]}.json")),
+        "languages": languages,
+        "files": locales + decoy_trees * decoy_files,
+    }
+
+def add_arguments(parser):
+    parser.add_argument("--locales", type=int, default=10, help="Numero di lingue")
+    parser.add_argument("--keys", type=int, default=5000, help="Chiavi per lingua")
+    parser.add_argument("--depth", type=int, default=3, help="Livelli di annidamento delle chiavi")
+    parser.add_argument("--value-length", type=int, default=24, help="Lunghezza dei testi (determina la dimensione dei file)")
+    parser.add_argument("--missing-ratio", type=float, default=0.05, help="Frazione di chiavi mancanti nelle lingue diverse dal master")
+    parser.add_argument("--decoy-trees", type=int, default=2, help="Alberi node_modules da ignorare")
+    parser.add_argument("--decoy-files", type=int, default=200, help="File JSON in ogni albero node_modules")
+    parser.add_argument("--placeholder-ratio", type=float, default=0.2, help="Frazione di testi con segnaposto o strutture ICU")
+    parser.add_argument("--seed", type=int, default=0)
+
+def project_options(args):
+    return {
+        "locales": args.locales, "keys": args.keys, "depth": args.depth, "value_length": args.value_length,
+        "missing_ratio": args.missing_ratio, "decoy_trees": args.decoy_trees, "decoy_files": args.decoy_files,
+        "seed": args.seed, "placeholder_ratio": args.placeholder_ratio,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un progetto di traduzioni sintetico")
+    parser.add_argument("root", help="Directory in cui creare il progetto")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    project = generate_project(args.root, **project_options(args))
+    json.dump(project, sys.stdout, indent=2)
+    print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
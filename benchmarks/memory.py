@@ -0,0 +1,77 @@
+"""Confronto della memoria occupata dalle traduzioni caricate
+
+Esempio:
+    python -m benchmarks.memory --locales 60 --keys 20000
+
+Misura con tracemalloc tre rappresentazioni degli stessi file:
+- "nested": un dizionario annidato per lingua, come restituito da json.loads
+- "catalog": tabella delle chiavi condivisa e una colonna di valori per lingua
+- "catalog+cache": come sopra, più le colonne appiattite tenute dalla cache
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from benchmarks.generator import generate_locale, language_codes
+from shared.catalog import Catalog, flatten
+
+def measure(build):
+    """Restituisce (byte allocati ancora vivi, secondi) di build()
+
+    Il tempo si misura in un'esecuzione separata: tracemalloc rallenta molto le allocazioni.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return current, elapsed
+
+def build_nested(texts):
+    return {language: json.loads(text) for language, text in texts.items()}
+
+def build_catalog(texts, keep_columns=False):
+    catalog = Catalog()
+    master = next(iter(texts))
+    catalog.set_master(master)
+    cached = {}
+    for language, text in texts.items():
+        columns = flatten(json.loads(text))
+        catalog.add_flat_locale(language, columns)
+        if keep_columns:
+            cached[language] = columns
+    return catalog, cached
+
+def run(locales, keys):
+    texts = {language: json.dumps(generate_locale(language, keys)) for language in language_codes(locales)}
+    builders = {
+        "nested": lambda: build_nested(texts),
+        "catalog": lambda: build_catalog(texts),
+        "catalog+cache": lambda: build_catalog(texts, keep_columns=True),
+    }
+    results = {}
+    for name, build in builders.items():
+        size, elapsed = measure(build)
+        results[name] = {"bytes": size, "mb": round(size / 1e6, 1), "seconds": round(elapsed, 3)}
+    return {"locales": locales, "keys": keys, "results": results}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark della memoria delle traduzioni caricate")
+    parser.add_argument("--locales", type=int, default=60, help="Numero di lingue")
+    parser.add_argument("--keys", type=int, default=20000, help="Chiavi per lingua")
+    args = parser.parse_args(argv)
+    report = run(args.locales, args.keys)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
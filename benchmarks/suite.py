@@ -0,0 +1,327 @@
+"""Benchmark dei percorsi critici su un progetto sintetico
+
+Esempi:
+    python -m benchmarks.suite --locales 20 --keys 20000 --output after.json
+    python -m benchmarks.suite --compare before.json --output after.json
+    xvfb-run python -m benchmarks.suite --gui
+
+Tutto avviene in una directory di lavoro temporanea (anche data/, quindi
+l'archivio dei progetti e la cache su disco dell'utente non vengono toccati).
+Senza --gui non serve un display: si misurano le stesse funzioni usate
+dalle schermate e le importazioni all'avvio. Con --gui si misurano anche il
+tempo fino al primo disegno della finestra principale e l'apertura delle
+schermate vere; se non c'è un display le misure vengono saltate e il motivo
+finisce nel rapporto.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.generator import add_arguments, generate_project, project_options
+
+# Quanti progetti aggiungere e aggiornare nelle misure dell'archivio dei progetti
+PROJECT_STORE_COUNT = 500
+# Righe formattate per simulare la pagina visibile della griglia
+VISIBLE_ROWS = 40
+# Radice del repository: i processi di avvio importano main da qui
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Avvio dell'applicazione in un processo nuovo: tempi (time.time()) dopo le importazioni,
+# al primo disegno della finestra e con l'elenco dei progetti caricato
+STARTUP_SCRIPT = """
+import json, time
+import main
+imported = time.time()
+app = main.TranslangStudio()
+app.update()
+painted = time.time()
+while app.projects_screen.loading:
+    app.update()
+    time.sleep(0.001)
+loaded = time.time()
+app.destroy()
+print(json.dumps({"imported": imported, "painted": painted, "loaded": loaded}))
+"""
+
+def wait_loader(loader, on_message=None, timeout=600):
+    """Svuota la coda del BackgroundLoader fino al messaggio "done" """
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        for message in loader.poll():
+            if on_message:
+                on_message(message)
+            if message[0] == "done":
+                loader.close()
+                return
+        time.sleep(0.001)
+    raise TimeoutError("Il caricamento non è terminato in tempo")
+
+def clear_projects():
+    """Svuota l'archivio con le stesse eliminazioni della schermata dei progetti"""
+    from shared.project_store import get_project_store
+    store = get_project_store()
+    for project in store.all():
+        store.delete(project["id"])
+    return store
+
+class Suite:
+    def __init__(self, workdir, project, repeat):
+        self.workdir = workdir
+        self.project = project
+        self.repeat = repeat
+        self.results = {}
+
+    def measure(self, name, run, setup=None):
+        """Esegue run() self.repeat volte; setup() prepara ogni ripetizione senza essere misurato"""
+        runs = []
+        for _ in range(self.repeat):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            run(state) if setup else run()
+            runs.append(time.perf_counter() - start)
+        self.record(name, runs)
+
+    def record(self, name, runs):
+        self.results[name] = {
+            "min": round(min(runs), 6),
+            "median": round(statistics.median(runs), 6),
+            "runs": [round(r, 6) for r in runs],
+        }
+
+    def skip(self, name, reason):
+        self.results[name] = {"skipped": reason}
+
+    def run_process(self, code):
+        """Esegue code in un interprete nuovo (nella directory di lavoro); restituisce l'ora di avvio e l'output"""
+        env = dict(os.environ, PYTHONPATH=REPO_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        start = time.time()
+        result = subprocess.run([sys.executable, "-c", code], cwd=self.workdir, env=env,
+                                capture_output=True, text=True, timeout=120)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "processo terminato con errore")
+        return start, result.stdout
+
+    def run_startup(self):
+        # Importazioni di main in un interprete nuovo: non serve un display
+        self.measure("startup_imports", lambda: self.run_process("import main"))
+
+    def run_headless(self):
+        from shared.catalog_cache import CatalogCache
+        from shared.coverage import catalog_diff, problem_ids
+        from shared.disk_cache import DiskCache
+        from shared.file_list import FileListModel
+        from shared.loader import BackgroundLoader, load_catalog
+        from shared.parallel_parse import get_parse_engine
+        from shared.project_store import get_project_store
+        from shared.scanner import scan_rules
+        from shared.catalog import format_key, format_value
+
+        path = self.project["path"]
+        master_file = self.project["master_file"]
+        rules = scan_rules({})
+        engine = get_parse_engine()
+        # I processi del pool partono una volta sola nell'applicazione: esclusi dalle misure
+        engine.get_pool()
+
+        self.measure("scan", lambda: CatalogCache().scan(path, refresh=True, rules=rules))
+
+        def load_json_files():
+            # Come JsonFilesScreen.load_json_files, senza la grid
+            files = FileListModel()
+            loader = BackgroundLoader(CatalogCache(), engine)
+            loader.scan(path, refresh=True, rules=rules)
+            wait_loader(loader, lambda m: m[0] == "file" and files.add(m[1]["filename"], m[1]["path"], m[1]["size"]))
+            files.set_master(master_file)
+            return files
+        self.measure("load_json_files", load_json_files)
+
+        def load_translations(cache):
+            # Come TranslationsScreen.load_translations, con il master per primo
+            catalog = load_catalog(cache, engine, path, master_file, rules=rules)
+            if len(catalog.columns) != len(self.project["languages"]):
+                raise RuntimeError("Catalogo incompleto")
+            return catalog
+        self.measure("load_translations_cold", load_translations, setup=lambda: CatalogCache())
+
+        disk_dir = os.path.join(self.workdir, "disk-cache")
+        load_translations(CatalogCache(disk_cache=DiskCache(disk_dir)))
+        self.measure("load_translations_disk", load_translations,
+                     setup=lambda: CatalogCache(disk_cache=DiskCache(disk_dir)))
+
+        warm_cache = CatalogCache()
+        catalog = load_translations(warm_cache)
+        self.measure("load_translations_warm", load_translations, setup=lambda: warm_cache)
+
+        def build_table():
+            # Come create_translations_table: confronto, filtro "Solo problemi", pagina visibile
+            diff = catalog_diff(catalog)
+            problems = problem_ids(diff)
+            rows = [(p, key_id) for p, key_id in catalog.rows if key_id is not None and problems >> key_id & 1]
+            languages = catalog.languages
+            page = [[format_key(p)] + [format_value(catalog.get(lang, key_id)) for lang in languages]
+                    for p, key_id in catalog.rows[:VISIBLE_ROWS] if key_id is not None]
+            return rows, page
+        self.measure("build_table", build_table)
+
+        from shared.placeholders import PlaceholderIndex
+        # Verifica dei segnaposto dopo un caricamento completo: firme da calcolare (cold)
+        # o già in cache con tutte le lingue da confrontare di nuovo (warm)
+        self.measure("validate_placeholders_cold", lambda index: index.validate(catalog, engine),
+                     setup=PlaceholderIndex)
+        warm_index = PlaceholderIndex()
+        warm_index.validate(catalog, engine)
+
+        def invalidate_all():
+            warm_index.invalidate(catalog, catalog.master_language)
+            return warm_index
+        self.measure("validate_placeholders_warm", lambda index: index.validate(catalog, engine), setup=invalidate_all)
+
+        # Archivio dei progetti: aggiunte e aggiornamenti uno alla volta, come da ProjectsScreen
+        # e JsonFilesScreen; i progetti restano nell'archivio per le misure di avvio
+        projects = [{"name": f"progetto{n}", "path": f"{path}/{n}", "master_file": master_file} for n in range(PROJECT_STORE_COUNT)]
+
+        def add_projects(store):
+            for project in projects:
+                store.add(project)
+        self.measure("project_store_add", add_projects, setup=clear_projects)
+
+        def update_projects(store):
+            for project in store.all():
+                store.update(project["id"], master_file=master_file)
+        self.measure("project_store_update", update_projects, setup=get_project_store)
+        engine.shutdown()
+        self.run_startup()
+
+    def run_gui(self):
+        try:
+            import tkinter as tk
+            root = tk.Tk()
+        except Exception as e:
+            for name in ("gui_first_paint", "gui_projects_loaded", "gui_json_files", "gui_translations"):
+                self.skip(name, f"nessun display: {e}")
+            return
+        root.withdraw()
+
+        # Avvio completo in un processo nuovo, con i progetti aggiunti da project_store_add
+        first_paint, projects_loaded = [], []
+        for _ in range(self.repeat):
+            start, output = self.run_process(STARTUP_SCRIPT)
+            times = json.loads(output.strip().splitlines()[-1])
+            first_paint.append(times["painted"] - start)
+            projects_loaded.append(times["loaded"] - start)
+        self.record("gui_first_paint", first_paint)
+        self.record("gui_projects_loaded", projects_loaded)
+
+        from screens.json_files_screen import JsonFilesScreen
+        from screens.translations_screen import TranslationsScreen
+
+        project = {"name": "benchmark", "path": self.project["path"], "master_file": self.project["master_file"]}
+        clear_projects().add(project)
+
+        def pump(done, timeout=600):
+            deadline = time.perf_counter() + timeout
+            while not done():
+                if time.perf_counter() > deadline:
+                    raise TimeoutError("La schermata non ha terminato il caricamento")
+                root.update()
+            root.update_idletasks()
+
+        def open_json_files():
+            screen = JsonFilesScreen(root, project["name"], project["path"])
+            pump(lambda: screen.loader is None)
+            screen.on_close()
+        self.measure("gui_json_files", open_json_files)
+
+        def open_translations():
+            screen = TranslationsScreen(root, project["name"], project["path"], project["master_file"])
+            pump(lambda: screen.loader is None)
+            screen.on_close()
+        self.measure("gui_translations", open_translations)
+        root.destroy()
+
+def compare(report, baseline, threshold, min_delta):
+    """Confronta i minimi con un rapporto precedente; restituisce le misure peggiorate
+
+    Le differenze sotto min_delta secondi sono rumore e non contano come peggioramenti.
+    """
+    regressions = {}
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        # Il minimo risente meno del rumore della macchina rispetto alla mediana
+        if "min" not in result or not previous or not previous.get("min"):
+            continue
+        ratio = result["min"] / previous["min"]
+        result["baseline_min"] = previous["min"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1 + threshold and result["min"] - previous["min"] > min_delta:
+            regressions[name] = result["ratio"]
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark di scansione, caricamento, tabella e salvataggio")
+    add_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3, help="Ripetizioni per misura (si riportano minimo e mediana)")
+    parser.add_argument("--gui", action="store_true", help="Misura anche l'apertura delle schermate (serve un display, anche virtuale)")
+    parser.add_argument("--workdir", help="Directory di lavoro (predefinita: temporanea, eliminata alla fine)")
+    parser.add_argument("--output", help="File JSON del rapporto (predefinito: standard output)")
+    parser.add_argument("--compare", help="Rapporto precedente con cui confrontare i tempi minimi")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Peggioramento tollerato nel confronto (0.10 = 10%%)")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="Differenza minima in secondi per segnalare un peggioramento")
+    args = parser.parse_args(argv)
+
+    # Legge il rapporto di confronto prima di cambiare directory
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    output = os.path.abspath(args.output) if args.output else None
+
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="translang-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    try:
+        options = project_options(args)
+        project = generate_project(os.path.join(workdir, "project"), **options)
+        suite = Suite(workdir, project, args.repeat)
+        suite.run_headless()
+        if args.gui:
+            suite.run_gui()
+    finally:
+        os.chdir(previous_dir)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+            "project": options,
+        },
+        "results": suite.results,
+    }
+    regressions = compare(report, baseline, args.threshold, args.min_delta) if baseline else {}
+    if baseline:
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    for name, ratio in regressions.items():
+        print(f"Peggioramento: {name} x{ratio}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
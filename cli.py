@@ -0,0 +1,200 @@
+"""Translang Studio senza interfaccia grafica: rapporti di copertura per la CI
+
+Esempi:
+    python cli.py coverage --all
+    python cli.py coverage --project demo01 --output report.json
+    python cli.py coverage --path ./app --master ./app/locales/en.json --fail-on-missing
+    python cli.py coverage --all --fail-on-placeholders
+    python cli.py memory --index
+    python cli.py memory --suggest "Save changes" --language it
+    python cli.py rename --project demo01 --from menu.file --to nav.file
+    python cli.py rename --project demo01 --regex --from "^btn_(\\w+)$" --to "buttons.\\1" --dry-run
+
+Non importa tkinter: parte velocemente e funziona senza display.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from shared.catalog import format_key
+from shared.catalog_cache import get_catalog_cache
+from shared.coverage import catalog_report
+from shared.languages import language_detector
+from shared.loader import load_catalog
+from shared.parallel_parse import get_parse_engine
+from shared.placeholders import placeholder_report
+from shared.refactor import apply_plan, plan_prefix, plan_regex
+from shared.scanner import scan_rules
+from shared.translation_memory import get_translation_memory
+from shared.utils import load_projects
+
+def project_coverage(project):
+    """Rapporto di copertura di un singolo progetto"""
+    result = {"name": project["name"], "path": project["path"]}
+    master_file = project.get("master_file")
+    if not master_file:
+        result["error"] = "File master non impostato"
+        return result
+    if not os.path.exists(project["path"]):
+        result["error"] = f"Il percorso {project['path']} non esiste"
+        return result
+
+    errors = []
+    catalog = load_catalog(
+        get_catalog_cache(), get_parse_engine(), project["path"], master_file,
+        rules=scan_rules(project),
+        languages=language_detector(project),
+        on_error=lambda file, error: errors.append({"path": file["path"], "error": str(error)})
+    )
+    if catalog.master_language not in catalog.columns:
+        result["error"] = "File master non trovato o non valido"
+        return result
+
+    result["master"] = catalog.master_language
+    result["locales"] = catalog_report(catalog)
+    # Segnaposto e strutture ICU diversi dal master: {chiave: [problemi]}
+    placeholders = placeholder_report(catalog, get_parse_engine())
+    for language, locale in result["locales"].items():
+        locale["placeholders"] = placeholders.get(language, {})
+    if errors:
+        result["file_errors"] = errors
+    return result
+
+def select_projects(args):
+    if args.path:
+        if not args.master:
+            raise SystemExit("--master è obbligatorio insieme a --path")
+        return [{
+            "name": os.path.basename(os.path.abspath(args.path)),
+            "path": args.path,
+            "master_file": args.master,
+            "language_from": args.language_from,
+            "language_pattern": args.language_pattern,
+        }]
+    projects = load_projects()
+    if args.all:
+        return projects
+    names = set(args.project or [])
+    selected = [p for p in projects if p["name"] in names]
+    unknown = names - {p["name"] for p in selected}
+    if unknown:
+        raise SystemExit(f"Progetti sconosciuti: {', '.join(sorted(unknown))}")
+    return selected
+
+def run_coverage(args):
+    projects = select_projects(args)
+    if not projects:
+        raise SystemExit("Nessun progetto selezionato (usa --all, --project o --path)")
+
+    # I progetti vengono elaborati in parallelo; l'analisi dei file usa il pool di processi condiviso
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(project_coverage, projects))
+    get_parse_engine().shutdown()
+
+    report = {"projects": results}
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    failed = any("error" in result for result in results)
+    if args.fail_on_missing:
+        failed = failed or any(
+            locale["missing"]
+            for result in results
+            for locale in result.get("locales", {}).values()
+        )
+    if args.fail_on_placeholders:
+        failed = failed or any(
+            locale["placeholders"]
+            for result in results
+            for locale in result.get("locales", {}).values()
+        )
+    return 1 if failed else 0
+
+def run_memory(args):
+    memory = get_translation_memory()
+    report = {}
+    if args.index:
+        # Solo i file cambiati dall'ultima indicizzazione vengono rianalizzati
+        report["indexed"] = memory.index_projects(load_projects(), get_catalog_cache(), get_parse_engine())
+        get_parse_engine().shutdown()
+    if args.suggest is not None:
+        if not args.language:
+            raise SystemExit("--language è obbligatorio insieme a --suggest")
+        report["suggestions"] = [
+            {"similarity": score, "target": target, "source": source, "count": count, "project": origin[0], "key": origin[1]}
+            for score, target, source, count, origin in memory.suggest(args.suggest, args.language, args.limit, args.min_similarity)
+        ]
+    report["stats"] = memory.stats()
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+def run_rename(args):
+    projects = select_projects(args)
+    if len(projects) != 1:
+        raise SystemExit("Indica un solo progetto (--project o --path)")
+    project = projects[0]
+    if not project.get("master_file"):
+        raise SystemExit("File master non impostato")
+    catalog = load_catalog(get_catalog_cache(), get_parse_engine(), project["path"], project["master_file"],
+                           rules=scan_rules(project), languages=language_detector(project))
+    get_parse_engine().shutdown()
+    if args.regex:
+        plan = plan_regex(catalog, args.old, args.new)
+    else:
+        plan = plan_prefix(catalog, args.old, args.new)
+    report = {
+        "renames": {format_key(catalog.keys[key_id]): format_key(path) for key_id, path in plan.renames.items()},
+        "conflicts": plan.conflicts,
+    }
+    if not plan.conflicts and not args.dry_run:
+        report["written"] = [os.path.relpath(path, project["path"]) for path in apply_plan(catalog, plan)]
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if plan.conflicts else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="translang", description="Translang Studio da riga di comando")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    coverage = commands.add_parser("coverage", help="Chiavi mancanti, in più e vuote per ogni lingua rispetto al master")
+    coverage.add_argument("--all", action="store_true", help="Tutti i progetti registrati")
+    coverage.add_argument("--project", action="append", help="Nome di un progetto registrato (ripetibile)")
+    coverage.add_argument("--path", help="Percorso di un progetto non registrato")
+    coverage.add_argument("--master", help="File master del progetto indicato con --path")
+    coverage.add_argument("--language-from", choices=["filename", "directory", "pattern"], help="Come ricavare la lingua dei file del progetto indicato con --path")
+    coverage.add_argument("--language-pattern", help="Espressione regolare con il gruppo (?P<lang>...) per --language-from pattern")
+    coverage.add_argument("--workers", type=int, default=8, help="Progetti elaborati in parallelo")
+    coverage.add_argument("--output", help="File in cui scrivere il rapporto JSON (predefinito: stdout)")
+    coverage.add_argument("--fail-on-missing", action="store_true", help="Esce con codice 1 se mancano chiavi")
+    coverage.add_argument("--fail-on-placeholders", action="store_true", help="Esce con codice 1 se i segnaposto di una traduzione non corrispondono al master")
+    coverage.set_defaults(handler=run_coverage)
+
+    memory = commands.add_parser("memory", help="Memoria di traduzione di tutti i progetti registrati")
+    memory.add_argument("--index", action="store_true", help="Aggiorna la memoria con i file cambiati")
+    memory.add_argument("--suggest", help="Testo del master per cui cercare traduzioni simili")
+    memory.add_argument("--language", help="Lingua delle traduzioni cercate con --suggest")
+    memory.add_argument("--limit", type=int, default=5, help="Numero massimo di suggerimenti")
+    memory.add_argument("--min-similarity", type=float, default=0.6, help="Somiglianza minima tra 0 e 1")
+    memory.set_defaults(handler=run_memory)
+
+    rename = commands.add_parser("rename", help="Rinomina o sposta chiavi in tutte le lingue di un progetto")
+    rename.add_argument("--project", action="append", help="Nome del progetto registrato")
+    rename.add_argument("--path", help="Percorso di un progetto non registrato")
+    rename.add_argument("--master", help="File master del progetto indicato con --path")
+    rename.add_argument("--language-from", choices=["filename", "directory", "pattern"], help="Come ricavare la lingua dei file del progetto indicato con --path")
+    rename.add_argument("--language-pattern", help="Espressione regolare con il gruppo (?P<lang>...) per --language-from pattern")
+    rename.add_argument("--from", dest="old", required=True, help="Chiave o gruppo da rinominare (con --regex: espressione regolare)")
+    rename.add_argument("--to", dest="new", required=True, help="Nuovo nome (con --regex: sostituzione, con \\1 per i gruppi)")
+    rename.add_argument("--regex", action="store_true", help="Applica --from come espressione regolare al testo di ogni chiave")
+    rename.add_argument("--dry-run", action="store_true", help="Mostra le rinomine senza scrivere i file")
+    rename.set_defaults(handler=run_rename, all=False)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
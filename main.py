@@ -11,10 +11,11 @@ class TranslangStudio(tk.Tk):
         # Assicurati che la directory data esista
         os.makedirs("data", exist_ok=True)
         
-        # Carica la schermata principale
+        # Carica la schermata principale: la finestra viene disegnata subito, l'elenco dei
+        # progetti arriva in background; le altre schermate si importano alla prima apertura
         self.projects_screen = ProjectsScreen(self)
         self.projects_screen.pack(fill=tk.BOTH, expand=True)
 
 if __name__ == "__main__":
     app = TranslangStudio()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
@@ -0,0 +1,145 @@
+import tkinter as tk
+from tkinter import ttk
+import collections
+import time
+from shared import profiling
+from shared.catalog_cache import get_catalog_cache
+from shared.constants import PROFILE_ENV
+
+# Aggiornamento automatico della finestra (millisecondi)
+REFRESH_MS = 1000
+# Intervalli recenti mostrati nella tabella in basso
+RECENT_LIMIT = 200
+
+def hit_rate(hits, misses):
+    total = hits + misses
+    return f"{hits * 100 / total:.1f}% ({hits}/{total})" if total else "-"
+
+def count_widgets(root):
+    """Conta i widget per classe e gli elementi di Treeview e Canvas, visitando l'albero dei widget"""
+    classes = collections.Counter()
+    tree_items = 0
+    canvas_items = 0
+    stack = [root]
+    while stack:
+        widget = stack.pop()
+        widget_class = widget.winfo_class()
+        classes[widget_class] += 1
+        if widget_class == "Treeview":
+            # Anche i figli dei nodi espansi (es. il visualizzatore ad albero)
+            nodes = list(widget.get_children())
+            while nodes:
+                tree_items += 1
+                nodes.extend(widget.get_children(nodes.pop()))
+        elif widget_class == "Canvas":
+            canvas_items += len(widget.find_all())
+        stack.extend(widget.winfo_children())
+    return classes, tree_items, canvas_items
+
+class DiagnosticsWindow(tk.Toplevel):
+    """Intervalli misurati, efficacia delle cache e numero di widget dell'applicazione"""
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.title("Diagnostica")
+        self.geometry("760x620")
+        self.refresh_job = None
+        self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.refresh()
+
+    def create_widgets(self):
+        # Controlli: registrazione attiva/spenta, svuotamento, misura dell'aggiornamento di Tk
+        self.controls_frame = tk.Frame(self)
+        self.controls_frame.pack(fill=tk.X, padx=10, pady=10)
+        self.enabled_var = tk.BooleanVar(value=profiling.enabled)
+        tk.Checkbutton(self.controls_frame, text=f"Registra intervalli ({PROFILE_ENV}=1 all'avvio)",
+                       variable=self.enabled_var, command=lambda: profiling.set_enabled(self.enabled_var.get())).pack(side=tk.LEFT, padx=5)
+        tk.Button(self.controls_frame, text="Svuota", command=self.clear).pack(side=tk.RIGHT, padx=5)
+        tk.Button(self.controls_frame, text="Misura aggiornamento Tk", command=self.measure_idle).pack(side=tk.RIGHT, padx=5)
+
+        # Statistiche per nome dell'intervallo
+        self.summary_tree = self.create_table(("name", "count", "mean", "max", "last"),
+                                              ("Intervallo", "Numero", "Media (ms)", "Max (ms)", "Ultimo (ms)"),
+                                              (220, 70, 90, 90, 90), height=10)
+
+        # Cache e widget
+        self.info_label = tk.Label(self, text="", justify=tk.LEFT, anchor="w", font=("Courier", 10))
+        self.info_label.pack(fill=tk.X, padx=10, pady=5)
+
+        # Intervalli più recenti
+        self.recent_tree = self.create_table(("name", "detail", "duration", "thread"),
+                                             ("Intervallo", "Dettaglio", "Durata (ms)", "Thread"),
+                                             (180, 300, 90, 140), height=10)
+
+    def create_table(self, columns, titles, widths, height):
+        frame = tk.Frame(self)
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        tree = ttk.Treeview(frame, columns=columns, show="headings", height=height)
+        for column, title, width in zip(columns, titles, widths):
+            tree.heading(column, text=title)
+            tree.column(column, width=width, anchor="w" if column in ("name", "detail", "thread") else "e")
+        tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        scrollbar.pack(fill=tk.Y, side=tk.RIGHT)
+        tree.configure(yscrollcommand=scrollbar.set)
+        return tree
+
+    def refresh(self):
+        self.refresh_job = None
+        self.summary_tree.delete(*self.summary_tree.get_children())
+        stats = profiling.summary()
+        for name in sorted(stats, key=lambda name: stats[name]["total"], reverse=True):
+            item = stats[name]
+            self.summary_tree.insert("", tk.END, values=(
+                name, item["count"], f"{item['mean'] * 1000:.2f}", f"{item['max'] * 1000:.2f}", f"{item['last'] * 1000:.2f}"))
+
+        self.recent_tree.delete(*self.recent_tree.get_children())
+        for item in profiling.recent(RECENT_LIMIT):
+            self.recent_tree.insert("", tk.END, values=(item.name, item.detail or "", f"{item.duration * 1000:.2f}", item.thread))
+
+        self.info_label.config(text="\n".join(self.cache_lines() + self.widget_lines()))
+        self.refresh_job = self.after(REFRESH_MS, self.refresh)
+
+    def cache_lines(self):
+        cache = get_catalog_cache()
+        lines = [
+            f"Cache in memoria: {hit_rate(cache.hits, cache.misses)}, "
+            f"{len(cache.entries)} file, {cache.total_bytes / 1024 / 1024:.1f} MB di {cache.max_bytes / 1024 / 1024:.0f} MB",
+        ]
+        if cache.disk_cache is not None:
+            lines.append(f"Cache su disco:   {hit_rate(cache.disk_cache.hits, cache.disk_cache.misses)}")
+        return lines
+
+    def widget_lines(self):
+        # Esclude questa finestra: conta solo i widget delle schermate dell'applicazione
+        classes, tree_items, canvas_items = count_widgets(self._root())
+        own, _, _ = count_widgets(self)
+        classes.subtract(own)
+        total = sum(count for count in classes.values() if count > 0)
+        top = ", ".join(f"{name} {count}" for name, count in classes.most_common(6) if count > 0)
+        return [
+            f"Widget:           {total} ({top})",
+            f"Righe Treeview:   {tree_items - self.own_tree_items()}   Elementi Canvas: {canvas_items}",
+        ]
+
+    def own_tree_items(self):
+        return len(self.summary_tree.get_children()) + len(self.recent_tree.get_children())
+
+    def measure_idle(self):
+        # Tempo per elaborare geometria e ridisegni in sospeso di tutte le finestre
+        start = time.perf_counter()
+        self.update_idletasks()
+        profiling.record("tk.update_idletasks", start, time.perf_counter() - start)
+
+    def clear(self):
+        profiling.clear()
+        if self.refresh_job is not None:
+            self.after_cancel(self.refresh_job)
+        self.refresh()
+
+    def on_close(self):
+        if self.refresh_job is not None:
+            self.after_cancel(self.refresh_job)
+            self.refresh_job = None
+        self.destroy()
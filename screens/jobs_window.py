@@ -0,0 +1,156 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import json
+import time
+from shared.catalog_cache import get_catalog_cache
+from shared.constants import POLL_INTERVAL_MS
+from shared.jobs import JobEngine, CANCELLED, DONE, FAILED, PENDING, RUNNING, job_report, summarize
+from shared.parallel_parse import get_parse_engine
+
+# Operazioni disponibili, nell'ordine del menu
+OPERATION_LABELS = {
+    "scan": "Scansione",
+    "coverage": "Copertura",
+    "validate": "Verifica",
+    "normalize": "Normalizza ordine chiavi",
+}
+STATE_LABELS = {PENDING: "In coda", RUNNING: "In corso", DONE: "Completato", FAILED: "Errore", CANCELLED: "Annullato"}
+
+def result_text(job):
+    """Riassunto di una riga del risultato di un job"""
+    if job.error:
+        return job.error
+    result = job.result
+    if not result:
+        return ""
+    if job.operation == "scan":
+        return f"{result['files']} file, {result['bytes'] / 1024:.0f} KB, lingue: {', '.join(result['languages'])}"
+    if job.operation == "coverage":
+        coverage = result["coverage"]
+        lowest = min(coverage.values()) if coverage else 100.0
+        return f"{result['keys']} chiavi, {len(coverage)} lingue, copertura minima {lowest:g}%, {result['missing']} mancanti"
+    if job.operation == "validate":
+        return (f"{len(result['file_errors'])} file con errori, {result['empty']} vuote, "
+                f"{result['type_mismatch']} tipo diverso, {result['extra']} in più, "
+                f"{result['placeholders']} segnaposto errati")
+    if job.operation == "normalize":
+        return f"{len(result['written'])} file riscritti su {result['files']}"
+    return ""
+
+class JobsWindow(tk.Toplevel):
+    """Operazioni su più progetti: avanzamento, annullamento e risultati aggregati"""
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.title("Operazioni sui progetti")
+        self.geometry("960x560")
+        self.runner = JobEngine(get_catalog_cache(), get_parse_engine())
+        self.jobs = []
+        self.changed = {}     # id del job -> job da ridisegnare al prossimo aggiornamento
+        self.poll_job = None
+        self.started = None
+        self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def create_widgets(self):
+        self.controls_frame = tk.Frame(self)
+        self.controls_frame.pack(fill=tk.X, padx=10, pady=10)
+        self.summary_label = tk.Label(self.controls_frame, text="", anchor="w", justify=tk.LEFT)
+        self.summary_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        tk.Button(self.controls_frame, text="Esporta...", command=self.export).pack(side=tk.RIGHT, padx=5)
+        tk.Button(self.controls_frame, text="Annulla tutto", command=self.cancel_all).pack(side=tk.RIGHT, padx=5)
+        tk.Button(self.controls_frame, text="Annulla selezionati", command=self.cancel_selected).pack(side=tk.RIGHT, padx=5)
+
+        self.table_frame = tk.Frame(self)
+        self.table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        columns = ("project", "operation", "state", "progress", "time", "result")
+        self.tree = ttk.Treeview(self.table_frame, columns=columns, show="headings")
+        for column, title, width in zip(columns, ("Progetto", "Operazione", "Stato", "Avanzamento", "Tempo (s)", "Risultato"),
+                                        (160, 120, 90, 90, 70, 420)):
+            self.tree.heading(column, text=title)
+            self.tree.column(column, width=width, anchor="e" if column in ("progress", "time") else "w")
+        self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        scrollbar = ttk.Scrollbar(self.table_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        scrollbar.pack(fill=tk.Y, side=tk.RIGHT)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+    def submit(self, projects, operation):
+        """Avvia l'operazione sui progetti indicati"""
+        if not self.jobs or self.started is None:
+            self.started = time.perf_counter()
+        jobs = self.runner.submit(projects, operation)
+        self.jobs.extend(jobs)
+        for job in jobs:
+            self.tree.insert("", tk.END, iid=str(job.id), values=self.row_values(job))
+        self.update_summary()
+        if self.poll_job is None:
+            self.poll_job = self.after(POLL_INTERVAL_MS, self.poll)
+
+    def row_values(self, job):
+        progress = f"{job.done}/{job.total}" if job.total else ""
+        elapsed = f"{job.elapsed:.2f}" if job.state in (DONE, FAILED, CANCELLED) else ""
+        return (job.project["name"], OPERATION_LABELS[job.operation], STATE_LABELS[job.state], progress, elapsed, result_text(job))
+
+    def poll(self):
+        self.poll_job = None
+        finished = False
+        # Molti messaggi per lo stesso job diventano un solo aggiornamento della riga
+        for message in self.runner.poll():
+            if message[0] == "done":
+                finished = True
+            else:
+                self.changed[message[1].id] = message[1]
+        for job in self.changed.values():
+            self.tree.item(str(job.id), values=self.row_values(job))
+        self.changed = {}
+        self.update_summary()
+        if finished and all(job.state in (DONE, FAILED, CANCELLED) for job in self.jobs):
+            self.started = None
+            return
+        self.poll_job = self.after(POLL_INTERVAL_MS, self.poll)
+
+    def update_summary(self):
+        summary = summarize(self.jobs)
+        states = ", ".join(f"{STATE_LABELS[state].lower()} {count}" for state, count in summary["states"].items())
+        parts = [f"{summary['jobs']} operazioni: {states}"]
+        if self.started is not None:
+            parts[0] += f" — {time.perf_counter() - self.started:.1f} s"
+        details = []
+        if "coverage_mean" in summary:
+            details.append(f"copertura media {summary['coverage_mean']:g}% (minima {summary['coverage_min']:g}%)")
+        for field, label in (("missing", "mancanti"), ("empty", "vuote"), ("type_mismatch", "tipo diverso"),
+                             ("placeholders", "segnaposto errati"), ("file_errors", "file con errori"),
+                             ("written", "file riscritti")):
+            if field in summary:
+                details.append(f"{summary[field]} {label}")
+        if details:
+            parts.append(", ".join(details))
+        self.summary_label.config(text="\n".join(parts))
+
+    def cancel_selected(self):
+        selected = {int(item) for item in self.tree.selection()}
+        self.runner.cancel([job for job in self.jobs if job.id in selected])
+
+    def cancel_all(self):
+        self.runner.cancel()
+
+    def export(self):
+        path = filedialog.asksaveasfilename(parent=self, title="Esporta risultati", defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(job_report(self.jobs), f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            messagebox.showerror("Errore", f"Impossibile salvare {path}: {e}", parent=self)
+
+    def on_close(self):
+        running = any(job.state in (PENDING, RUNNING) for job in self.jobs)
+        if running and not messagebox.askyesno("Conferma", "Ci sono operazioni in corso. Annullarle e chiudere?", parent=self):
+            return
+        if self.poll_job is not None:
+            self.after_cancel(self.poll_job)
+            self.poll_job = None
+        self.runner.close()
+        self.destroy()
@@ -2,7 +2,27 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import json
 import os
-from shared.utils import load_projects, save_projects
+from shared.utils import find_project
+from shared.project_store import get_project_store
+from shared.catalog_cache import get_catalog_cache
+from shared.constants import POLL_INTERVAL_MS, VIEWER_TEXT_MAX_BYTES
+from shared.file_list import FileListModel
+from shared.formats import format_for, parse_catalog
+from shared.catalog import format_key, format_value
+from shared.loader import BackgroundLoader
+from shared.parallel_parse import get_parse_engine
+from shared.profiling import span
+from shared.scanner import scan_rules
+from shared.watcher import ProjectWatcher
+from screens.json_viewer import JsonViewer
+
+# Righe inserite nella grid per volta: le altre arrivano scorrendo fino in fondo
+PAGE_SIZE = 500
+# Identificativo della riga "altri file..." (i percorsi dei file sono sempre assoluti)
+MORE_ID = "__altri__"
+
+# Intestazioni delle colonne; quelle ordinabili mostrano la freccia dell'ordinamento
+HEADINGS = {"filename": "Nome File", "path": "Percorso", "size": "Dimensione (KB)", "master": "Master"}
 
 class JsonFilesScreen(tk.Toplevel):
     def __init__(self, master, project_name, project_path):
@@ -11,13 +31,21 @@ class JsonFilesScreen(tk.Toplevel):
         self.geometry("800x600")
         self.project_name = project_name
         self.project_path = project_path
-        self.json_files = []
+        self.files = FileListModel()
+        self.shown = PAGE_SIZE
+        self.render_job = None
+        self.more_job = None
         self.selected_item = None
         self.master_file_path = None
         
-        self.create_widgets()
+        self.loader = None
+        self.watcher = None
+        self.rules = None
+        
+        with span("files.create_widgets"):
+            self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.load_json_files()
-        self.load_master_file()
     
     def create_widgets(self):
         # Frame per i controlli
@@ -28,6 +56,10 @@ class JsonFilesScreen(tk.Toplevel):
         self.title_label = tk.Label(self.controls_frame, text=f"File JSON in {self.project_name}", font=("Helvetica", 16))
         self.title_label.pack(side=tk.LEFT, padx=5)
         
+        # Stato del caricamento
+        self.status_label = tk.Label(self.controls_frame, text="")
+        self.status_label.pack(side=tk.LEFT, padx=5)
+        
         # Pulsante "Traduzioni"
         self.translations_button = tk.Button(self.controls_frame, text="Traduzioni", command=self.open_translations_screen, state=tk.DISABLED)
         self.translations_button.pack(side=tk.RIGHT, padx=5)
@@ -36,16 +68,29 @@ class JsonFilesScreen(tk.Toplevel):
         self.master_button = tk.Button(self.controls_frame, text="Usa come master", command=self.set_as_master, state=tk.DISABLED)
         self.master_button.pack(side=tk.RIGHT, padx=5)
         
+        # Ricerca per nome o percorso del file
+        self.search_frame = tk.Frame(self)
+        self.search_frame.pack(fill=tk.X, padx=10)
+        tk.Label(self.search_frame, text="Cerca:").pack(side=tk.LEFT, padx=5)
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(self.search_frame, textvariable=self.search_var, width=40)
+        self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_entry.bind("<KeyRelease>", lambda e: self.filter_files())
+        self.count_label = tk.Label(self.search_frame, text="")
+        self.count_label.pack(side=tk.RIGHT, padx=5)
+        
         # Frame per la grid dei file JSON
         self.files_frame = tk.Frame(self)
         self.files_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Creazione della grid con Treeview
         self.tree = ttk.Treeview(self.files_frame, columns=("filename", "path", "size", "master"), show="headings")
-        self.tree.heading("filename", text="Nome File")
-        self.tree.heading("path", text="Percorso")
-        self.tree.heading("size", text="Dimensione (KB)")
-        self.tree.heading("master", text="Master")
+        # Click sull'intestazione: ordina per quella colonna (un secondo click inverte)
+        for column, title in HEADINGS.items():
+            if column == "master":
+                self.tree.heading(column, text=title)
+            else:
+                self.tree.heading(column, text=title, command=lambda c=column: self.sort_by(c))
         self.tree.column("filename", width=200)
         self.tree.column("path", width=350)
         self.tree.column("size", width=100)
@@ -55,7 +100,7 @@ class JsonFilesScreen(tk.Toplevel):
         # Scrollbar
         self.scrollbar = ttk.Scrollbar(self.files_frame, orient=tk.VERTICAL, command=self.tree.yview)
         self.scrollbar.pack(fill=tk.Y, side=tk.RIGHT)
-        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.tree.configure(yscrollcommand=self.on_scroll)
         
         # Binding per il doppio click
         self.tree.bind("<Double-1>", self.open_json_file)
@@ -65,7 +110,7 @@ class JsonFilesScreen(tk.Toplevel):
     
     def on_select(self, event):
         # Attiva il pulsante "Usa come master" quando una riga è selezionata
-        selected_items = self.tree.selection()
+        selected_items = [item for item in self.tree.selection() if item != MORE_ID]
         if selected_items:
             self.selected_item = selected_items[0]
             self.master_button.config(state=tk.NORMAL)
@@ -77,108 +122,232 @@ class JsonFilesScreen(tk.Toplevel):
         if not self.selected_item:
             return
         
-        # Ottiene l'indice del file selezionato
-        file_index = int(self.selected_item)
-        file_path = self.json_files[file_index]["path"]
-        
-        # Carica i progetti
-        projects = load_projects()
+        # L'identificativo della riga è il percorso del file
+        file_path = self.selected_item
         
-        # Trova il progetto corrente e aggiorna il master_file
-        for project in projects:
-            if project["name"] == self.project_name and project["path"] == self.project_path:
-                project["master_file"] = file_path
-                break
-        
-        # Salva i progetti aggiornati
-        save_projects(projects)
+        # Aggiorna solo il master_file del progetto corrente (scrittura atomica)
+        project = find_project(self.project_name, self.project_path)
+        if project:
+            get_project_store().update(project["id"], master_file=file_path)
         
         # Aggiorna la visualizzazione
         self.load_master_file()
         messagebox.showinfo("Informazione", f"File '{os.path.basename(file_path)}' impostato come master")
     
     def load_master_file(self):
-        # Carica i progetti
-        projects = load_projects()
-        
-        # Trova il progetto corrente
-        project = next((p for p in projects if p["name"] == self.project_name and p["path"] == self.project_path), None)
-        
-        # Resetta lo stato master per tutti i file
-        for i in range(len(self.json_files)):
-            if "master" in self.json_files[i]:
-                self.json_files[i]["master"] = ""
-        
-        # Se il progetto ha un master_file, aggiorna lo stato
-        if project and "master_file" in project:
-            master_file = project["master_file"]
-            self.master_file_path = master_file
-            for i, file in enumerate(self.json_files):
-                if file["path"] == master_file:
-                    self.json_files[i]["master"] = "✓"
-            
-            # Attiva il pulsante Traduzioni se c'è un file master
-            if self.master_file_path:
-                self.translations_button.config(state=tk.NORMAL)
-            else:
-                self.translations_button.config(state=tk.DISABLED)
+        # Trova il progetto corrente (ricerca indicizzata)
+        project = find_project(self.project_name, self.project_path)
+        self.master_file_path = project.get("master_file") if project else None
+        
+        # Attiva il pulsante Traduzioni se c'è un file master
+        if self.master_file_path:
+            self.translations_button.config(state=tk.NORMAL)
         else:
-            self.master_file_path = None
             self.translations_button.config(state=tk.DISABLED)
         
-        # Aggiorna la grid
-        self.update_files_grid()
+        # Aggiorna solo le celle del vecchio e del nuovo master
+        for path in self.files.set_master(self.master_file_path):
+            if self.tree.exists(path):
+                self.tree.set(path, "master", self.files.get(path)["master"])
     
     def load_json_files(self):
-        self.json_files = []
+        self.files = FileListModel()
+        self.tree.delete(*self.tree.get_children())
+        self.update_headings()
         
         # Verifica se il percorso esiste
         if not os.path.exists(self.project_path):
             messagebox.showerror("Errore", f"Il percorso {self.project_path} non esiste")
+            self.load_master_file()
+            return
+        
+        # Scansione condivisa con la schermata delle traduzioni (aggiornata ad ogni apertura),
+        # eseguita in background: le righe arrivano man mano tramite poll_loader
+        self.loader = BackgroundLoader(get_catalog_cache(), get_parse_engine())
+        self.rules = scan_rules(find_project(self.project_name, self.project_path))
+        self.loader.scan(self.project_path, refresh=True, rules=self.rules)
+        self.status_label.config(text="Scansione in corso...")
+        self.after(POLL_INTERVAL_MS, self.poll_loader)
+    
+    def poll_loader(self):
+        if self.loader is None:
             return
         
-        # Cerca tutti i file JSON nel percorso del progetto
-        for root, dirs, files in os.walk(self.project_path):
-            for file in files:
-                if file.lower().endswith(".json"):
-                    file_path = os.path.join(root, file)
-                    file_size = os.path.getsize(file_path) / 1024  # Dimensione in KB
-                    self.json_files.append({
-                        "filename": file,
-                        "path": file_path,
-                        "size": round(file_size, 2),
-                        "master": ""
-                    })
-        
-        self.update_files_grid()
-    
-    def update_files_grid(self):
-        # Cancella tutti gli elementi esistenti
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Aggiunge i file JSON alla grid
-        for i, file in enumerate(self.json_files):
-            self.tree.insert("", tk.END, values=(file["filename"], file["path"], file["size"], file["master"]), iid=str(i))
+        for message in self.loader.poll():
+            kind = message[0]
+            if kind == "file":
+                self.add_json_file(message[1])
+            elif kind == "scanned":
+                # Da qui in poi le modifiche arrivano dal watcher, senza nuove scansioni
+                self.watcher = ProjectWatcher(self.project_path, self.rules)
+                self.watcher.start(message[1])
+                self.after(POLL_INTERVAL_MS, self.poll_watcher)
+            elif kind == "error":
+                messagebox.showerror("Errore", f"Errore durante la scansione: {message[2]}")
+            elif kind == "done":
+                self.loader.close()
+                self.loader = None
+                self.status_label.config(text=f"{len(self.files.entries)} file")
+                self.load_master_file()
+                self.render()
+                return
+        
+        self.status_label.config(text=f"Scansione in corso... {len(self.files.entries)} file")
+        self.after(POLL_INTERVAL_MS, self.poll_loader)
+    
+    def add_json_file(self, file):
+        # Il modello resta ordinato; la grid si aggiorna una volta per gruppo di file
+        self.files.add(file["filename"], file["path"], file["size"])
+        self.schedule_render()
+    
+    def filter_files(self):
+        # Filtra il modello e riparte dalla prima pagina
+        if self.files.set_query(self.search_var.get()):
+            self.shown = PAGE_SIZE
+            self.render()
+    
+    def sort_by(self, column):
+        self.files.set_sort(column)
+        self.update_headings()
+        self.render()
+    
+    def update_headings(self):
+        for column, title in HEADINGS.items():
+            if column == self.files.sort_column:
+                title += " ▼" if self.files.reverse else " ▲"
+            self.tree.heading(column, text=title)
+    
+    def schedule_render(self):
+        if self.render_job is None:
+            self.render_job = self.after_idle(self.render)
+    
+    def render(self):
+        """Allinea la grid alle prime self.shown righe del modello toccando solo le righe diverse"""
+        if self.render_job is not None:
+            self.after_cancel(self.render_job)
+            self.render_job = None
+        with span("files.render", f"{len(self.files)} file"):
+            rows = self.files.rows(self.shown)
+            wanted = [entry["path"] for entry in rows]
+            current = [item for item in self.tree.get_children() if item != MORE_ID]
+            if wanted != current:
+                # Toglie le righe non più visibili, poi inserisce o sposta solo quelle fuori posto
+                wanted_set = set(wanted)
+                removed = [item for item in current if item not in wanted_set]
+                if removed:
+                    self.tree.delete(*removed)
+                current = [item for item in current if item in wanted_set]
+                placed = set(current)
+                # Un'unica passata: next_item indica la prima riga della grid non ancora confrontata,
+                # saltando quelle già spostate più in alto
+                moved = set()
+                next_item = 0
+                for position, entry in enumerate(rows):
+                    path = entry["path"]
+                    while next_item < len(current) and current[next_item] in moved:
+                        next_item += 1
+                    if next_item < len(current) and current[next_item] == path:
+                        next_item += 1
+                        continue
+                    if path in placed:
+                        self.tree.move(path, "", position)
+                        moved.add(path)
+                    else:
+                        self.tree.insert("", position, iid=path, values=(entry["filename"], entry["path"], entry["size"], entry["master"]))
+            
+            # Riga finale per le righe non ancora inserite
+            remaining = len(self.files) - len(wanted)
+            if remaining > 0:
+                text = f"altri {remaining} file..."
+                if self.tree.exists(MORE_ID):
+                    self.tree.item(MORE_ID, values=(text, "doppio click o scorri per caricare", "", ""))
+                    self.tree.move(MORE_ID, "", tk.END)
+                else:
+                    self.tree.insert("", tk.END, iid=MORE_ID, values=(text, "doppio click o scorri per caricare", "", ""))
+            elif self.tree.exists(MORE_ID):
+                self.tree.delete(MORE_ID)
+            
+            total = len(self.files.entries)
+            self.count_label.config(text=f"{len(self.files)} di {total} file" if len(self.files) != total else "")
+    
+    def load_more(self):
+        self.more_job = None
+        if len(self.files) > self.shown:
+            self.shown += PAGE_SIZE
+            self.render()
+    
+    def on_scroll(self, first, last):
+        # Arrivati in fondo si inserisce la pagina successiva
+        self.scrollbar.set(first, last)
+        if float(last) >= 1.0 and self.tree.exists(MORE_ID) and self.more_job is None:
+            self.more_job = self.after_idle(self.load_more)
+    
+    def poll_watcher(self):
+        if self.watcher is None:
+            return
+        
+        # Aggiorna solo le righe dei file cambiati
+        cache = get_catalog_cache()
+        for kind, payload in self.watcher.poll():
+            cache.apply_change(self.project_path, self.rules, kind, payload)
+            if kind == "added" and payload["path"] not in self.files:
+                self.add_json_file(payload)
+            elif kind in ("added", "modified"):
+                entry = self.files.set_size(payload["path"], payload["size"])
+                if entry is not None and self.tree.exists(entry["path"]):
+                    self.tree.set(entry["path"], "size", entry["size"])
+                    if self.files.sort_column == "size":
+                        self.schedule_render()
+            elif kind == "removed":
+                entry = self.files.remove(payload)
+                if entry is not None:
+                    if self.tree.exists(entry["path"]):
+                        self.tree.delete(entry["path"])
+                    self.schedule_render()
+                    if self.selected_item == entry["path"]:
+                        self.selected_item = None
+                        self.master_button.config(state=tk.DISABLED)
+        
+        self.after(POLL_INTERVAL_MS, self.poll_watcher)
+    
+    def on_close(self):
+        # Annulla il caricamento in corso e ferma il watcher prima di chiudere la finestra
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader = None
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.destroy()
     
     def open_json_file(self, event):
         # Identifica l'elemento selezionato
         item = self.tree.identify_row(event.y)
         if not item:
             return
+        if item == MORE_ID:
+            self.load_more()
+            return
         
-        # Ottiene l'indice del file selezionato
-        file_index = int(item)
-        file_path = self.json_files[file_index]["path"]
+        # L'identificativo della riga è il percorso del file
+        file_path = item
+        
+        # I file JSON grandi vengono mostrati come albero letto su richiesta
+        catalog_format = format_for(file_path)
+        is_json = catalog_format is not None and catalog_format.name in ("json", "arb")
+        if is_json and os.path.getsize(file_path) > VIEWER_TEXT_MAX_BYTES:
+            try:
+                JsonViewer(self, file_path, self.files.get(file_path)["filename"])
+            except Exception as e:
+                messagebox.showerror("Errore", f"Impossibile aprire il file: {e}")
+            return
         
         try:
-            # Carica il contenuto del file JSON
-            with open(file_path, "r", encoding="utf-8") as f:
-                json_content = json.load(f)
+            content = self.file_text(file_path, is_json)
             
             # Crea una nuova finestra per visualizzare il contenuto
             json_window = tk.Toplevel(self)
-            json_window.title(f"Contenuto - {self.json_files[file_index]['filename']}")
+            json_window.title(f"Contenuto - {self.files.get(file_path)['filename']}")
             json_window.geometry("600x400")
             
             # Crea un widget Text con scrollbar
@@ -192,14 +361,26 @@ class JsonFilesScreen(tk.Toplevel):
             scrollbar.pack(fill=tk.Y, side=tk.RIGHT)
             text_widget.configure(yscrollcommand=scrollbar.set)
             
-            # Inserisce il contenuto JSON formattato
-            formatted_json = json.dumps(json_content, indent=4)
-            text_widget.insert(tk.END, formatted_json)
+            # Inserisce il contenuto del file
+            text_widget.insert(tk.END, content)
             text_widget.config(state=tk.DISABLED)  # Rende il testo di sola lettura
             
         except Exception as e:
             messagebox.showerror("Errore", f"Impossibile aprire il file: {e}")
     
+    def file_text(self, file_path, is_json):
+        if is_json:
+            # Contenuto JSON formattato
+            with open(file_path, "r", encoding="utf-8") as f:
+                return json.dumps(json.load(f), indent=4)
+        if file_path.lower().endswith(".mo"):
+            # Catalogo compilato: si mostrano le voci analizzate
+            keys, values = parse_catalog(file_path)
+            return "\n".join(f"{format_key(path)} = {format_value(value)}" for path, value in zip(keys, values))
+        # Formati testuali: il file così com'è, fino al limite del visualizzatore
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read(VIEWER_TEXT_MAX_BYTES)
+    
     def open_translations_screen(self):
         if not self.master_file_path:
             messagebox.showinfo("Informazione", "Seleziona prima un file master")
@@ -0,0 +1,92 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import itertools
+from shared.json_stream import LazyJsonDocument, SCALAR_KIND
+
+# Numero di figli inseriti per volta quando si espande un nodo
+PAGE_SIZE = 500
+
+class JsonViewer(tk.Toplevel):
+    """Visualizzatore ad albero per file JSON molto grandi: i nodi vengono letti all'espansione"""
+
+    def __init__(self, master, file_path, filename):
+        # Apre il documento prima della finestra: un file non valido non lascia finestre vuote
+        document = LazyJsonDocument(file_path)
+        super().__init__(master)
+        self.title(f"Contenuto - {filename}")
+        self.geometry("700x500")
+        self.document = document
+        self.offsets = {}      # iid -> offset del valore nel file
+        self.pending = {}      # iid del nodo "altri..." -> (nodo padre, generatore dei figli)
+        self.counter = itertools.count()
+
+        self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Radice del documento
+        root_id = self.insert_node("", "(radice)", self.document.root)
+        self.tree.item(root_id, open=True)
+        self.expand(root_id)
+
+    def create_widgets(self):
+        frame = tk.Frame(self)
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        self.tree = ttk.Treeview(frame, columns=("value",))
+        self.tree.heading("#0", text="Chiave")
+        self.tree.heading("value", text="Valore")
+        self.tree.column("#0", width=250)
+        self.tree.column("value", width=400)
+        self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
+        scrollbar.pack(fill=tk.Y, side=tk.RIGHT)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        self.tree.bind("<<TreeviewOpen>>", self.on_open)
+        self.tree.bind("<Double-1>", self.on_double_click)
+
+    def insert_node(self, parent, key, offset):
+        iid = f"n{next(self.counter)}"
+        self.offsets[iid] = offset
+        self.tree.insert(parent, tk.END, iid=iid, text=str(key), values=(self.document.preview(offset),))
+        if self.document.kind(offset) != SCALAR_KIND:
+            # Figlio segnaposto: rende il nodo espandibile senza leggerne il contenuto
+            self.tree.insert(iid, tk.END, iid=f"{iid}:placeholder", text="")
+        return iid
+
+    def on_open(self, event):
+        iid = self.tree.focus()
+        if self.tree.exists(f"{iid}:placeholder"):
+            self.expand(iid)
+
+    def expand(self, iid):
+        placeholder = f"{iid}:placeholder"
+        if self.tree.exists(placeholder):
+            self.tree.delete(placeholder)
+        self.insert_page(iid, self.document.children(self.offsets[iid]))
+
+    def insert_page(self, parent, children):
+        try:
+            page = list(itertools.islice(children, PAGE_SIZE + 1))
+            for key, offset in page[:PAGE_SIZE]:
+                self.insert_node(parent, key, offset)
+        except ValueError as e:
+            messagebox.showerror("Errore", f"JSON non valido: {e}", parent=self)
+            return
+        if len(page) > PAGE_SIZE:
+            # Il generatore resta in sospeso: la pagina successiva riparte da qui
+            more_id = f"n{next(self.counter)}"
+            self.tree.insert(parent, tk.END, iid=more_id, text="altri...", values=("doppio click per caricare",))
+            self.pending[more_id] = (parent, itertools.chain([page[PAGE_SIZE]], children))
+
+    def on_double_click(self, event):
+        item = self.tree.identify_row(event.y)
+        if item in self.pending:
+            parent, children = self.pending.pop(item)
+            self.tree.delete(item)
+            self.insert_page(parent, children)
+
+    def on_close(self):
+        self.document.close()
+        self.destroy()
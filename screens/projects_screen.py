@@ -3,17 +3,34 @@ from tkinter import ttk, messagebox, filedialog
 import json
 import os
 import platform
-from shared.utils import load_projects, save_projects
-from screens.json_files_screen import JsonFilesScreen
+import queue
+import re
+import threading
+from shared.utils import load_projects
+from shared.project_store import get_project_store
+from shared.constants import DEFAULT_IGNORE, POLL_INTERVAL_MS
+from shared.scanner import scan_rules
+from shared.languages import language_rules, FROM_FILENAME, FROM_DIRECTORY, FROM_PATTERN
+from shared.profiling import span
+
+# Come ricavare la lingua dei file, nell'ordine mostrato nella combobox
+LANGUAGE_SOURCES = {"Nome file": FROM_FILENAME, "Cartella": FROM_DIRECTORY, "Pattern": FROM_PATTERN}
 
 class ProjectsScreen(tk.Frame):
     def __init__(self, master):
         super().__init__(master)
         self.master = master
         self.projects = []
+        self.diagnostics_window = None
+        self.jobs_window = None
+        self.edit_frame = None
+        self.editing_id = None
+        self.loading = False
         
-        self.create_widgets()
-        self.load_projects()
+        with span("projects.create_widgets"):
+            self.create_widgets()
+        # L'archivio dei progetti si legge in background: la finestra compare subito
+        self.load_projects_async()
     
     def create_widgets(self):
         # Frame per i controlli
@@ -24,16 +41,24 @@ class ProjectsScreen(tk.Frame):
         self.title_label = tk.Label(self.controls_frame, text="Progetti", font=("Helvetica", 16))
         self.title_label.pack(side=tk.LEFT, padx=5)
         
+        # Stato del caricamento dei progetti
+        self.status_label = tk.Label(self.controls_frame, text="")
+        self.status_label.pack(side=tk.LEFT, padx=5)
+        
         # Pulsante per aggiungere un nuovo progetto
         self.add_button = tk.Button(self.controls_frame, text="Nuovo Progetto", command=self.show_add_project)
         self.add_button.pack(side=tk.RIGHT, padx=5)
         
+        # Pulsante per la finestra di diagnostica (tempi, cache, widget)
+        self.diagnostics_button = tk.Button(self.controls_frame, text="Diagnostica", command=self.open_diagnostics)
+        self.diagnostics_button.pack(side=tk.RIGHT, padx=5)
+        
         # Frame per la grid dei progetti
         self.projects_frame = tk.Frame(self)
         self.projects_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Creazione della grid con Treeview
-        self.tree = ttk.Treeview(self.projects_frame, columns=("name", "path"), show="headings")
+        # Creazione della grid con Treeview (selezione multipla per le operazioni su più progetti)
+        self.tree = ttk.Treeview(self.projects_frame, columns=("name", "path"), show="headings", selectmode="extended")
         self.tree.heading("name", text="Nome Progetto")
         self.tree.heading("path", text="Percorso")
         self.tree.column("name", width=200)
@@ -54,8 +79,11 @@ class ProjectsScreen(tk.Frame):
         
         # Rimuovo il binding per il doppio click
         # self.tree.bind("<Double-1>", self.open_json_files_screen)
-        
-        # Frame per aggiungere/modificare progetti (inizialmente nascosto)
+    
+    def create_edit_frame(self):
+        # Frame per aggiungere/modificare progetti: creato alla prima apertura, non all'avvio
+        if self.edit_frame is not None:
+            return
         self.edit_frame = tk.Frame(self)
         
         # Campi per nome e percorso
@@ -74,9 +102,28 @@ class ProjectsScreen(tk.Frame):
         self.browse_button = tk.Button(self.path_frame, text="Sfoglia", command=self.browse_directory)
         self.browse_button.pack(side=tk.RIGHT, padx=5)
         
+        # Regole di scansione: directory da ignorare (glob separati da virgola) e file da includere
+        tk.Label(self.edit_frame, text="Ignora:").grid(row=2, column=0, sticky=tk.W, padx=5, pady=5)
+        self.ignore_entry = tk.Entry(self.edit_frame, width=40)
+        self.ignore_entry.grid(row=2, column=1, padx=5, pady=5)
+        
+        tk.Label(self.edit_frame, text="Includi:").grid(row=3, column=0, sticky=tk.W, padx=5, pady=5)
+        self.include_entry = tk.Entry(self.edit_frame, width=40)
+        self.include_entry.grid(row=3, column=1, padx=5, pady=5)
+        
+        # Lingua dei file: dal nome (it.json), dalla cartella (it/common.json) o da un pattern con (?P<lang>...)
+        tk.Label(self.edit_frame, text="Lingua da:").grid(row=4, column=0, sticky=tk.W, padx=5, pady=5)
+        self.language_frame = tk.Frame(self.edit_frame)
+        self.language_frame.grid(row=4, column=1, sticky=tk.W+tk.E, padx=5, pady=5)
+        self.language_source = ttk.Combobox(self.language_frame, values=list(LANGUAGE_SOURCES), state="readonly", width=10)
+        self.language_source.current(0)
+        self.language_source.pack(side=tk.LEFT)
+        self.language_pattern_entry = tk.Entry(self.language_frame, width=26)
+        self.language_pattern_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
         # Pulsanti per salvare e annullare
         self.buttons_frame = tk.Frame(self.edit_frame)
-        self.buttons_frame.grid(row=2, column=0, columnspan=2, pady=10)
+        self.buttons_frame.grid(row=5, column=0, columnspan=2, pady=10)
         
         self.save_button = tk.Button(self.buttons_frame, text="Salva", command=self.save_project)
         self.save_button.pack(side=tk.LEFT, padx=5)
@@ -96,17 +143,44 @@ class ProjectsScreen(tk.Frame):
             self.path_entry.insert(0, directory)
     
     def load_projects(self):
-        self.projects = load_projects()
+        with span("projects.load"):
+            self.projects = load_projects()
+        self.update_projects_grid()
+    
+    def load_projects_async(self):
+        # Apertura dell'archivio (SQLite, migrazione del vecchio JSON) e lettura in un thread;
+        # la griglia si riempie al primo controllo dopo il disegno della finestra
+        self.loading = True
+        self.status_label.config(text="Caricamento progetti...")
+        results = queue.Queue()
+        
+        def load():
+            with span("projects.load"):
+                results.put(load_projects())
+        
+        threading.Thread(target=load, daemon=True).start()
+        self.after(POLL_INTERVAL_MS, self.poll_projects, results)
+    
+    def poll_projects(self, results):
+        try:
+            projects = results.get_nowait()
+        except queue.Empty:
+            self.after(POLL_INTERVAL_MS, self.poll_projects, results)
+            return
+        self.loading = False
+        self.status_label.config(text="")
+        self.projects = projects
         self.update_projects_grid()
     
     def update_projects_grid(self):
-        # Cancella tutti gli elementi esistenti
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Aggiunge i progetti alla grid
-        for project in self.projects:
-            self.tree.insert("", tk.END, values=(project["name"], project["path"]), iid=str(project["id"]))
+        with span("projects.render", f"{len(self.projects)} progetti"):
+            # Cancella tutti gli elementi esistenti
+            for item in self.tree.get_children():
+                self.tree.delete(item)
+            
+            # Aggiunge i progetti alla grid
+            for project in self.projects:
+                self.tree.insert("", tk.END, values=(project["name"], project["path"]), iid=str(project["id"]))
     
     def show_context_menu(self, event):
         # Identifica l'elemento selezionato
@@ -114,15 +188,26 @@ class ProjectsScreen(tk.Frame):
         if not item:
             return
         
-        # Seleziona l'elemento
-        self.tree.selection_set(item)
+        # Seleziona l'elemento, senza perdere una selezione multipla che già lo comprende
+        if item not in self.tree.selection():
+            self.tree.selection_set(item)
         self.tree.focus(item)  # Imposta anche il focus sull'elemento selezionato
+        selected = self.tree.selection()
+        
+        # Importato qui: le operazioni su più progetti non servono all'avvio
+        from screens.jobs_window import OPERATION_LABELS
         
         # Crea il menu contestuale
         context_menu = tk.Menu(self, tearoff=0)
-        context_menu.add_command(label="Mostra Files", command=lambda: self.open_json_files_screen(item))
-        context_menu.add_command(label="Modifica", command=lambda: self.show_edit_project(item))
-        context_menu.add_command(label="Elimina", command=lambda: self.delete_project(item))
+        if len(selected) == 1:
+            context_menu.add_command(label="Mostra Files", command=lambda: self.open_json_files_screen(item))
+            context_menu.add_command(label="Modifica", command=lambda: self.show_edit_project(item))
+            context_menu.add_command(label="Elimina", command=lambda: self.delete_project(item))
+            context_menu.add_separator()
+        # Operazioni eseguite in parallelo su tutti i progetti selezionati
+        for operation, label in OPERATION_LABELS.items():
+            suffix = f" ({len(selected)} progetti)" if len(selected) > 1 else ""
+            context_menu.add_command(label=label + suffix, command=lambda operation=operation: self.run_bulk_operation(operation, selected))
         
         # Mostra il menu contestuale
         try:
@@ -131,9 +216,15 @@ class ProjectsScreen(tk.Frame):
             context_menu.grab_release()  # Assicura che il menu rilasci il controllo quando viene chiuso
     
     def show_add_project(self):
+        self.create_edit_frame()
         # Resetta i campi
         self.name_entry.delete(0, tk.END)
         self.path_entry.delete(0, tk.END)
+        self.ignore_entry.delete(0, tk.END)
+        self.ignore_entry.insert(0, ", ".join(DEFAULT_IGNORE))
+        self.include_entry.delete(0, tk.END)
+        self.language_source.current(0)
+        self.language_pattern_entry.delete(0, tk.END)
         
         # Resetta l'ID in modifica
         self.editing_id = None
@@ -147,6 +238,7 @@ class ProjectsScreen(tk.Frame):
         project = next((p for p in self.projects if p["id"] == project_id), None)
         
         if project:
+            self.create_edit_frame()
             # Imposta i valori nei campi
             self.name_entry.delete(0, tk.END)
             self.name_entry.insert(0, project["name"])
@@ -154,6 +246,17 @@ class ProjectsScreen(tk.Frame):
             self.path_entry.delete(0, tk.END)
             self.path_entry.insert(0, project["path"])
             
+            rules = scan_rules(project)
+            self.ignore_entry.delete(0, tk.END)
+            self.ignore_entry.insert(0, ", ".join(rules["ignore"]))
+            self.include_entry.delete(0, tk.END)
+            self.include_entry.insert(0, rules["include"] or "")
+            
+            languages = language_rules(project)
+            self.language_source.set(next(label for label, source in LANGUAGE_SOURCES.items() if source == languages["from"]))
+            self.language_pattern_entry.delete(0, tk.END)
+            self.language_pattern_entry.insert(0, languages["pattern"] or "")
+            
             # Imposta l'ID in modifica
             self.editing_id = project_id
             
@@ -162,40 +265,46 @@ class ProjectsScreen(tk.Frame):
     
     def hide_edit_frame(self):
         # Nasconde il frame di modifica
-        self.edit_frame.pack_forget()
+        if self.edit_frame is not None:
+            self.edit_frame.pack_forget()
     
     def save_project(self):
         name = self.name_entry.get().strip()
         path = self.path_entry.get().strip()
+        ignore = [pattern.strip() for pattern in self.ignore_entry.get().split(",") if pattern.strip()]
+        include = self.include_entry.get().strip()
+        language_from = LANGUAGE_SOURCES[self.language_source.get()]
+        language_pattern = self.language_pattern_entry.get().strip()
         
         if not name or not path:
             messagebox.showerror("Errore", "Nome e percorso sono obbligatori")
             return
-        
+        if language_from == FROM_PATTERN:
+            try:
+                if "lang" not in re.compile(language_pattern).groupindex:
+                    raise re.error("manca il gruppo (?P<lang>...)")
+            except re.error as e:
+                messagebox.showerror("Errore", f"Pattern della lingua non valido: {e}")
+                return
+        
+        store = get_project_store()
         if self.editing_id is None:
-            # Aggiunge un nuovo progetto
-            new_id = 1
-            if self.projects:
-                new_id = max(p["id"] for p in self.projects) + 1
-            
-            self.projects.append({
-                "id": new_id,
+            # Aggiunge un nuovo progetto (l'id viene assegnato dall'archivio)
+            store.add({
                 "name": name,
-                "path": path
+                "path": path,
+                "ignore": ignore,
+                "include": include,
+                "language_from": language_from,
+                "language_pattern": language_pattern
             })
         else:
-            # Modifica un progetto esistente
-            for project in self.projects:
-                if project["id"] == self.editing_id:
-                    project["name"] = name
-                    project["path"] = path
-                    break
-        
-        # Salva i progetti
-        save_projects(self.projects)
+            # Modifica solo il progetto interessato
+            store.update(self.editing_id, name=name, path=path, ignore=ignore, include=include,
+                         language_from=language_from, language_pattern=language_pattern)
         
         # Aggiorna la grid
-        self.update_projects_grid()
+        self.load_projects()
         
         # Nasconde il frame di modifica
         self.hide_edit_frame()
@@ -207,11 +316,9 @@ class ProjectsScreen(tk.Frame):
         
         # Elimina il progetto
         project_id = int(item_id)
+        get_project_store().delete(project_id)
         self.projects = [p for p in self.projects if p["id"] != project_id]
         
-        # Salva i progetti
-        save_projects(self.projects)
-        
         # Aggiorna la grid
         self.update_projects_grid()
     
@@ -225,5 +332,30 @@ class ProjectsScreen(tk.Frame):
         project = next((p for p in self.projects if p["id"] == project_id), None)
         
         if project:
+            # Importato qui: la schermata dei file carica il resto dell'applicazione
+            from screens.json_files_screen import JsonFilesScreen
             # Apre la schermata dei file JSON
-            JsonFilesScreen(self.master, project["name"], project["path"])
\ No newline at end of file
+            JsonFilesScreen(self.master, project["name"], project["path"])
+    
+    def run_bulk_operation(self, operation, items):
+        projects = [p for p in self.projects if str(p["id"]) in items]
+        if not projects:
+            return
+        if operation == "normalize" and not messagebox.askyesno(
+                "Conferma", f"Riordinare le chiavi dei file JSON come nel master in {len(projects)} progetti?"):
+            return
+        from screens.jobs_window import JobsWindow
+        # Una sola finestra raccoglie tutte le operazioni della sessione
+        if self.jobs_window is None or not self.jobs_window.winfo_exists():
+            self.jobs_window = JobsWindow(self.master)
+        else:
+            self.jobs_window.lift()
+        self.jobs_window.submit(projects, operation)
+    
+    def open_diagnostics(self):
+        # Una sola finestra di diagnostica: se è già aperta viene portata in primo piano
+        if self.diagnostics_window is not None and self.diagnostics_window.winfo_exists():
+            self.diagnostics_window.lift()
+            return
+        from screens.diagnostics_window import DiagnosticsWindow
+        self.diagnostics_window = DiagnosticsWindow(self.master)
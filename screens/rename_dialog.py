@@ -0,0 +1,110 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import re
+from shared.catalog import format_key
+from shared.refactor import PREFIX, REGEX, plan_prefix, plan_regex
+
+# Modalità mostrate nella combobox
+MODE_LABELS = {"Chiave o gruppo": PREFIX, "Espressione regolare": REGEX}
+# Rinomine mostrate nell'anteprima
+PREVIEW_LIMIT = 500
+
+class RenameDialog(tk.Toplevel):
+    """Rinomina o sposta chiavi e gruppi in tutte le lingue, con anteprima e conflitti"""
+
+    def __init__(self, master, get_catalog, on_apply, initial=""):
+        super().__init__(master)
+        self.title("Rinomina chiavi")
+        self.geometry("640x460")
+        self.transient(master)
+        # Il catalogo può essere ricaricato mentre la finestra è aperta: si legge sempre quello attuale
+        self.get_catalog = get_catalog
+        self.on_apply = on_apply
+        self.plan = None
+        self.preview_job = None
+        self.create_widgets(initial)
+        self.update_preview()
+
+    def create_widgets(self, initial):
+        self.form_frame = tk.Frame(self)
+        self.form_frame.pack(fill=tk.X, padx=10, pady=10)
+        tk.Label(self.form_frame, text="Modalità:").grid(row=0, column=0, sticky="w", padx=5, pady=2)
+        self.mode = ttk.Combobox(self.form_frame, values=list(MODE_LABELS), state="readonly", width=22)
+        self.mode.current(0)
+        self.mode.grid(row=0, column=1, sticky="w", padx=5, pady=2)
+        self.mode.bind("<<ComboboxSelected>>", self.schedule_preview)
+        tk.Label(self.form_frame, text="Da:").grid(row=1, column=0, sticky="w", padx=5, pady=2)
+        self.old_var = tk.StringVar(value=initial)
+        self.old_entry = tk.Entry(self.form_frame, textvariable=self.old_var, width=60)
+        self.old_entry.grid(row=1, column=1, sticky="we", padx=5, pady=2)
+        tk.Label(self.form_frame, text="A:").grid(row=2, column=0, sticky="w", padx=5, pady=2)
+        self.new_var = tk.StringVar(value=initial)
+        self.new_entry = tk.Entry(self.form_frame, textvariable=self.new_var, width=60)
+        self.new_entry.grid(row=2, column=1, sticky="we", padx=5, pady=2)
+        self.form_frame.columnconfigure(1, weight=1)
+        for entry in (self.old_entry, self.new_entry):
+            entry.bind("<KeyRelease>", self.schedule_preview)
+
+        self.summary_label = tk.Label(self, text="", anchor="w", justify=tk.LEFT)
+        self.summary_label.pack(fill=tk.X, padx=15)
+
+        self.buttons_frame = tk.Frame(self)
+        self.buttons_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=10)
+        tk.Button(self.buttons_frame, text="Chiudi", command=self.destroy).pack(side=tk.RIGHT, padx=5)
+        self.apply_button = tk.Button(self.buttons_frame, text="Rinomina", command=self.apply, state=tk.DISABLED)
+        self.apply_button.pack(side=tk.RIGHT, padx=5)
+
+        # Anteprima: conflitti in rosso, poi le rinomine
+        self.preview_list = tk.Listbox(self)
+        self.preview_list.pack(fill=tk.BOTH, expand=True, padx=10)
+        self.new_entry.focus_set()
+
+    def schedule_preview(self, event=None):
+        if self.preview_job is not None:
+            self.after_cancel(self.preview_job)
+        self.preview_job = self.after(200, self.update_preview)
+
+    def update_preview(self):
+        self.preview_job = None
+        self.plan = None
+        self.preview_list.delete(0, tk.END)
+        old = self.old_var.get().strip()
+        new = self.new_var.get().strip()
+        if not old or (MODE_LABELS[self.mode.get()] == PREFIX and not new):
+            self.show_summary("")
+            return
+        catalog = self.get_catalog()
+        try:
+            if MODE_LABELS[self.mode.get()] == PREFIX:
+                plan = plan_prefix(catalog, old, new)
+            else:
+                plan = plan_regex(catalog, old, new)
+        except (re.error, IndexError) as e:
+            self.show_summary(f"Espressione non valida: {e}")
+            return
+        self.plan = plan
+        for conflict in plan.conflicts:
+            self.preview_list.insert(tk.END, conflict)
+            self.preview_list.itemconfig(tk.END, foreground="red")
+        for key_id, path in list(plan.renames.items())[:PREVIEW_LIMIT]:
+            self.preview_list.insert(tk.END, f"{format_key(catalog.keys[key_id])}  →  {format_key(path)}")
+        if len(plan) > PREVIEW_LIMIT:
+            self.preview_list.insert(tk.END, f"... altre {len(plan) - PREVIEW_LIMIT}")
+        text = f"{len(plan)} chiavi da rinominare"
+        if plan.conflicts:
+            text += f", {len(plan.conflicts)} conflitti"
+        self.show_summary(text)
+
+    def show_summary(self, text):
+        self.summary_label.config(text=text)
+        ready = self.plan is not None and len(self.plan) and not self.plan.conflicts
+        self.apply_button.config(state=tk.NORMAL if ready else tk.DISABLED)
+
+    def apply(self):
+        self.update_preview()
+        if self.plan is None or not len(self.plan) or self.plan.conflicts:
+            return
+        if not messagebox.askyesno("Conferma", f"Rinominare {len(self.plan)} chiavi in tutte le lingue?", parent=self):
+            return
+        if self.on_apply(self.plan):
+            self.destroy()
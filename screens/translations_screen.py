@@ -1,7 +1,30 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 import os
+import queue
+import threading
+from screens.rename_dialog import RenameDialog
+from screens.virtual_grid import VirtualGrid
+from shared.catalog import Catalog, MISSING, Namespace, format_key, format_value, ids_of
+from shared.catalog_cache import get_catalog_cache
+from shared.constants import POLL_INTERVAL_MS
+from shared.loader import BackgroundLoader
+from shared.catalog_writer import write_locale
+from shared.coverage import catalog_diff, problem_ids, extra_ids
+from shared.formats import is_writable, parse_catalog
+from shared.languages import language_detector
+from shared.search_index import SearchIndex, SUBSTRING, PREFIX
+from shared.translation_memory import get_translation_memory
+from shared.parallel_parse import file_signature, get_parse_engine
+from shared.placeholders import PlaceholderIndex
+from shared.profiling import span
+from shared.refactor import apply_plan
+from shared.scanner import scan_rules
+from shared.utils import find_project, load_projects
+from shared.watcher import ProjectWatcher
+
+# Modalità di ricerca mostrate nella combobox
+SEARCH_MODES = {"Contiene": SUBSTRING, "Inizia con": PREFIX}
 
 class TranslationsScreen(tk.Toplevel):
     def __init__(self, master, project_name, project_path, master_file_path):
@@ -12,11 +35,28 @@ class TranslationsScreen(tk.Toplevel):
         self.project_path = project_path
         self.master_file_path = master_file_path
         self.json_files = []
-        self.translations = {}
-        self.master_language = os.path.basename(master_file_path).split('.')[0]
+        self.catalog = Catalog()
+        # Lingua di ogni file secondo le regole del progetto (nome del file, cartella o pattern)
+        self.detector = language_detector(find_project(project_name, project_path), project_path)
+        self.master_language = self.detector.language(master_file_path)
+        # Il namespace del master si carica subito, gli altri quando vengono espansi
+        self.master_namespace = self.detector.namespace(master_file_path)
+        self.collapsed_namespaces = set()
+        
+        self.loader = None
+        self.loader_job = None
+        self.watcher = None
+        self.rules = None
+        self.scanned_files = None
+        self.pending_changes = {}
+        # Verifica dei segnaposto in corso (copia del catalogo) e risultati dal thread
+        self.validation = None
+        self.validation_results = queue.Queue()
+        self.validation_failed = False
         
-        self.create_widgets()
-        self.load_json_files()
+        with span("translations.create_widgets"):
+            self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.load_translations()
     
     def create_widgets(self):
@@ -28,140 +68,586 @@ class TranslationsScreen(tk.Toplevel):
         self.title_label = tk.Label(self.controls_frame, text=f"Traduzioni per {self.project_name}", font=("Helvetica", 16))
         self.title_label.pack(side=tk.LEFT, padx=5)
         
-        # Frame principale
-        self.main_frame = tk.Frame(self)
-        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        # Stato del caricamento
+        self.status_label = tk.Label(self.controls_frame, text="")
+        self.status_label.pack(side=tk.LEFT, padx=5)
+        
+        # Pulsante "Salva": scrive solo i file delle lingue modificate
+        self.save_button = tk.Button(self.controls_frame, text="Salva", command=self.save_changes, state=tk.DISABLED)
+        self.save_button.pack(side=tk.RIGHT, padx=5)
         
-        # Creiamo un frame con scrollbar
-        self.canvas = tk.Canvas(self.main_frame)
-        self.scrollbar = ttk.Scrollbar(self.main_frame, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.canvas)
+        # Rinomina o sposta chiavi e gruppi in tutte le lingue
+        self.rename_button = tk.Button(self.controls_frame, text="Rinomina chiavi...", command=self.open_rename)
+        self.rename_button.pack(side=tk.RIGHT, padx=5)
         
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(
-                scrollregion=self.canvas.bbox("all")
-            )
-        )
+        # Filtro: mostra solo le chiavi con problemi (mancanti, vuote, tipo diverso, in più)
+        self.problems_only = tk.BooleanVar(value=False)
+        self.problems_check = tk.Checkbutton(self.controls_frame, text="Solo problemi", variable=self.problems_only, command=self.create_translations_table)
+        self.problems_check.pack(side=tk.RIGHT, padx=5)
         
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        # Filtro: solo le chiavi con segnaposto o strutture ICU diversi dal master
+        self.placeholders_only = tk.BooleanVar(value=False)
+        self.placeholders_check = tk.Checkbutton(self.controls_frame, text="Solo segnaposto errati", variable=self.placeholders_only, command=self.create_translations_table)
+        self.placeholders_check.pack(side=tk.RIGHT, padx=5)
+        
+        # Ricerca su chiavi e traduzioni di tutte le lingue
+        self.search_frame = tk.Frame(self)
+        self.search_frame.pack(fill=tk.X, padx=10)
+        tk.Label(self.search_frame, text="Cerca:").pack(side=tk.LEFT, padx=5)
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(self.search_frame, textvariable=self.search_var, width=40)
+        self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_entry.bind("<KeyRelease>", self.schedule_search)
+        self.search_mode = ttk.Combobox(self.search_frame, values=list(SEARCH_MODES), state="readonly", width=12)
+        self.search_mode.current(0)
+        self.search_mode.pack(side=tk.LEFT, padx=5)
+        self.search_mode.bind("<<ComboboxSelected>>", self.schedule_search)
+        self.search_job = None
+        
+        # Suggerimenti della memoria di traduzione per la cella in modifica
+        self.suggestions_frame = tk.Frame(self)
+        self.suggestions_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 10))
+        tk.Label(self.suggestions_frame, text="Suggerimenti (doppio click per usarli):", anchor="w").pack(fill=tk.X)
+        self.suggestions_list = tk.Listbox(self.suggestions_frame, height=5)
+        self.suggestions_list.pack(fill=tk.X)
+        self.suggestions_list.bind("<Double-1>", self.apply_suggestion)
+        self.suggestions = []
+        self.suggestion_cell = None
+        
+        # Frame principale
+        self.main_frame = tk.Frame(self)
+        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        self.canvas.pack(side="left", fill="both", expand=True)
-        self.scrollbar.pack(side="right", fill="y")
+        # Griglia virtualizzata: solo le righe visibili hanno elementi grafici
+        self.grid_view = VirtualGrid(self.main_frame, ["Chiave"])
+        self.grid_view.pack(fill=tk.BOTH, expand=True)
+        self.grid_view.on_cell_double_click = self.edit_cell
+        self.rows = []
+        self.languages = []
+        self.diff = {}
+        self.search_index = SearchIndex()
+        self.placeholders = PlaceholderIndex()
     
-    def load_json_files(self):
+    def load_translations(self):
+        # Un caricamento ancora in corso (es. dopo una rinomina fallita) viene annullato:
+        # i suoi messaggi appartengono al catalogo che si sta sostituendo
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader = None
+        if self.loader_job is not None:
+            self.after_cancel(self.loader_job)
+            self.loader_job = None
+        self.pending_changes = {}
+        # Il risultato di una verifica in corso riguarda il catalogo precedente
+        self.validation = None
+        self.validation_failed = False
         self.json_files = []
+        self.catalog = Catalog()
+        self.catalog.set_master(self.master_language, self.master_namespace)
+        self.collapsed_namespaces = set()
+        # Le firme in cache restano valide, le lingue vanno verificate di nuovo
+        self.placeholders.languages.clear()
+        # L'indice di ricerca si ricostruisce alla prima ricerca sul nuovo catalogo
+        self.search_index = SearchIndex()
         
         # Verifica se il percorso esiste
         if not os.path.exists(self.project_path):
             messagebox.showerror("Errore", f"Il percorso {self.project_path} non esiste")
             return
         
-        # Cerca tutti i file JSON nel percorso del progetto
-        for root, dirs, files in os.walk(self.project_path):
-            for file in files:
-                if file.lower().endswith(".json"):
-                    file_path = os.path.join(root, file)
-                    language = os.path.basename(file_path).split('.')[0]
-                    self.json_files.append({
-                        "language": language,
-                        "path": file_path,
-                        "is_master": file_path == self.master_file_path
-                    })
+        # Riusa la scansione già fatta dalla schermata dei file JSON e analizza in background
+        # solo i file modificati; il master arriva per primo così le righe compaiono subito.
+        # Si analizzano solo i file del namespace del master: gli altri all'espansione
+        self.loader = BackgroundLoader(get_catalog_cache(), get_parse_engine())
+        self.rules = scan_rules(find_project(self.project_name, self.project_path))
+        self.loader.scan_and_parse(self.project_path, rules=self.rules, first_path=self.master_file_path,
+                                   select=lambda file: self.namespace_of(file) == self.master_namespace)
+        self.status_label.config(text="Caricamento in corso...")
+        self.schedule_loader_poll()
     
-    def load_translations(self):
-        self.translations = {}
-        
-        # Carica tutti i file JSON
-        for file_info in self.json_files:
-            try:
-                with open(file_info["path"], "r", encoding="utf-8") as f:
-                    content = json.load(f)
-                    self.translations[file_info["language"]] = content
-            except Exception as e:
-                messagebox.showerror("Errore", f"Impossibile caricare il file {file_info['path']}: {e}")
-        
-        # Crea la tabella delle traduzioni
-        self.create_translations_table()
+    def schedule_loader_poll(self):
+        self.loader_job = self.after(POLL_INTERVAL_MS, self.poll_loader)
     
-    def create_translations_table(self):
-        # Pulisci il frame scrollabile
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+    def poll_loader(self):
+        self.loader_job = None
+        if self.loader is None:
+            return
         
-        if not self.translations or self.master_language not in self.translations:
-            messagebox.showerror("Errore", "File master non trovato o non valido")
+        changed = False
+        for message in self.loader.poll():
+            kind = message[0]
+            if kind == "file":
+                self.add_json_file(message[1])
+            elif kind == "scanned":
+                self.scanned_files = message[1]
+            elif kind == "parsed":
+                file, items = message[1], message[2]
+                language = self.language_of(file)
+                self.catalog.add_flat_locale(language, items, file["path"], self.namespace_of(file))
+                self.placeholders.invalidate(self.catalog, language)
+                # Se l'indice di ricerca è già stato costruito si aggiorna solo questa lingua
+                if language in self.search_index.languages:
+                    self.search_index.index_language(self.catalog, language)
+                changed = True
+            elif kind == "progress":
+                self.status_label.config(text=f"Caricamento in corso... {message[1]}/{message[2]}")
+            elif kind == "error":
+                file, error = message[1], message[2]
+                if file is None:
+                    messagebox.showerror("Errore", f"Errore durante il caricamento: {error}")
+                else:
+                    messagebox.showerror("Errore", f"Impossibile caricare il file {file['path']}: {error}")
+            elif kind == "done":
+                self.loader.close()
+                self.loader = None
+                self.status_label.config(text="")
+                self.create_translations_table()
+                if self.master_language not in self.catalog.columns:
+                    messagebox.showerror("Errore", "File master non trovato o non valido")
+                self.start_watcher()
+                self.update_memory()
+                # File arrivati durante il caricamento (namespace espansi, modifiche del watcher)
+                self.parse_pending()
+                return
+        
+        # Aggiorna la tabella con le lingue arrivate finora
+        if changed:
+            self.create_translations_table()
+        self.schedule_loader_poll()
+    
+    def update_memory(self):
+        # La memoria di traduzione si aggiorna dopo il caricamento, per non rallentarlo:
+        # tutti i progetti una volta per sessione, poi solo i file cambiati di questo
+        memory = get_translation_memory()
+        if not memory.indexed_all:
+            memory.index_in_background(load_projects(), get_catalog_cache(), get_parse_engine())
+            return
+        project = find_project(self.project_name, self.project_path)
+        if project is not None:
+            memory.update_in_background(project, get_catalog_cache(), get_parse_engine())
+    
+    def language_of(self, file):
+        return self.detector.language(file["path"])
+    
+    def namespace_of(self, file):
+        return self.detector.namespace(file["path"])
+    
+    def add_json_file(self, file):
+        namespace = self.namespace_of(file)
+        is_new = namespace not in self.catalog.namespaces
+        self.json_files.append({
+            "language": self.language_of(file),
+            "namespace": namespace,
+            "path": file["path"],
+            "is_master": file["path"] == self.master_file_path,
+            "file": file
+        })
+        # Un namespace nuovo compare subito come riga di gruppo da espandere
+        self.catalog.add_namespace(namespace)
+        return is_new
+    
+    def parse_files(self, files):
+        # Un caricamento alla volta: i file in attesa partono alla fine di quello in corso
+        for file in files:
+            self.pending_changes[file["path"]] = file
+        if self.loader is None:
+            self.parse_pending()
+    
+    def parse_pending(self):
+        if not self.pending_changes or self.loader is not None:
             return
+        self.loader = BackgroundLoader(get_catalog_cache(), get_parse_engine())
+        self.loader.parse(list(self.pending_changes.values()))
+        self.pending_changes = {}
+        self.schedule_loader_poll()
+    
+    def toggle_namespace(self, namespace):
+        if namespace not in self.catalog.loaded_namespaces:
+            # Prima espansione: si analizzano i file del namespace in tutte le lingue
+            files = [f["file"] for f in self.json_files if f["namespace"] == namespace]
+            if files:
+                self.status_label.config(text=f"Caricamento di {namespace}...")
+                self.parse_files(files)
+            return
+        if namespace in self.collapsed_namespaces:
+            self.collapsed_namespaces.discard(namespace)
+        else:
+            self.collapsed_namespaces.add(namespace)
+        self.create_translations_table()
+    
+    def start_watcher(self):
+        # Avviato una sola volta, dopo il primo caricamento completo
+        if self.watcher is not None or self.scanned_files is None:
+            return
+        self.watcher = ProjectWatcher(self.project_path, self.rules)
+        self.watcher.start(self.scanned_files)
+        self.after(POLL_INTERVAL_MS, self.poll_watcher)
+    
+    def poll_watcher(self):
+        if self.watcher is None:
+            return
+        
+        cache = get_catalog_cache()
+        changed = False
+        for kind, payload in self.watcher.poll():
+            cache.apply_change(self.project_path, self.rules, kind, payload)
+            if kind == "removed":
+                self.pending_changes.pop(payload, None)
+                file_info = next((f for f in self.json_files if f["path"] == payload), None)
+                if file_info is not None:
+                    self.json_files.remove(file_info)
+                    language = file_info["language"]
+                    unsaved = self.catalog.pending_changes(language).get(file_info["namespace"], {})
+                    self.catalog.remove_locale(language, file_info["namespace"])
+                    if unsaved:
+                        messagebox.showwarning("Attenzione", f"Il file {payload} è stato eliminato: le sue {len(unsaved)} modifiche non salvate "
+                                               "restano in sospeso e si potranno salvare quando il file verrà ricreato", parent=self)
+                    self.placeholders.invalidate(self.catalog, language)
+                    if language not in self.catalog.columns:
+                        self.search_index.remove_language(language)
+                    elif language in self.search_index.languages:
+                        self.search_index.index_language(self.catalog, language)
+                    changed = True
+            else:
+                if kind == "added" and not any(f["path"] == payload["path"] for f in self.json_files):
+                    if self.add_json_file(payload):
+                        self.catalog.build_rows()
+                        changed = True
+                # I file dei namespace mai espansi restano da analizzare
+                if self.namespace_of(payload) in self.catalog.loaded_namespaces:
+                    self.pending_changes[payload["path"]] = payload
         
+        if changed:
+            self.create_translations_table()
+        
+        # Rianalizza in background solo i file cambiati
+        self.parse_pending()
+        
+        self.after(POLL_INTERVAL_MS, self.poll_watcher)
+    
+    def on_close(self):
+        # Chiede cosa fare delle modifiche non salvate
+        if self.catalog.has_changes():
+            answer = messagebox.askyesnocancel("Conferma", "Ci sono modifiche non salvate. Salvarle prima di chiudere?", parent=self)
+            if answer is None:
+                return
+            if answer and not self.save_changes():
+                return
+        
+        # Annulla il caricamento in corso e ferma il watcher prima di chiudere la finestra
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader = None
+        self.validation = None
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.destroy()
+    
+    def create_translations_table(self):
+        # Finché il master non è caricato non ci sono righe da mostrare
+        if self.master_language not in self.catalog.columns:
+            return
+        with span("translations.table", f"{len(self.catalog.keys)} chiavi"):
+            self.build_table()
+    
+    def build_table(self):
         # Ottieni tutte le lingue disponibili
-        languages = list(self.translations.keys())
+        languages = self.catalog.languages
         
         # Assicurati che la lingua master sia la prima
         if self.master_language in languages:
             languages.remove(self.master_language)
             languages.insert(0, self.master_language)
+        self.languages = languages
+        
+        # Confronto con il master (operazioni su bitmask di id, pochi millisecondi)
+        self.diff = catalog_diff(self.catalog)
+        
+        # Segnaposto: si verificano in background solo le lingue arrivate o cambiate;
+        # finché la verifica non termina valgono i risultati precedenti
+        self.start_validation()
+        placeholder_ids = self.placeholders.issue_ids()
+        
+        # Intestazioni: colonna per le chiavi, una colonna per ogni lingua con la copertura e i segnaposto
+        headers = ["Chiave"]
+        for lang in languages:
+            if lang == self.master_language:
+                headers.append(f"{lang}  (Master)")
+            else:
+                headers.append(f"{lang}  ({self.diff[lang]['coverage']:g}%)")
+        if self.validation is not None:
+            headers.append("Segnaposto (verifica...)")
+        else:
+            headers.append(f"Segnaposto ({placeholder_ids.bit_count()})")
+        if headers != self.grid_view.columns:
+            self.grid_view.set_columns(headers)
         
-        # Crea le intestazioni della tabella
-        header_frame = ttk.Frame(self.scrollable_frame)
-        header_frame.pack(fill=tk.X, padx=5, pady=5)
-        
-        # Colonna per le chiavi
-        ttk.Label(header_frame, text="Chiave", font=("Helvetica", 10, "bold"), width=30).grid(row=0, column=0, padx=5, pady=5, sticky="w")
-        
-        # Colonne per le lingue
-        for i, lang in enumerate(languages):
-            is_master = lang == self.master_language
-            label_text = f"{lang} {' (Master)' if is_master else ''}"
-            ttk.Label(header_frame, text=label_text, font=("Helvetica", 10, "bold"), width=30).grid(row=0, column=i+1, padx=5, pady=5, sticky="w")
-        
-        # Estrai tutte le chiavi dal file master
-        master_data = self.translations[self.master_language]
-        
-        # Funzione ricorsiva per visualizzare le traduzioni
-        def display_translations(data, prefix="", row_index=1):
-            if isinstance(data, dict):
-                for key, value in data.items():
-                    current_key = f"{prefix}.{key}" if prefix else key
-                    if isinstance(value, dict):
-                        # Crea una riga per la chiave padre
-                        key_frame = ttk.Frame(self.scrollable_frame)
-                        key_frame.pack(fill=tk.X, padx=5, pady=2)
-                        ttk.Label(key_frame, text=current_key, font=("Helvetica", 9, "bold"), width=30).grid(row=0, column=0, padx=5, pady=2, sticky="w")
-                        
-                        # Chiamata ricorsiva per i valori annidati
-                        row_index = display_translations(value, current_key, row_index)
-                    else:
-                        # Crea una riga per la chiave-valore
-                        key_frame = ttk.Frame(self.scrollable_frame)
-                        key_frame.pack(fill=tk.X, padx=5, pady=2)
-                        
-                        # Mostra la chiave
-                        ttk.Label(key_frame, text=current_key, width=30).grid(row=0, column=0, padx=5, pady=2, sticky="w")
-                        
-                        # Mostra i valori per ogni lingua
-                        for i, lang in enumerate(languages):
-                            # Ottieni il valore per questa lingua e chiave
-                            lang_value = ""
-                            try:
-                                # Naviga nella struttura JSON per trovare il valore
-                                lang_data = self.translations.get(lang, {})
-                                path_parts = current_key.split('.')
-                                for part in path_parts:
-                                    if part and isinstance(lang_data, dict) and part in lang_data:
-                                        lang_data = lang_data[part]
-                                    else:
-                                        lang_data = ""
-                                        break
-                                lang_value = str(lang_data) if lang_data else ""
-                            except:
-                                lang_value = ""
-                            
-                            # Mostra il valore
-                            ttk.Label(key_frame, text=lang_value, width=30).grid(row=0, column=i+1, padx=5, pady=2, sticky="w")
-                        
-                        row_index += 1
-            return row_index
-        
-        # Visualizza tutte le traduzioni
-        display_translations(master_data)
\ No newline at end of file
+        if self.problems_only.get():
+            # Solo le chiavi con problemi, seguite da quelle assenti nel master
+            problems = problem_ids(self.diff)
+            self.rows = [(path, key_id) for path, key_id in self.catalog.rows if key_id is not None and problems >> key_id & 1]
+            extras = list(ids_of(extra_ids(self.diff)))
+            if extras:
+                self.rows.append((("(non presenti nel master)",), None))
+                self.rows.extend((self.catalog.keys[key_id], key_id) for key_id in extras)
+        else:
+            # Le righe sono già calcolate dal catalogo nell'ordine del file master
+            self.rows = self.catalog.rows
+        
+        if self.placeholders_only.get():
+            self.rows = [(path, key_id) for path, key_id in self.rows if key_id is not None and placeholder_ids >> key_id & 1]
+        
+        # Ricerca: solo le chiavi con almeno una cella corrispondente
+        query = self.search_var.get().strip()
+        if query:
+            matches = self.search_keys(query)
+            self.rows = [(path, key_id) for path, key_id in self.rows if key_id in matches]
+        
+        # Dei namespace chiusi resta solo la riga di gruppo
+        if self.collapsed_namespaces:
+            self.rows = [(path, key_id) for path, key_id in self.rows
+                         if len(path) == 1 or not isinstance(path[0], Namespace) or path[0].name not in self.collapsed_namespaces]
+        
+        # La griglia chiede i valori solo per le righe visibili
+        self.grid_view.set_rows(len(self.rows), self.get_row)
+    
+    def namespace_label(self, namespace):
+        if namespace not in self.catalog.loaded_namespaces:
+            return f"▸ {namespace}:  (doppio click per caricare)"
+        return f"{'▸' if namespace in self.collapsed_namespaces else '▾'} {namespace}:"
+    
+    def start_validation(self):
+        # Una verifica alla volta: le lingue invalidate nel frattempo si verificano alla successiva.
+        # Dopo un errore non si riprova fino al prossimo caricamento
+        if self.validation is not None or self.validation_failed:
+            return
+        snapshot = self.placeholders.snapshot(self.catalog)
+        if snapshot is None:
+            return
+        self.validation = snapshot
+        threading.Thread(target=self.run_validation, args=(snapshot,), daemon=True).start()
+        self.after(POLL_INTERVAL_MS, self.poll_validation)
+    
+    def run_validation(self, snapshot):
+        # Gira nel thread: tocca solo la copia, i risultati tornano al thread di Tk con la coda
+        try:
+            self.validation_results.put((snapshot, self.placeholders.check(snapshot, get_parse_engine()), None))
+        except Exception as e:
+            self.validation_results.put((snapshot, None, e))
+    
+    def poll_validation(self):
+        if self.validation is None:
+            return
+        try:
+            snapshot, mismatches, error = self.validation_results.get_nowait()
+        except queue.Empty:
+            self.after(POLL_INTERVAL_MS, self.poll_validation)
+            return
+        if snapshot is not self.validation:
+            # Verifica di un catalogo sostituito nel frattempo: si scarta
+            self.after(POLL_INTERVAL_MS, self.poll_validation)
+            return
+        self.validation = None
+        if error is not None:
+            self.validation_failed = True
+            messagebox.showerror("Errore", f"Impossibile verificare i segnaposto: {error}", parent=self)
+            return
+        self.placeholders.apply(self.catalog, snapshot, mismatches)
+        self.create_translations_table()
+    
+    def get_row(self, index):
+        path, key_id = self.rows[index]
+        if key_id is None:
+            if len(path) == 1 and isinstance(path[0], Namespace):
+                return (self.namespace_label(path[0].name),), "group"
+            return (format_key(path),), "group"
+        
+        # Accesso diretto per id: nessuna navigazione nella struttura annidata
+        values = [format_key(path)]
+        for lang in self.languages:
+            values.append(format_value(self.catalog.get(lang, key_id)))
+        values.append(self.placeholder_text(key_id))
+        return values, None
+    
+    def placeholder_text(self, key_id):
+        # Problemi raggruppati per lingua: "it: manca {count} · de: in più %s"
+        by_language = {}
+        for lang, issue in self.placeholders.issues(self.catalog, key_id):
+            by_language.setdefault(lang, []).append(issue)
+        return " · ".join(f"{lang}: {', '.join(issues)}" for lang, issues in by_language.items())
+    
+    def schedule_search(self, event=None):
+        # Attende una breve pausa nella digitazione prima di filtrare
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(200, self.run_search)
+    
+    def run_search(self):
+        self.search_job = None
+        self.create_translations_table()
+    
+    def search_keys(self, query):
+        # L'indice viene costruito alla prima ricerca, poi aggiornato lingua per lingua
+        missing = [lang for lang in self.catalog.languages if lang not in self.search_index.languages]
+        if missing:
+            self.status_label.config(text="Indicizzazione in corso...")
+            self.update_idletasks()
+            for lang in missing:
+                self.search_index.index_language(self.catalog, lang)
+            self.status_label.config(text="")
+        return self.search_index.matching_keys(query, SEARCH_MODES[self.search_mode.get()])
+    
+    def edit_cell(self, index, column):
+        # La colonna delle chiavi e le righe di gruppo non sono modificabili
+        path, key_id = self.rows[index]
+        if key_id is None and len(path) == 1 and isinstance(path[0], Namespace):
+            self.toggle_namespace(path[0].name)
+            return
+        if column == 0 and len(path) > 0 and path[0] != "(non presenti nel master)":
+            # Doppio click sulla chiave o sul gruppo: rinomina con il percorso già compilato
+            self.open_rename(format_key(path))
+            return
+        if key_id is None or column > len(self.languages):
+            return
+        lang = self.languages[column - 1]
+        source = self.catalog.source_of(lang, key_id)
+        if source is None:
+            # Senza un file della lingua per questo namespace la modifica non potrebbe essere salvata
+            messagebox.showinfo("Informazione", f"Nessun file {lang} per il namespace di questa chiave", parent=self)
+            return
+        if not is_writable(source):
+            # Solo i formati basati su JSON vengono riscritti preservando il file
+            messagebox.showinfo("Informazione", f"Il formato di {os.path.basename(source)} è di sola lettura", parent=self)
+            return
+        value = self.catalog.get(lang, key_id)
+        initial = "" if value is MISSING else str(value)
+        self.show_suggestions(index, lang, key_id)
+        self.grid_view.edit_cell(index, column, initial, lambda new_value: self.on_cell_edited(index, lang, key_id, new_value))
+    
+    def show_suggestions(self, index, lang, key_id):
+        # Traduzioni di testi del master uguali o simili, da questo e dagli altri progetti
+        self.suggestions_list.delete(0, tk.END)
+        self.suggestion_cell = (index, lang, key_id)
+        self.suggestions = []
+        if lang == self.master_language:
+            return
+        text = self.catalog.get(self.master_language, key_id)
+        try:
+            self.suggestions = get_translation_memory().suggest(
+                text, lang, exclude=({"path": self.project_path}, format_key(self.catalog.keys[key_id])))
+        except Exception as e:
+            print(f"Errore nella memoria di traduzione: {e}")
+        for score, target, source, count, origin in self.suggestions:
+            uses = f", {count} volte" if count > 1 else ""
+            self.suggestions_list.insert(tk.END, f"{score * 100:.0f}%  {target}   ← {source}{uses}")
+    
+    def apply_suggestion(self, event=None):
+        selection = self.suggestions_list.curselection()
+        if not selection or self.suggestion_cell is None:
+            return
+        index, lang, key_id = self.suggestion_cell
+        self.grid_view.close_editor()
+        self.on_cell_edited(index, lang, key_id, self.suggestions[selection[0]][1])
+    
+    def on_cell_edited(self, index, lang, key_id, value):
+        if self.catalog.set_value(lang, key_id, value):
+            self.search_index.update_cell(self.catalog, key_id, lang)
+            self.placeholders.update_cell(self.catalog, lang, key_id)
+            # La copertura nelle intestazioni dipende dai valori: si ricalcola il confronto
+            self.create_translations_table()
+            self.update_save_state()
+    
+    def update_save_state(self):
+        changes = sum(len(changes) for changes in self.catalog.dirty.values())
+        if changes:
+            self.save_button.config(state=tk.NORMAL)
+            self.status_label.config(text=f"{changes} modifiche non salvate")
+        else:
+            self.save_button.config(state=tk.DISABLED)
+            self.status_label.config(text="")
+    
+    def save_changes(self):
+        # Scrive in blocco solo i file delle lingue con modifiche, ognuno in modo atomico
+        cache = get_catalog_cache()
+        saved = True
+        for lang in list(self.catalog.dirty):
+            # Un file per namespace: si riscrivono solo quelli con modifiche
+            for namespace, changes in self.catalog.pending_changes(lang).items():
+                source = self.catalog.sources.get((lang, namespace))
+                try:
+                    if source is None:
+                        # Le modifiche restano in sospeso: il salvataggio non è riuscito
+                        raise ValueError(f"nessun file {lang} per il namespace {namespace or 'principale'}")
+                    with span("translations.save", f"{lang} {namespace}".rstrip()):
+                        write_locale(source, changes)
+                    # La cache riceve subito il nuovo contenuto: il watcher non causerà una nuova analisi
+                    cache.store(source, file_signature(os.stat(source)), parse_catalog(source))
+                    self.record_translations(lang, namespace)
+                    self.catalog.mark_saved(lang, namespace)
+                except Exception as e:
+                    saved = False
+                    messagebox.showerror("Errore", f"Impossibile salvare il file {source or lang}: {e}", parent=self)
+        self.update_save_state()
+        return saved
+    
+    def open_rename(self, initial=""):
+        if self.master_language not in self.catalog.columns:
+            return
+        RenameDialog(self, lambda: self.catalog, self.apply_renames, initial)
+    
+    def apply_renames(self, plan):
+        # Riscrive solo i file con chiavi rinominate; le modifiche non salvate seguono le chiavi per id
+        cache = get_catalog_cache()
+        old_rows = self.catalog.rows
+        
+        def on_written(source, text):
+            # La cache riceve subito il nuovo contenuto: il watcher non causerà una nuova analisi
+            cache.store(source, file_signature(os.stat(source)), parse_catalog(source))
+        
+        try:
+            written = apply_plan(self.catalog, plan, on_written)
+        except Exception as e:
+            messagebox.showerror("Errore", f"Impossibile rinominare le chiavi: {e}", parent=self)
+            # I file già scritti sono coerenti con il disco: si ricarica il progetto
+            self.load_translations()
+            return False
+        for key_id in plan.renames:
+            self.search_index.update_key(self.catalog, key_id)
+        self.refresh_renamed(old_rows, plan.renames)
+        self.status_label.config(text=f"{len(plan)} chiavi rinominate in {len(written)} file")
+        return True
+    
+    def refresh_renamed(self, old_rows, renames):
+        # Si ridisegnano solo le righe cambiate, se la forma della tabella resta la stessa
+        if self.rows is old_rows:
+            if len(self.catalog.rows) != len(old_rows):
+                self.rows = self.catalog.rows
+                self.grid_view.set_rows(len(self.rows), self.get_row)
+                return
+            changed = [index for index, (old, new) in enumerate(zip(old_rows, self.catalog.rows)) if old != new]
+            self.rows = self.catalog.rows
+            self.grid_view.refresh_rows(changed)
+        elif self.collapsed_namespaces:
+            # Le righe di gruppo dei namespace chiusi dipendono dai percorsi: si ricostruisce la vista
+            self.create_translations_table()
+        else:
+            # Vista filtrata: le righe restano nello stesso ordine, cambia solo il percorso
+            changed = []
+            for index, (path, key_id) in enumerate(self.rows):
+                if key_id in renames:
+                    self.rows[index] = (self.catalog.keys[key_id], key_id)
+                    changed.append(index)
+            self.grid_view.refresh_rows(changed)
+    
+    def record_translations(self, lang, namespace):
+        # Le traduzioni salvate entrano subito nella memoria, senza attendere la reindicizzazione
+        if lang == self.master_language:
+            return
+        changes = [(format_key(self.catalog.keys[key_id]), self.catalog.get(self.master_language, key_id), value)
+                   for key_id, value in self.catalog.dirty.get(lang, {}).items()
+                   if self.catalog.namespace_of(key_id) == namespace]
+        try:
+            get_translation_memory().record_in_background({"path": self.project_path}, lang, changes)
+        except Exception as e:
+            print(f"Errore nella memoria di traduzione: {e}")
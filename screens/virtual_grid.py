@@ -0,0 +1,228 @@
+import tkinter as tk
+from tkinter import ttk, font as tkfont
+from shared.profiling import span
+
+class VirtualGrid(tk.Frame):
+    """Griglia virtualizzata: crea elementi grafici solo per le righe visibili"""
+
+    def __init__(self, master, columns, column_width=220, row_height=22):
+        super().__init__(master)
+        self.columns = list(columns)
+        self.column_width = column_width
+        self.row_height = row_height
+        self.row_count = 0
+        self.get_row = lambda index: ((), None)
+        self.top_row = 0
+        self.visible_rows = 0
+        # Pool di elementi del canvas riutilizzati ad ogni scorrimento
+        self.row_items = []
+        # Callback per il doppio click su una cella: on_cell_double_click(indice, colonna)
+        self.on_cell_double_click = None
+        self.editor = None
+
+        self.normal_font = tkfont.nametofont("TkDefaultFont")
+        self.bold_font = self.normal_font.copy()
+        self.bold_font.configure(weight="bold")
+        self.char_width = max(self.normal_font.measure("0"), 1)
+
+        self.create_widgets()
+
+    def create_widgets(self):
+        # Intestazioni (scorrono solo in orizzontale insieme al corpo)
+        self.header = tk.Canvas(self, height=self.row_height + 6, highlightthickness=0)
+        self.header.grid(row=0, column=0, sticky="ew")
+
+        # Corpo della griglia
+        self.body = tk.Canvas(self, highlightthickness=0, background="white")
+        self.body.grid(row=1, column=0, sticky="nsew")
+
+        # Scrollbar: la verticale è pilotata dal modello a righe, non dal canvas
+        self.vscrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.vscrollbar.grid(row=1, column=1, sticky="ns")
+        self.hscrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.xview)
+        self.hscrollbar.grid(row=2, column=0, sticky="ew")
+        self.body.configure(xscrollcommand=self.hscrollbar.set)
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.body.bind("<Configure>", self.on_configure)
+        # Rotellina del mouse: Windows/macOS usano <MouseWheel>, X11 usa Button-4/5
+        self.body.bind("<MouseWheel>", self.on_mousewheel)
+        self.body.bind("<Button-4>", lambda e: self.yview("scroll", -3, "units"))
+        self.body.bind("<Button-5>", lambda e: self.yview("scroll", 3, "units"))
+        self.body.bind("<Double-1>", self.on_double_click)
+
+        self.draw_header()
+
+    def set_columns(self, columns):
+        self.columns = list(columns)
+        # Le colonne sono cambiate: il pool va ricostruito
+        self.body.delete("all")
+        self.row_items = []
+        self.draw_header()
+        self.on_configure()
+
+    def set_rows(self, row_count, get_row):
+        """Imposta il numero di righe e la funzione che restituisce (valori, stile) per indice"""
+        self.row_count = row_count
+        self.get_row = get_row
+        self.top_row = min(self.top_row, self.max_top_row())
+        self.redraw()
+
+    def draw_header(self):
+        self.header.delete("all")
+        total_width = self.column_width * len(self.columns)
+        for i, title in enumerate(self.columns):
+            x = i * self.column_width
+            self.header.create_rectangle(x, 0, x + self.column_width, self.row_height + 6, fill="#e8e8e8", outline="#c8c8c8")
+            self.header.create_text(x + 5, (self.row_height + 6) // 2, text=self.truncate(title), anchor="w", font=self.bold_font)
+        self.header.configure(scrollregion=(0, 0, total_width, self.row_height + 6))
+
+    def on_configure(self, event=None):
+        height = self.body.winfo_height()
+        self.visible_rows = max(height // self.row_height + 1, 1)
+        total_width = self.column_width * len(self.columns)
+        self.body.configure(scrollregion=(0, 0, total_width, height))
+        self.ensure_pool()
+        self.top_row = min(self.top_row, self.max_top_row())
+        self.redraw()
+
+    def ensure_pool(self):
+        # Crea gli elementi mancanti per le righe visibili (mai uno per riga del modello)
+        while len(self.row_items) < self.visible_rows:
+            slot = len(self.row_items)
+            y = slot * self.row_height
+            background = self.body.create_rectangle(0, y, self.column_width * len(self.columns), y + self.row_height, outline="", fill="white")
+            texts = []
+            for i in range(len(self.columns)):
+                texts.append(self.body.create_text(i * self.column_width + 5, y + self.row_height // 2, anchor="w", text=""))
+            self.row_items.append((background, texts))
+
+    def truncate(self, text):
+        max_chars = max(self.column_width // self.char_width - 1, 1)
+        if len(text) > max_chars:
+            return text[:max_chars - 1] + "…"
+        return text
+
+    def redraw(self):
+        # Un editor aperto non seguirebbe lo scorrimento: viene chiuso
+        self.close_editor()
+        with span("grid.redraw", f"{len(self.row_items)} righe"):
+            for slot, (background, texts) in enumerate(self.row_items):
+                index = self.top_row + slot
+                if index < self.row_count:
+                    values, style = self.get_row(index)
+                else:
+                    values, style = (), None
+                self.draw_slot(index, background, texts, values, style)
+            self.update_scrollbar()
+
+    def draw_slot(self, index, background, texts, values, style):
+        fill = "white" if index % 2 == 0 else "#f6f6f6"
+        self.body.itemconfigure(background, fill=fill)
+        item_font = self.bold_font if style == "group" else self.normal_font
+        for i, text_id in enumerate(texts):
+            text = values[i] if i < len(values) else ""
+            self.body.itemconfigure(text_id, text=self.truncate(text), font=item_font)
+
+    def refresh_rows(self, indices):
+        """Ridisegna solo le righe indicate, se visibili"""
+        for index in indices:
+            slot = index - self.top_row
+            if 0 <= slot < len(self.row_items) and index < self.row_count:
+                background, texts = self.row_items[slot]
+                values, style = self.get_row(index)
+                self.draw_slot(index, background, texts, values, style)
+
+    def max_top_row(self):
+        return max(self.row_count - self.visible_rows + 1, 0)
+
+    def update_scrollbar(self):
+        if self.row_count == 0:
+            self.vscrollbar.set(0, 1)
+            return
+        first = self.top_row / self.row_count
+        last = min((self.top_row + self.visible_rows) / self.row_count, 1)
+        self.vscrollbar.set(first, last)
+
+    def yview(self, *args):
+        if not args:
+            return
+        if args[0] == "moveto":
+            top_row = int(float(args[1]) * self.row_count)
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= max(self.visible_rows - 1, 1)
+            top_row = self.top_row + amount
+        else:
+            return
+        top_row = max(0, min(top_row, self.max_top_row()))
+        if top_row != self.top_row:
+            self.top_row = top_row
+            self.redraw()
+
+    def xview(self, *args):
+        self.body.xview(*args)
+        self.header.xview(*args)
+
+    def on_mousewheel(self, event):
+        # Su Windows delta è un multiplo di 120, su macOS è già in unità
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.yview("scroll", -delta * 3, "units")
+
+    def see(self, index):
+        """Scorre la griglia in modo che la riga indicata sia visibile"""
+        if index < self.top_row:
+            self.yview("moveto", index / max(self.row_count, 1))
+        elif index >= self.top_row + self.visible_rows - 1:
+            self.top_row = max(0, min(index - self.visible_rows + 2, self.max_top_row()))
+            self.redraw()
+
+    def row_at(self, y):
+        index = self.top_row + int(self.body.canvasy(y)) // self.row_height
+        return index if index < self.row_count else None
+
+    def column_at(self, x):
+        column = int(self.body.canvasx(x)) // self.column_width
+        return column if 0 <= column < len(self.columns) else None
+
+    def on_double_click(self, event):
+        index = self.row_at(event.y)
+        column = self.column_at(event.x)
+        if index is not None and column is not None and self.on_cell_double_click:
+            self.on_cell_double_click(index, column)
+
+    def edit_cell(self, index, column, value, on_commit):
+        """Apre un campo di modifica sopra la cella; on_commit(valore) alla conferma con Invio"""
+        self.close_editor()
+        slot = index - self.top_row
+        if not 0 <= slot < self.visible_rows:
+            return
+        entry = tk.Entry(self.body, relief=tk.SOLID, borderwidth=1)
+        entry.insert(0, value)
+        entry.select_range(0, tk.END)
+
+        def commit(event=None):
+            # FocusOut arriva anche quando l'editor viene distrutto: va ignorato
+            if self.editor is None or self.editor[0] is not entry:
+                return
+            new_value = entry.get()
+            self.close_editor()
+            on_commit(new_value)
+
+        entry.bind("<Return>", commit)
+        entry.bind("<Escape>", lambda e: self.close_editor())
+        entry.bind("<FocusOut>", commit)
+        window = self.body.create_window(column * self.column_width, slot * self.row_height, window=entry,
+                                         anchor="nw", width=self.column_width, height=self.row_height)
+        self.editor = (entry, window)
+        entry.focus_set()
+
+    def close_editor(self):
+        if self.editor is not None:
+            entry, window = self.editor
+            self.editor = None
+            self.body.delete(window)
+            entry.destroy()
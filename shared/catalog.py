@@ -0,0 +1,388 @@
+from shared.profiling import span
+
+class _Missing:
+    """Sentinella per i valori assenti in una lingua"""
+
+    def __repr__(self):
+        return "MISSING"
+
+    def __bool__(self):
+        return False
+
+MISSING = _Missing()
+
+def flatten(data, prefix=()):
+    """Appiattisce un dizionario annidato in due colonne allineate: percorsi e valori delle foglie"""
+    keys = []
+    values = []
+    stack = [(prefix, iter(data.items()))] if isinstance(data, dict) else []
+    while stack:
+        path, iterator = stack[-1]
+        for key, value in iterator:
+            current = path + (key,)
+            if isinstance(value, dict):
+                stack.append((current, iter(value.items())))
+                break
+            keys.append(current)
+            values.append(value)
+        else:
+            stack.pop()
+    return keys, values
+
+class Namespace(str):
+    """Primo elemento dei percorsi delle chiavi di un namespace diverso da quello del master
+
+    Il testo è "nome:" (come in i18next: "errors:title"); le chiavi del
+    namespace del master restano senza prefisso.
+    """
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return self[:-1]
+
+def format_key(path):
+    """Rappresentazione testuale di un percorso di chiave"""
+    if path and isinstance(path[0], Namespace):
+        return path[0] + ".".join(path[1:])
+    return ".".join(path)
+
+def format_value(value):
+    """Testo da mostrare in una cella"""
+    return str(value) if value else ""
+
+def value_type(value):
+    """Tipo JSON di un valore; int e float sono entrambi "number", bool è distinto"""
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, list):
+        return "array"
+    if value is None:
+        return "null"
+    return type(value).__name__
+
+def is_empty(value):
+    return value == "" or value is None
+
+EMPTY = "empty"  # chiave dell'indice dei valori per le celle vuote
+
+def bit_table(code):
+    # Tabella per bytes.translate: il codice indicato diventa "1", tutto il resto "0"
+    return bytes(0x31 if byte == code else 0x30 for byte in range(256))
+
+def ids_of(mask):
+    """Id delle chiavi di un insieme rappresentato come bitmask, in ordine crescente"""
+    digits = bin(mask)[:1:-1]
+    position = digits.find("1")
+    while position != -1:
+        yield position
+        position = digits.find("1", position + 1)
+
+def mask_of(key_ids):
+    """Bitmask con i bit degli id indicati"""
+    mask = 0
+    for key_id in key_ids:
+        mask |= 1 << key_id
+    return mask
+
+class Catalog:
+    """Catalogo compilato: indice piatto delle chiavi condiviso da tutte le lingue
+
+    Ogni lingua può arrivare da più file, uno per namespace (it/common.json,
+    it/errors.json): i file diventano segmenti della stessa colonna e le chiavi
+    dei namespace diversi da quello del master ricevono il prefisso Namespace.
+    """
+
+    def __init__(self):
+        self.keys = []      # id -> percorso (tupla)
+        self.index = {}     # percorso -> id
+        self.columns = {}   # lingua -> valori allineati a self.keys
+        self.master_language = None
+        self.default_namespace = ""
+        self.namespaces = {}            # namespace -> prefisso dei percorsi (vuoto per quello del master)
+        self.loaded_namespaces = set()  # namespace con almeno un file caricato
+        self.segments = {}  # (lingua, namespace) -> (id delle chiavi nell'ordine del file, bitmask degli id)
+        self.rows = []      # righe da mostrare: (percorso, id della chiave o None per i gruppi)
+        self.sources = {}   # (lingua, namespace) -> file da cui è stato caricato
+        self.dirty = {}     # lingua -> {id della chiave: valore modificato non ancora salvato}
+        # lingua -> bitmask degli id per i confronti: "present", "empty" e "types" (tipo -> bitmask).
+        # Un bit per chiave occupa 60 volte meno di un insieme di interi
+        self.value_index = {}
+
+    @property
+    def languages(self):
+        return list(self.columns.keys())
+
+    def intern(self, path):
+        """Restituisce l'id del percorso, registrandolo se nuovo"""
+        key_id = self.index.get(path)
+        if key_id is None:
+            key_id = len(self.keys)
+            self.keys.append(path)
+            self.index[path] = key_id
+            for column in self.columns.values():
+                column.append(MISSING)
+        return key_id
+
+    def add_namespace(self, namespace):
+        """Registra un namespace (anche non ancora caricato) e restituisce il prefisso delle sue chiavi"""
+        prefix = self.namespaces.get(namespace)
+        if prefix is None:
+            prefix = () if namespace == self.default_namespace else (Namespace(namespace + ":"),)
+            self.namespaces[namespace] = prefix
+        return prefix
+
+    def namespace_order(self):
+        """Namespace nell'ordine delle righe: prima quello del master, poi in ordine alfabetico"""
+        others = sorted(namespace for namespace in self.namespaces if namespace != self.default_namespace)
+        return [self.default_namespace] + others
+
+    def split_key(self, path):
+        """(namespace, percorso nel file) di un percorso del catalogo"""
+        if path and isinstance(path[0], Namespace):
+            return path[0].name, path[1:]
+        return self.default_namespace, path
+
+    def namespace_of(self, key_id):
+        return self.split_key(self.keys[key_id])[0]
+
+    def source_of(self, language, key_id):
+        """File della lingua in cui si trova (o andrebbe scritta) la chiave"""
+        return self.sources.get((language, self.namespace_of(key_id)))
+
+    def add_locale(self, language, data):
+        """Aggiunge (o sostituisce) una lingua a partire dal contenuto JSON annidato"""
+        self.add_flat_locale(language, flatten(data))
+
+    def add_flat_locale(self, language, columns, source=None, namespace=None):
+        """Aggiunge (o sostituisce) il file di una lingua a partire dalle colonne (percorsi, valori)
+
+        namespace è quello del file (predefinito: quello del master). I percorsi
+        delle colonne senza prefisso vengono sostituiti con quelli della tabella
+        delle chiavi: le copie tenute in cache non duplicano le tuple per ogni lingua.
+        """
+        if namespace is None:
+            namespace = self.default_namespace
+        with span("catalog.add_locale", f"{language} {namespace}".rstrip()):
+            keys, values = columns
+            prefix = self.add_namespace(namespace)
+            self.loaded_namespaces.add(namespace)
+            column = self.columns.get(language)
+            if column is None:
+                column = self.columns[language] = [MISSING] * len(self.keys)
+                self.value_index[language] = {"present": 0, "empty": 0, "types": {}}
+            else:
+                self.clear_segment(language, namespace)
+            if source is not None:
+                self.sources[(language, namespace)] = source
+            table = self.keys
+            key_ids = []
+            for position, (path, value) in enumerate(zip(keys, values)):
+                if prefix:
+                    # Le colonne in cache restano senza prefisso: servono anche ad altri cataloghi
+                    key_id = self.intern(prefix + path)
+                else:
+                    key_id = self.intern(path)
+                    keys[position] = table[key_id]
+                column[key_id] = value
+                key_ids.append(key_id)
+            self.segments[(language, namespace)] = (key_ids, self.index_segment(language, key_ids))
+            # Le modifiche non ancora salvate restano visibili anche dopo un ricaricamento
+            for key_id, value in self.dirty.get(language, {}).items():
+                previous = column[key_id]
+                column[key_id] = value
+                self.update_index(language, key_id, previous, value)
+            if language == self.master_language:
+                self.build_rows()
+
+    def index_segment(self, language, key_ids):
+        # Costruito una volta al caricamento: i confronti diventano operazioni tra bitmask.
+        # Ogni cella del file riceve un codice per tipo (0 = fuori dal file), poi ogni
+        # codice diventa un intero unito alle bitmask della lingua
+        column = self.columns[language]
+        kinds = {}
+        codes = bytearray(len(column))
+        for key_id in key_ids:
+            value = column[key_id]
+            kind = EMPTY if is_empty(value) else value_type(value)
+            code = kinds.get(kind)
+            if code is None:
+                code = kinds[kind] = len(kinds) + 1
+            codes[key_id] = code
+        # Il bit 0 corrisponde all'ultima cifra della stringa binaria
+        digits = bytes(codes[::-1])
+        index = self.value_index[language]
+        types = index["types"]
+        present = 0
+        for kind, code in kinds.items():
+            mask = int(digits.translate(bit_table(code)), 2)
+            present |= mask
+            if kind == EMPTY:
+                index["empty"] |= mask
+            else:
+                types[kind] = types.get(kind, 0) | mask
+        index["present"] |= present
+        return present
+
+    def clear_segment(self, language, namespace):
+        # Toglie dalla colonna e dalle bitmask le chiavi caricate dal file del namespace
+        segment = self.segments.pop((language, namespace), None)
+        if segment is None:
+            return
+        key_ids, mask = segment
+        column = self.columns[language]
+        for key_id in key_ids:
+            column[key_id] = MISSING
+        index = self.value_index[language]
+        keep = ~mask
+        index["present"] &= keep
+        index["empty"] &= keep
+        for kind in index["types"]:
+            index["types"][kind] &= keep
+
+    def remove_locale(self, language, namespace=None):
+        """Toglie il file di un namespace della lingua, o tutta la lingua se namespace è None
+
+        Le modifiche non salvate del file tolto restano in sospeso (con la
+        colonna, se era l'ultimo file della lingua): tornano nel file se viene
+        ricreato, altrimenti il salvataggio le segnala.
+        """
+        if namespace is not None and language in self.columns:
+            self.clear_segment(language, namespace)
+            self.sources.pop((language, namespace), None)
+            column = self.columns[language]
+            dirty = self.dirty.get(language, {})
+            for key_id, value in dirty.items():
+                if self.namespace_of(key_id) == namespace:
+                    previous = column[key_id]
+                    column[key_id] = value
+                    self.update_index(language, key_id, previous, value)
+            if dirty or any(segment_language == language for segment_language, _ in self.segments):
+                if language == self.master_language:
+                    self.build_rows()
+                return
+        self.columns.pop(language, None)
+        self.value_index.pop(language, None)
+        self.dirty.pop(language, None)
+        for key in [key for key in self.segments if key[0] == language]:
+            del self.segments[key]
+        for key in [key for key in self.sources if key[0] == language]:
+            del self.sources[key]
+        if language == self.master_language:
+            self.rows = []
+
+    def set_master(self, language, namespace=None):
+        """Imposta la lingua (e il namespace) del file master; il namespace va indicato prima di caricare i file"""
+        self.master_language = language
+        if namespace is not None:
+            self.default_namespace = namespace
+            self.add_namespace(namespace)
+        self.build_rows()
+
+    def build_rows(self):
+        # Righe nell'ordine dei file master, un namespace dopo l'altro: una riga di gruppo
+        # ogni volta che cambia un prefisso del percorso. I namespace non ancora caricati
+        # hanno solo la loro riga di gruppo
+        self.rows = []
+        if self.master_language not in self.columns:
+            return
+        previous = ()
+        for namespace in self.namespace_order():
+            segment = self.segments.get((self.master_language, namespace))
+            if segment is None:
+                prefix = self.namespaces.get(namespace)
+                if prefix and namespace not in self.loaded_namespaces:
+                    self.rows.append((prefix, None))
+                    previous = ()
+                continue
+            for key_id in segment[0]:
+                path = self.keys[key_id]
+                common = 0
+                while common < len(previous) - 1 and common < len(path) - 1 and previous[common] == path[common]:
+                    common += 1
+                for depth in range(common + 1, len(path)):
+                    self.rows.append((path[:depth], None))
+                self.rows.append((path, key_id))
+                previous = path
+
+    def rename_keys(self, renames):
+        """Cambia il percorso delle chiavi {id: nuovo percorso} mantenendone gli id
+
+        Colonne, bitmask e modifiche non salvate restano valide: cambiano solo
+        la tabella delle chiavi e le righe.
+        """
+        for key_id in renames:
+            del self.index[self.keys[key_id]]
+        for key_id, path in renames.items():
+            self.keys[key_id] = path
+            self.index[path] = key_id
+        self.build_rows()
+
+    def get(self, language, key_id):
+        column = self.columns.get(language)
+        if column is None:
+            return MISSING
+        return column[key_id]
+
+    def lookup(self, language, path):
+        key_id = self.index.get(path)
+        if key_id is None:
+            return MISSING
+        return self.get(language, key_id)
+
+    def is_missing(self, language, key_id):
+        return self.get(language, key_id) is MISSING
+
+    def set_value(self, language, key_id, value):
+        """Modifica una cella e la registra tra le modifiche da salvare"""
+        column = self.columns[language]
+        previous = column[key_id]
+        if previous == value:
+            return False
+        column[key_id] = value
+        self.update_index(language, key_id, previous, value)
+        self.dirty.setdefault(language, {})[key_id] = value
+        return True
+
+    def has_changes(self):
+        return any(self.dirty.values())
+
+    def pending_changes(self, language):
+        """Modifiche da salvare per una lingua come {namespace: {percorso nel file: valore}}"""
+        result = {}
+        for key_id, value in self.dirty.get(language, {}).items():
+            namespace, path = self.split_key(self.keys[key_id])
+            result.setdefault(namespace, {})[path] = value
+        return result
+
+    def mark_saved(self, language, namespace=None):
+        if namespace is None:
+            self.dirty.pop(language, None)
+            return
+        dirty = self.dirty.get(language, {})
+        for key_id in [key_id for key_id in dirty if self.namespace_of(key_id) == namespace]:
+            del dirty[key_id]
+        if not dirty:
+            self.dirty.pop(language, None)
+
+    def update_index(self, language, key_id, previous, value):
+        index = self.value_index[language]
+        types = index["types"]
+        bit = 1 << key_id
+        if previous is not MISSING:
+            if is_empty(previous):
+                index["empty"] &= ~bit
+            else:
+                types[value_type(previous)] &= ~bit
+        if value is MISSING:
+            index["present"] &= ~bit
+            return
+        index["present"] |= bit
+        if is_empty(value):
+            index["empty"] |= bit
+        else:
+            types[value_type(value)] = types.get(value_type(value), 0) | bit
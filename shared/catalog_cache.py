@@ -0,0 +1,121 @@
+import os
+import threading
+from collections import OrderedDict
+from shared.constants import CACHE_MAX_BYTES
+from shared.disk_cache import DiskCache
+from shared.parallel_parse import file_signature, parse_file
+from shared.profiling import span
+from shared.scanner import Scanner, scan_rules
+
+class CatalogCache:
+    """Cache condivisa delle scansioni di progetto e dei file di traduzione già analizzati"""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, disk_cache=None):
+        self.max_bytes = max_bytes
+        self.disk_cache = disk_cache
+        self.total_bytes = 0
+        self.lock = threading.RLock()
+        self.scans = {}             # percorso progetto -> lista dei file trovati
+        self.entries = OrderedDict()  # percorso file -> (firma, colonne appiattite, dimensione)
+        self.hits = 0
+        self.misses = 0
+
+    def scan(self, project_path, refresh=False, on_file=None, cancelled=None, rules=None):
+        """Restituisce i file del progetto, riusando l'ultima scansione se possibile
+
+        on_file viene chiamata per ogni file trovato, cancelled è un threading.Event
+        che interrompe la scansione, rules sono le regole restituite da scan_rules.
+        """
+        rules = rules or scan_rules(None)
+        scan_key = (project_path, rules["ignore"], rules["include"])
+        with self.lock:
+            cached = None if refresh else self.scans.get(scan_key)
+        if cached is not None:
+            if on_file:
+                for file in cached:
+                    on_file(file)
+            return cached
+
+        scanner = Scanner(rules["ignore"], rules["include"])
+        with span("scan", project_path):
+            files = scanner.scan(project_path, on_file=on_file, cancelled=cancelled)
+
+        # Una scansione interrotta è incompleta: non va salvata nella cache
+        if cancelled is None or not cancelled.is_set():
+            with self.lock:
+                self.scans[scan_key] = files
+        return files
+
+    def apply_change(self, project_path, rules, kind, payload):
+        """Aggiorna la scansione in cache con un evento del watcher, senza riscansionare"""
+        rules = rules or scan_rules(None)
+        scan_key = (project_path, rules["ignore"], rules["include"])
+        with self.lock:
+            files = self.scans.get(scan_key)
+            path = payload if kind == "removed" else payload["path"]
+            if files is not None:
+                files = [file for file in files if file["path"] != path]
+                if kind != "removed":
+                    files.append(payload)
+                self.scans[scan_key] = files
+            if kind == "removed":
+                self.discard(path)
+
+    def get(self, file_path):
+        """Restituisce le colonne appiattite del file se la copia in cache è ancora valida"""
+        signature = file_signature(os.stat(file_path))
+        with self.lock:
+            entry = self.entries.get(file_path)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(file_path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        # Sessione precedente: la cache su disco evita l'analisi JSON
+        if self.disk_cache is not None:
+            columns = self.disk_cache.load(file_path, signature)
+            if columns is not None:
+                self.store(file_path, signature, columns, persist=False)
+                return columns
+        return None
+
+    def load(self, file_path):
+        """Restituisce le colonne appiattite del file, analizzandolo solo se è cambiato"""
+        columns = self.get(file_path)
+        if columns is None:
+            signature, columns = parse_file(file_path)
+            self.store(file_path, signature, columns)
+        return columns
+
+    def store(self, file_path, signature, columns, persist=True):
+        if persist and self.disk_cache is not None:
+            self.disk_cache.save(file_path, signature, columns)
+        with self.lock:
+            self.discard(file_path)
+            size = signature[1]
+            self.entries[file_path] = (signature, columns, size)
+            self.total_bytes += size
+            # Rimuove le voci usate meno di recente finché si rientra nel budget
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                oldest = next(iter(self.entries))
+                self.discard(oldest)
+
+    def discard(self, file_path):
+        with self.lock:
+            entry = self.entries.pop(file_path, None)
+            if entry is not None:
+                self.total_bytes -= entry[2]
+
+    def invalidate_project(self, project_path):
+        with self.lock:
+            for scan_key in [key for key in self.scans if key[0] == project_path]:
+                del self.scans[scan_key]
+
+_cache = None
+
+def get_catalog_cache():
+    """Restituisce l'istanza condivisa della cache"""
+    global _cache
+    if _cache is None:
+        _cache = CatalogCache(disk_cache=DiskCache())
+    return _cache
@@ -0,0 +1,126 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+from shared.catalog import MISSING
+
+INDENT = re.compile(r"\n([ \t]+)\S")
+
+def detect_format(text):
+    """Ricava dal testo originale le opzioni di json.dump che lo riproducono"""
+    match = INDENT.search(text)
+    indent = None
+    if match:
+        whitespace = match.group(1)
+        indent = "\t" if whitespace.startswith("\t") else len(whitespace)
+    return {
+        "indent": indent,
+        # Chi scrive gli accenti come è vuole continuare a farlo
+        "ensure_ascii": text.isascii() and "\\u" in text,
+        "trailing_newline": text.endswith("\n"),
+    }
+
+def apply_changes(data, changes):
+    """Applica {percorso: valore} al dizionario annidato; MISSING elimina la chiave"""
+    for path, value in changes.items():
+        node = data
+        for part in path[:-1]:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                if value is MISSING:
+                    break
+                child = {}
+                node[part] = child
+            node = child
+        else:
+            if value is MISSING:
+                node.pop(path[-1], None)
+            else:
+                # Le chiavi esistenti mantengono la loro posizione, le nuove vanno in coda
+                node[path[-1]] = value
+    return data
+
+def write_temp(file_path, text):
+    """Scrive il testo su un file temporaneo nella stessa directory di file_path e ne restituisce il percorso"""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix=".translang-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, temp_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return temp_path
+
+def write_atomic(file_path, text):
+    """Scrive su un file temporaneo nella stessa directory e lo sostituisce con os.replace"""
+    temp_path = write_temp(file_path, text)
+    try:
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def reorder(data, template):
+    """Copia di data con le chiavi nell'ordine di template (ricorsivamente); le altre restano in coda"""
+    if not isinstance(data, dict) or not isinstance(template, dict):
+        return data
+    result = {}
+    for key, value in template.items():
+        if key in data:
+            result[key] = reorder(data[key], value)
+    for key, value in data.items():
+        if key not in result:
+            result[key] = value
+    return result
+
+def normalize_locale(file_path, template):
+    """Riordina le chiavi del file come nel master, mantenendo il formato
+
+    Il file viene riscritto solo se l'ordine cambia; restituisce True se è stato scritto.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if not text.strip():
+        return False
+    data = json.loads(text)
+    ordered = reorder(data, template)
+    if list(iterate_paths(ordered)) == list(iterate_paths(data)):
+        return False
+    file_format = detect_format(text)
+    output = json.dumps(ordered, indent=file_format["indent"], ensure_ascii=file_format["ensure_ascii"])
+    if file_format["trailing_newline"]:
+        output += "\n"
+    write_atomic(file_path, output)
+    return True
+
+def iterate_paths(data, prefix=()):
+    # Percorsi di tutti i nodi nell'ordine del file
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield prefix + (key,)
+            yield from iterate_paths(value, prefix + (key,))
+
+def write_locale(file_path, changes):
+    """Riscrive un file di traduzione applicando le modifiche, preservando ordine e formato
+
+    Restituisce il contenuto annidato scritto.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    data = json.loads(text) if text.strip() else {}
+    file_format = detect_format(text)
+    apply_changes(data, changes)
+
+    output = json.dumps(data, indent=file_format["indent"], ensure_ascii=file_format["ensure_ascii"])
+    if file_format["trailing_newline"]:
+        output += "\n"
+    write_atomic(file_path, output)
+    return data
@@ -1,3 +1,5 @@
+import os
+
 # Costanti dell'applicazione
 APP_NAME = "Translang Studio"
 APP_VERSION = "1.0.0"
@@ -8,4 +10,46 @@ ACCENT_COLOR = "#4a7abc"
 
 # Percorsi
 DATA_DIR = "data"
-PROJECTS_FILE = "projects.json"
\ No newline at end of file
+PROJECTS_FILE = "projects.json"
+PROJECTS_DB = "projects.db"
+# Cache dei cataloghi (byte dei file sorgente tenuti in memoria)
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Sottodirectory di DATA_DIR con la cache persistente dei cataloghi analizzati
+DISK_CACHE_DIR = "cache"
+
+# Memoria di traduzione (in DATA_DIR): voci delle liste di trigrammi lette per ricerca,
+# candidati valutati con la distanza di edit e lunghezza massima dei testi indicizzati
+MEMORY_DB = "translation_memory.db"
+MEMORY_POSTINGS = 60000
+MEMORY_CANDIDATES = 64
+MEMORY_MAX_SOURCE_LENGTH = 1000
+
+# Caricamento in background
+LOADER_WORKERS = 4
+POLL_INTERVAL_MS = 50
+
+# Operazioni su più progetti: progetti elaborati contemporaneamente
+JOB_WORKERS = 8
+
+# Analisi parallela dei file (processi); sotto le soglie si analizza in serie
+PARSE_WORKERS = os.cpu_count() or 1
+PARALLEL_MIN_FILES = 4
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+
+# Verifica dei segnaposto: valori analizzati per blocco nei processi di lavoro e
+# numero massimo di firme tenute in cache (oltre si svuota)
+PLACEHOLDER_CHUNK = 5000
+PLACEHOLDER_CACHE_MAX = 200000
+
+# Directory ignorate dalla scansione se il progetto non ne specifica altre
+DEFAULT_IGNORE = [".git", "node_modules", "dist", "build", ".venv", "__pycache__"]
+
+# Intervallo di controllo del watcher dei progetti (secondi)
+WATCH_INTERVAL = 0.5
+
+# Oltre questa dimensione i file JSON si aprono nel visualizzatore ad albero
+VIEWER_TEXT_MAX_BYTES = 1024 * 1024
+
+# Profilazione: attiva con TRANSLANG_PROFILE=1; gli intervalli più vecchi escono dal buffer circolare
+PROFILE_ENV = "TRANSLANG_PROFILE"
+PROFILE_BUFFER_SIZE = 2000
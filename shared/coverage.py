@@ -0,0 +1,76 @@
+from shared.catalog import format_key, ids_of
+from shared.profiling import span
+
+def present_ids(catalog, language):
+    """Bitmask degli id delle chiavi presenti in una lingua"""
+    index = catalog.value_index.get(language)
+    return index["present"] if index else 0
+
+def locale_diff(catalog, language, master_ids):
+    """Confronto di una lingua con il master tramite operazioni sulle bitmask degli id
+
+    Restituisce un dizionario con le bitmask missing, extra, empty,
+    type_mismatch e la copertura percentuale delle chiavi del master.
+    """
+    master_index = catalog.value_index[catalog.master_language]
+    index = catalog.value_index[language]
+    locale_ids = index["present"]
+    common = master_ids & locale_ids
+    empty = index["empty"] & master_ids
+    # Una chiave ha il tipo giusto se cade nella stessa bitmask di tipo in entrambe le lingue
+    same_type = 0
+    for kind, key_ids in index["types"].items():
+        same_type |= key_ids & master_index["types"].get(kind, 0)
+    type_mismatch = common & ~(empty | same_type | master_index["empty"])
+    master_count = master_ids.bit_count()
+    translated = common.bit_count() - empty.bit_count()
+    return {
+        "missing": master_ids & ~locale_ids,
+        "extra": locale_ids & ~master_ids,
+        "empty": empty,
+        "type_mismatch": type_mismatch,
+        "coverage": round(translated * 100 / master_count, 2) if master_count else 100.0,
+    }
+
+def catalog_diff(catalog):
+    """Confronto di tutte le lingue diverse dal master: {lingua: locale_diff}"""
+    if catalog.master_language not in catalog.columns:
+        return {}
+    with span("coverage.diff"):
+        master_ids = present_ids(catalog, catalog.master_language)
+        return {
+            language: locale_diff(catalog, language, master_ids)
+            for language in catalog.languages
+            if language != catalog.master_language
+        }
+
+def problem_ids(diff):
+    """Bitmask delle chiavi del master con almeno un problema in qualche lingua"""
+    result = 0
+    for locale in diff.values():
+        result |= locale["missing"] | locale["empty"] | locale["type_mismatch"]
+    return result
+
+def extra_ids(diff):
+    """Bitmask delle chiavi presenti in qualche lingua ma non nel master"""
+    result = 0
+    for locale in diff.values():
+        result |= locale["extra"]
+    return result
+
+def catalog_report(catalog):
+    """Rapporto leggibile da programmi per tutte le lingue diverse dal master"""
+    return {
+        language: {
+            "coverage": locale["coverage"],
+            "missing": sorted_keys(catalog, locale["missing"]),
+            "extra": sorted_keys(catalog, locale["extra"]),
+            "empty": sorted_keys(catalog, locale["empty"]),
+            "type_mismatch": sorted_keys(catalog, locale["type_mismatch"]),
+        }
+        for language, locale in catalog_diff(catalog).items()
+    }
+
+def sorted_keys(catalog, key_ids):
+    # Ordine del catalogo (quello del primo file in cui la chiave compare)
+    return [format_key(catalog.keys[key_id]) for key_id in ids_of(key_ids)]
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from shared.constants import DATA_DIR, DISK_CACHE_DIR
+from shared.profiling import span
+
+MAGIC = b"TLC1"
+VERSION = 2
+# magic, versione, dimensione, mtime_ns, sha256 del contenuto, voci,
+# byte delle chiavi, byte dei valori testuali, byte dei valori non testuali
+HEADER = struct.Struct("<4sHQq32sIQQQ")
+
+# Separatori nei blocchi di testo: tra segmenti di un percorso e tra voci
+SEGMENT = "\x00"
+RECORD = "\x01"
+
+TYPE_STRING = 0
+TYPE_JSON = 1  # numeri, booleani, null e liste: un unico array JSON per tutto il file
+
+def content_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.digest()
+
+class DiskCache:
+    """Cache persistente dei cataloghi appiattiti, in un formato binario da mappare in memoria
+
+    Ogni file di traduzione ha una voce in DATA_DIR/cache, valida finché
+    coincidono dimensione e mtime; se cambia solo l'mtime (es. dopo un
+    checkout) decide l'hash del contenuto. Chiavi e valori testuali sono
+    blocchi UTF-8 decodificati direttamente dalla mappatura; solo i valori
+    non testuali passano da un unico array JSON.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(DATA_DIR, DISK_CACHE_DIR)
+        self.hits = 0
+        self.misses = 0
+
+    def entry_path(self, file_path):
+        name = hashlib.sha1(os.path.abspath(file_path).encode("utf-8", "surrogateescape")).hexdigest()
+        return os.path.join(self.directory, name + ".tlc")
+
+    def load(self, file_path, signature):
+        """Restituisce le colonne (percorsi, valori) se la voce è valida, altrimenti None"""
+        entry_path = self.entry_path(file_path)
+        try:
+            with span("disk_cache.load", os.path.basename(file_path)):
+                with open(entry_path, "rb") as f:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        columns = self.read(file_path, entry_path, data, signature)
+        except (OSError, ValueError, struct.error):
+            columns = None
+        if columns is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return columns
+
+    def read(self, file_path, entry_path, data, signature):
+        magic, version, size, mtime_ns, digest, count, keys_length, values_length, others_length = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION or size != signature[1]:
+            return None
+        if mtime_ns != signature[0]:
+            # Stesso contenuto con un altro mtime: la voce resta valida
+            if content_hash(file_path) != digest:
+                return None
+            self.touch(entry_path, signature[0])
+
+        with memoryview(data) as view:
+            offset = HEADER.size
+            types = bytes(view[offset:offset + count])
+            offset += count
+            keys_text = str(view[offset:offset + keys_length], "utf-8")
+            offset += keys_length
+            values_text = str(view[offset:offset + values_length], "utf-8")
+            offset += values_length
+            others_text = str(view[offset:offset + others_length], "utf-8")
+
+        if count == 0:
+            return [], []
+        keys = [tuple(record.split(SEGMENT)) for record in keys_text.split(RECORD)]
+        values = values_text.split(RECORD)
+        if len(keys) != count or len(values) != count:
+            return None
+        if others_length:
+            # I valori non testuali si decodificano con una sola chiamata a json.loads
+            others = iter(json.loads(others_text))
+            position = types.find(TYPE_JSON)
+            while position != -1:
+                values[position] = next(others)
+                position = types.find(TYPE_JSON, position + 1)
+        return keys, values
+
+    def touch(self, entry_path, mtime_ns):
+        # Aggiorna solo l'mtime registrato nell'intestazione
+        with open(entry_path, "r+b") as f:
+            f.seek(struct.calcsize("<4sHQ"))
+            f.write(struct.pack("<q", mtime_ns))
+
+    def save(self, file_path, signature, columns):
+        """Scrive la voce del file; i testi con i caratteri separatori non vengono salvati"""
+        keys, values = columns
+        types = bytearray(len(keys))
+        key_records = []
+        value_records = []
+        others = []
+        for index, (path, value) in enumerate(zip(keys, values)):
+            for segment in path:
+                if SEGMENT in segment or RECORD in segment:
+                    return False
+            key_records.append(SEGMENT.join(path))
+            if isinstance(value, str):
+                if RECORD in value:
+                    return False
+                value_records.append(value)
+            else:
+                types[index] = TYPE_JSON
+                value_records.append("")
+                others.append(value)
+        keys_blob = RECORD.join(key_records).encode("utf-8")
+        values_blob = RECORD.join(value_records).encode("utf-8")
+        others_blob = json.dumps(others).encode("utf-8") if others else b""
+
+        try:
+            digest = content_hash(file_path)
+            header = HEADER.pack(MAGIC, VERSION, signature[1], signature[0], digest, len(keys), len(keys_blob), len(values_blob), len(others_blob))
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(header)
+                    f.write(types)
+                    f.write(keys_blob)
+                    f.write(values_blob)
+                    f.write(others_blob)
+                os.replace(temp_path, self.entry_path(file_path))
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        except OSError as e:
+            print(f"Errore nel salvataggio della cache: {e}")
+            return False
+        return True
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".tlc"):
+                os.remove(os.path.join(self.directory, name))
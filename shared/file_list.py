@@ -0,0 +1,115 @@
+import bisect
+import itertools
+
+# Colonne ordinabili e chiave di ordinamento (il percorso rende l'ordine stabile)
+SORT_KEYS = {
+    "filename": lambda entry: (entry["filename"].casefold(), entry["path"]),
+    "path": lambda entry: (entry["path"].casefold(), entry["path"]),
+    "size": lambda entry: (entry["size"], entry["path"]),
+}
+
+def insertion_order(entry):
+    return entry["order"]
+
+class FileListModel:
+    """Elenco dei file di un progetto con ordinamento, filtro e aggiornamenti incrementali
+
+    Le righe visibili sono mantenute già ordinate: aggiungere, togliere o
+    modificare un file costa una ricerca binaria, non un nuovo ordinamento.
+    """
+
+    def __init__(self):
+        self.entries = {}        # percorso -> riga
+        self.visible = []        # righe che corrispondono al filtro, in ordine crescente
+        self.sort_column = None  # None = ordine di scansione
+        self.reverse = False
+        self.query = ""
+        self.master_path = None
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.visible)
+
+    def __contains__(self, path):
+        return path in self.entries
+
+    def get(self, path):
+        return self.entries.get(path)
+
+    def sort_key(self):
+        return SORT_KEYS.get(self.sort_column, insertion_order)
+
+    def matches(self, entry):
+        return not self.query or self.query in entry["filename"].casefold() or self.query in entry["path"].casefold()
+
+    def add(self, filename, path, size):
+        entry = {
+            "filename": filename,
+            "path": path,
+            "size": round(size / 1024, 2),  # Dimensione in KB
+            "master": "✓" if path == self.master_path else "",
+            "order": next(self.counter),
+        }
+        self.entries[path] = entry
+        if self.matches(entry):
+            bisect.insort(self.visible, entry, key=self.sort_key())
+        return entry
+
+    def remove(self, path):
+        entry = self.entries.pop(path, None)
+        if entry is not None and self.matches(entry):
+            self.visible.pop(self.position(entry))
+        return entry
+
+    def set_size(self, path, size):
+        """Aggiorna la dimensione; la riga cambia posizione solo se si ordina per dimensione"""
+        entry = self.entries.get(path)
+        if entry is None:
+            return None
+        visible = self.matches(entry)
+        if visible and self.sort_column == "size":
+            self.visible.pop(self.position(entry))
+        entry["size"] = round(size / 1024, 2)
+        if visible and self.sort_column == "size":
+            bisect.insort(self.visible, entry, key=self.sort_key())
+        return entry
+
+    def position(self, entry):
+        key = self.sort_key()
+        return bisect.bisect_left(self.visible, key(entry), key=key)
+
+    def set_master(self, path):
+        """Cambia il file master; restituisce i percorsi delle righe da ridisegnare"""
+        if path == self.master_path:
+            return []
+        changed = []
+        for candidate in (self.master_path, path):
+            entry = self.entries.get(candidate)
+            if entry is not None:
+                entry["master"] = "✓" if candidate == path else ""
+                changed.append(candidate)
+        self.master_path = path
+        return changed
+
+    def set_sort(self, column):
+        """Ordina per colonna; una seconda richiesta sulla stessa colonna inverte l'ordine"""
+        if column == self.sort_column:
+            self.reverse = not self.reverse
+            return
+        self.sort_column = column
+        self.reverse = False
+        self.visible.sort(key=self.sort_key())
+
+    def set_query(self, query):
+        query = query.strip().casefold()
+        if query == self.query:
+            return False
+        self.query = query
+        self.visible = sorted((entry for entry in self.entries.values() if self.matches(entry)), key=self.sort_key())
+        return True
+
+    def rows(self, count):
+        """Le prime righe visibili nell'ordine richiesto"""
+        if self.reverse:
+            return self.visible[:-count - 1:-1] if count else []
+        return self.visible[:count]
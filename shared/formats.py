@@ -0,0 +1,292 @@
+import ast
+import collections
+import importlib.util
+import json
+import mmap
+import os
+import re
+import struct
+from shared.catalog import flatten
+
+# PyYAML è facoltativo: senza, i file YAML non vengono cercati. Come ElementTree
+# viene importato alla prima analisi, non all'avvio dell'applicazione
+HAS_YAML = importlib.util.find_spec("yaml") is not None
+
+CatalogFormat = collections.namedtuple("CatalogFormat", "name extensions parse writable")
+
+# estensione (minuscola, con il punto) -> formato
+FORMATS = {}
+
+def register_format(name, extensions, parse, writable=False):
+    """Registra un formato: parse(percorso) restituisce le colonne (percorsi, valori)
+
+    I formati vanno registrati all'importazione di un modulo: l'analisi
+    parallela gira in processi separati che importano di nuovo i moduli.
+    """
+    catalog_format = CatalogFormat(name, tuple(extensions), parse, writable)
+    for extension in catalog_format.extensions:
+        FORMATS[extension.lower()] = catalog_format
+    return catalog_format
+
+def format_for(filename):
+    """Formato del file in base all'estensione, None se non è un file di traduzione"""
+    return FORMATS.get(os.path.splitext(filename)[1].lower())
+
+def is_catalog_file(filename):
+    return format_for(filename) is not None
+
+def parse_catalog(file_path):
+    catalog_format = format_for(file_path)
+    if catalog_format is None:
+        raise ValueError(f"Formato non supportato: {os.path.basename(file_path)}")
+    return catalog_format.parse(file_path)
+
+def is_writable(file_path):
+    catalog_format = format_for(file_path)
+    return catalog_format is not None and catalog_format.writable
+
+# JSON e ARB
+
+def parse_json(file_path):
+    with open(file_path, "r", encoding="utf-8") as f:
+        return flatten(json.load(f))
+
+def parse_arb(file_path):
+    # Le chiavi che iniziano con "@" sono metadati (descrizioni, segnaposto, @@locale)
+    with open(file_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    keys = []
+    values = []
+    for key, value in data.items():
+        if not key.startswith("@"):
+            keys.append((key,))
+            values.append(value)
+    return keys, values
+
+# YAML
+
+LOCALE_ROOT = re.compile(r"^[a-z]{2,3}(?:[-_][A-Za-z0-9]{2,8})?$")
+
+def parse_yaml(file_path):
+    import yaml
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(file_path, "r", encoding="utf-8") as f:
+        data = yaml.load(f, Loader=loader)
+    # I file di Rails hanno la lingua come unica chiave radice (it: ...): la si salta
+    if isinstance(data, dict) and len(data) == 1:
+        (root, content), = data.items()
+        if isinstance(content, dict) and isinstance(root, str) and LOCALE_ROOT.match(root):
+            data = content
+    keys, values = flatten(data if isinstance(data, dict) else {})
+    return [tuple(str(part) for part in path) for path in keys], values
+
+# gettext .po e .mo
+
+def po_string(line):
+    # Le stringhe .po usano gli escape del C, compatibili con i letterali Python
+    if not line.startswith('"'):
+        return ""
+    if "\\" not in line:
+        return line[1:-1]
+    return ast.literal_eval(line)
+
+def po_key(context, msgid):
+    return (context, msgid) if context is not None else (msgid,)
+
+def parse_po(file_path):
+    """Analisi riga per riga: un'unità alla volta, senza tenere il file in memoria"""
+    keys = []
+    values = []
+    entry = {}
+    field = None
+
+    def finish():
+        msgid = entry.get("msgid")
+        # La voce con msgid vuoto è l'intestazione del file
+        if msgid:
+            if "msgid_plural" in entry:
+                forms = sorted((name for name in entry if name.startswith("msgstr[")), key=lambda name: int(name[7:-1]))
+                value = [entry[name] for name in forms]
+            else:
+                value = entry.get("msgstr", "")
+            keys.append(po_key(entry.get("msgctxt"), msgid))
+            values.append(value)
+        entry.clear()
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                # Le voci obsolete (#~) e i commenti non fanno parte del catalogo
+                if not line and "msgid" in entry:
+                    finish()
+                field = None
+                continue
+            if line.startswith('"'):
+                if field is not None:
+                    entry[field] += po_string(line)
+                continue
+            name, _, rest = line.partition(" ")
+            if name in ("msgctxt", "msgid") and "msgid" in entry and ("msgstr" in entry or "msgstr[0]" in entry):
+                finish()
+            field = name
+            entry[field] = po_string(rest.strip())
+    if "msgid" in entry:
+        finish()
+    return keys, values
+
+MO_MAGIC = {0x950412de: "<", 0xde120495: ">"}
+
+def parse_mo(file_path):
+    """Catalogo gettext compilato: tabelle di offset lette direttamente dalla mappatura"""
+    keys = []
+    values = []
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return keys, values
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            byte_order = MO_MAGIC.get(struct.unpack_from("<I", data, 0)[0])
+            if byte_order is None:
+                raise ValueError("File .mo non valido")
+            count, originals, translations = struct.unpack_from(byte_order + "4x4xIII", data, 0)
+            pair = struct.Struct(byte_order + "II")
+            for index in range(count):
+                length, offset = pair.unpack_from(data, originals + index * 8)
+                original = data[offset:offset + length].decode("utf-8")
+                length, offset = pair.unpack_from(data, translations + index * 8)
+                translation = data[offset:offset + length].decode("utf-8")
+                if not original:
+                    continue  # intestazione
+                context = None
+                if "\x04" in original:
+                    context, original = original.split("\x04", 1)
+                if "\x00" in original:
+                    # Plurali: msgid\0msgid_plural, traduzioni separate da \0
+                    original = original.split("\x00", 1)[0]
+                    translation = translation.split("\x00")
+                keys.append(po_key(context, original))
+                values.append(translation)
+    return keys, values
+
+# Java .properties
+
+def properties_unescape(text):
+    if "\\" not in text:
+        return text
+    result = []
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if char == "\\" and index + 1 < len(text):
+            index += 1
+            char = text[index]
+            if char == "u" and index + 4 < len(text):
+                result.append(chr(int(text[index + 1:index + 5], 16)))
+                index += 5
+                continue
+            result.append({"t": "\t", "n": "\n", "r": "\r", "f": "\f"}.get(char, char))
+        else:
+            result.append(char)
+        index += 1
+    return "".join(result)
+
+def properties_split(line):
+    # Il separatore è il primo =, : o spazio non preceduto da una barra rovesciata
+    index = 0
+    while index < len(line):
+        char = line[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char in "=: \t\f":
+            key = line[:index]
+            rest = line[index:].lstrip(" \t\f")
+            if rest[:1] in ("=", ":") and char in " \t\f":
+                rest = rest[1:]
+            elif char in "=:":
+                rest = rest[1:]
+            return key, rest.lstrip(" \t\f")
+        index += 1
+    return line, ""
+
+def parse_properties(file_path):
+    """Analisi riga per riga; le chiavi puntate (app.title) diventano percorsi annidati"""
+    keys = []
+    values = []
+    logical = ""
+    # ISO-8859-1 è la codifica storica, ma quasi tutti i progetti usano UTF-8
+    with open(file_path, "r", encoding="utf-8", errors="surrogateescape") as f:
+        for raw in f:
+            line = raw.strip("\r\n").lstrip(" \t\f")
+            if not logical and (not line or line[0] in "#!"):
+                continue
+            # Una barra rovesciata finale (non a sua volta protetta) continua sulla riga successiva
+            trailing = len(line) - len(line.rstrip("\\"))
+            if trailing % 2 == 1:
+                logical += line[:-1]
+                continue
+            logical += line
+            key, value = properties_split(logical)
+            logical = ""
+            keys.append(tuple(properties_unescape(key).split(".")))
+            values.append(properties_unescape(value))
+    if logical:
+        key, value = properties_split(logical)
+        keys.append(tuple(properties_unescape(key).split(".")))
+        values.append(properties_unescape(value))
+    return keys, values
+
+# XLIFF 1.2 e 2.0
+
+def local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+def element_text(element):
+    # Il testo include quello dei segnaposto interni (<g>, <ph>, ...)
+    return "".join(element.itertext())
+
+def parse_xliff(file_path):
+    """Analisi a eventi: ogni unità viene liberata appena letta
+
+    Il valore è il testo tradotto; se il file non dichiara una lingua di
+    destinazione (file della lingua sorgente) è il testo sorgente.
+    """
+    import xml.etree.ElementTree as ElementTree
+    keys = []
+    values = []
+    unit_id = None
+    source = None
+    target = None
+    has_target_language = False
+    for event, element in ElementTree.iterparse(file_path, events=("start", "end")):
+        name = local_name(element.tag)
+        if event == "start":
+            if name in ("trans-unit", "unit"):
+                unit_id = element.get("resname") or element.get("id")
+                source = target = None
+            elif name in ("xliff", "file"):
+                # XLIFF 2.0: trgLang sulla radice; XLIFF 1.2: target-language su <file>
+                has_target_language = has_target_language or bool(element.get("trgLang") or element.get("target-language"))
+            continue
+        if name == "source" and unit_id is not None and source is None:
+            source = element_text(element)
+        elif name == "target" and unit_id is not None and target is None:
+            target = element_text(element)
+        elif name in ("trans-unit", "unit"):
+            if unit_id is not None:
+                keys.append((unit_id,))
+                if target is None:
+                    target = "" if has_target_language else source or ""
+                values.append(target)
+            unit_id = None
+            element.clear()
+    return keys, values
+
+register_format("json", [".json"], parse_json, writable=True)
+register_format("arb", [".arb"], parse_arb, writable=True)
+register_format("gettext", [".po"], parse_po)
+register_format("gettext-mo", [".mo"], parse_mo)
+register_format("properties", [".properties"], parse_properties)
+register_format("xliff", [".xlf", ".xliff"], parse_xliff)
+if HAS_YAML:
+    register_format("yaml", [".yml", ".yaml"], parse_yaml)
@@ -0,0 +1,273 @@
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from shared.catalog_writer import normalize_locale
+from shared.constants import JOB_WORKERS
+from shared.coverage import catalog_diff
+from shared.formats import format_for
+from shared.languages import language_detector
+from shared.loader import load_catalog
+from shared.placeholders import placeholder_report
+from shared.profiling import span
+from shared.scanner import scan_rules
+
+# Stati di un job
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+class JobCancelled(Exception):
+    """Il job è stato annullato mentre era in esecuzione"""
+
+class Job:
+    """Un'operazione su un progetto: stato, avanzamento e risultato"""
+
+    def __init__(self, job_id, project, operation):
+        self.id = job_id
+        self.project = project
+        self.operation = operation
+        self.state = PENDING
+        self.done = 0
+        self.total = 0
+        self.result = None
+        self.error = None
+        self.elapsed = 0.0
+        self.cancelled = threading.Event()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise JobCancelled()
+
+class JobEngine:
+    """Esegue operazioni su molti progetti con un pool limitato di thread
+
+    L'analisi dei file passa dal pool di processi condiviso, quindi i thread
+    aspettano soprattutto il disco. Come BackgroundLoader, i risultati
+    arrivano come messaggi in una coda che l'interfaccia svuota con after():
+      ("state", job)               job avviato, terminato, fallito o annullato
+      ("progress", job)            job.done / job.total aggiornati
+      ("done",)                    tutti i job inviati sono terminati
+    """
+
+    def __init__(self, cache, engine, max_workers=JOB_WORKERS):
+        self.cache = cache
+        self.engine = engine
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.messages = queue.Queue()
+        self.jobs = []
+        self.lock = threading.Lock()
+        self.running = 0
+
+    def post(self, *message):
+        self.messages.put(message)
+
+    def poll(self, max_items=1000):
+        """Restituisce i messaggi disponibili senza bloccare"""
+        result = []
+        while len(result) < max_items:
+            try:
+                result.append(self.messages.get_nowait())
+            except queue.Empty:
+                break
+        return result
+
+    def submit(self, projects, operation):
+        """Accoda l'operazione per ogni progetto e restituisce i job creati"""
+        if operation not in OPERATIONS:
+            raise ValueError(f"Operazione sconosciuta: {operation}")
+        jobs = []
+        with self.lock:
+            for project in projects:
+                job = Job(len(self.jobs), project, operation)
+                self.jobs.append(job)
+                jobs.append(job)
+                self.running += 1
+        for job in jobs:
+            self.executor.submit(self.run, job)
+        return jobs
+
+    def cancel(self, jobs=None):
+        """Annulla i job indicati (predefinito: tutti); quelli in coda non partiranno"""
+        for job in self.jobs if jobs is None else jobs:
+            job.cancelled.set()
+
+    def close(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, job):
+        if job.cancelled.is_set():
+            self.finish(job, CANCELLED)
+            return
+        job.state = RUNNING
+        self.post("state", job)
+        start = time.perf_counter()
+        try:
+            with span(f"job.{job.operation}", job.project["name"]):
+                job.result = OPERATIONS[job.operation](self, job)
+            state = DONE
+        except JobCancelled:
+            state = CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            state = FAILED
+        job.elapsed = time.perf_counter() - start
+        self.finish(job, state)
+
+    def finish(self, job, state):
+        job.state = state
+        self.post("state", job)
+        with self.lock:
+            self.running -= 1
+            finished = self.running == 0
+        if finished:
+            self.post("done")
+
+    def progress(self, job, done, total):
+        job.done = done
+        job.total = total
+        self.post("progress", job)
+        job.check()
+
+    def load(self, job, errors=None):
+        """Catalogo completo del progetto del job"""
+        project = job.project
+        if not project.get("master_file"):
+            raise ValueError("File master non impostato")
+        if not os.path.exists(project["path"]):
+            raise ValueError(f"Il percorso {project['path']} non esiste")
+        on_error = (lambda file, error: errors.append({"path": file["path"], "error": str(error)})) if errors is not None else None
+        catalog = load_catalog(self.cache, self.engine, project["path"], project["master_file"],
+                               rules=scan_rules(project), languages=language_detector(project),
+                               on_error=on_error, cancelled=job.cancelled)
+        job.check()
+        if catalog.master_language not in catalog.columns:
+            raise ValueError("File master non trovato o non valido")
+        return catalog
+
+# Operazioni: ognuna riceve il motore e il job e restituisce un dizionario serializzabile in JSON
+
+def scan_operation(runner, job):
+    project = job.project
+    if not os.path.exists(project["path"]):
+        raise ValueError(f"Il percorso {project['path']} non esiste")
+    runner.progress(job, 0, 1)
+    files = runner.cache.scan(project["path"], refresh=True, rules=scan_rules(project), cancelled=job.cancelled)
+    job.check()
+    detector = language_detector(project)
+    runner.progress(job, 1, 1)
+    return {
+        "files": len(files),
+        "bytes": sum(file["size"] for file in files),
+        "languages": sorted({detector.language(file["path"]) for file in files}),
+    }
+
+def coverage_operation(runner, job):
+    runner.progress(job, 0, 2)
+    catalog = runner.load(job)
+    runner.progress(job, 1, 2)
+    diff = catalog_diff(catalog)
+    runner.progress(job, 2, 2)
+    return {
+        "master": catalog.master_language,
+        "keys": catalog.value_index[catalog.master_language]["present"].bit_count(),
+        "coverage": {language: locale["coverage"] for language, locale in diff.items()},
+        "missing": sum(locale["missing"].bit_count() for locale in diff.values()),
+    }
+
+def validate_operation(runner, job):
+    # File non leggibili, valori vuoti, tipi diversi dal master, chiavi assenti nel master
+    # e segnaposto (o strutture ICU) diversi da quelli del master
+    runner.progress(job, 0, 3)
+    errors = []
+    catalog = runner.load(job, errors)
+    runner.progress(job, 1, 3)
+    diff = catalog_diff(catalog)
+    runner.progress(job, 2, 3)
+    placeholders = placeholder_report(catalog, runner.engine)
+    runner.progress(job, 3, 3)
+    return {
+        "file_errors": errors,
+        "empty": sum(locale["empty"].bit_count() for locale in diff.values()),
+        "type_mismatch": sum(locale["type_mismatch"].bit_count() for locale in diff.values()),
+        "extra": sum(locale["extra"].bit_count() for locale in diff.values()),
+        "placeholders": sum(len(keys) for keys in placeholders.values()),
+        "placeholder_issues": placeholders,
+    }
+
+def normalize_operation(runner, job):
+    # Riordina le chiavi dei file JSON come nel master del loro namespace; scrive solo i file cambiati
+    project = job.project
+    catalog = runner.load(job)
+    master = catalog.master_language
+    templates = {}
+    for (language, namespace), source in catalog.sources.items():
+        if language == master and format_for(source).name == "json":
+            with open(source, "r", encoding="utf-8") as f:
+                templates[namespace] = json.load(f)
+    targets = [(namespace, source) for (language, namespace), source in catalog.sources.items()
+               if language != master and namespace in templates and format_for(source).name == "json"]
+    written = []
+    errors = []
+    for done, (namespace, source) in enumerate(targets):
+        runner.progress(job, done, len(targets))
+        try:
+            if normalize_locale(source, templates[namespace]):
+                written.append(os.path.relpath(source, project["path"]))
+        except (OSError, ValueError) as e:
+            errors.append({"path": source, "error": str(e)})
+    runner.progress(job, len(targets), len(targets))
+    return {"files": len(targets), "written": written, "file_errors": errors}
+
+OPERATIONS = {
+    "scan": scan_operation,
+    "coverage": coverage_operation,
+    "validate": validate_operation,
+    "normalize": normalize_operation,
+}
+
+def summarize(jobs):
+    """Risultati aggregati di un gruppo di job, per la vista riepilogativa e l'esportazione"""
+    states = {}
+    for job in jobs:
+        states[job.state] = states.get(job.state, 0) + 1
+    summary = {"jobs": len(jobs), "states": states, "elapsed": round(sum(job.elapsed for job in jobs), 3)}
+    results = [job.result for job in jobs if job.state == DONE and job.result]
+    coverages = [value for result in results for value in result.get("coverage", {}).values()]
+    if coverages:
+        summary["coverage_mean"] = round(sum(coverages) / len(coverages), 2)
+        summary["coverage_min"] = min(coverages)
+    for field in ("files", "bytes", "missing", "empty", "type_mismatch", "extra", "placeholders"):
+        values = [result[field] for result in results if isinstance(result.get(field), int)]
+        if values:
+            summary[field] = sum(values)
+    written = [path for result in results for path in result.get("written", [])]
+    if any("written" in result for result in results):
+        summary["written"] = len(written)
+    file_errors = sum(len(result.get("file_errors", [])) for result in results)
+    if file_errors:
+        summary["file_errors"] = file_errors
+    return summary
+
+def job_report(jobs):
+    """Rapporto JSON completo: riepilogo e dettaglio per progetto"""
+    return {
+        "summary": summarize(jobs),
+        "jobs": [
+            {
+                "project": job.project["name"],
+                "path": job.project["path"],
+                "operation": job.operation,
+                "state": job.state,
+                "elapsed": round(job.elapsed, 3),
+                "result": job.result,
+                "error": job.error,
+            }
+            for job in jobs
+        ],
+    }
@@ -0,0 +1,131 @@
+import json
+import mmap
+import re
+
+WHITESPACE = re.compile(rb"[ \t\r\n]*")
+STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+SCALAR = re.compile(rb"[^,\]}\s]+")
+# Stringhe o parentesi: tutto il resto viene saltato dal motore delle regex
+TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]')
+
+OBJECT = "object"
+ARRAY = "array"
+SCALAR_KIND = "scalar"
+
+class LazyJsonDocument:
+    """Documento JSON letto su richiesta da un file mappato in memoria
+
+    Nessun nodo viene costruito finché non serve: children() esamina solo il
+    livello richiesto e salta i valori annidati senza decodificarli.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # File vuoto: mmap non accetta lunghezza zero
+            self.data = b""
+        self.root = self.skip_whitespace(0)
+        if self.root >= len(self.data):
+            self.close()
+            raise ValueError("Documento JSON vuoto")
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def skip_whitespace(self, pos):
+        return WHITESPACE.match(self.data, pos).end()
+
+    def kind(self, offset):
+        char = self.data[offset:offset + 1]
+        if char == b"{":
+            return OBJECT
+        if char == b"[":
+            return ARRAY
+        return SCALAR_KIND
+
+    def value_end(self, pos):
+        """Posizione subito dopo il valore che inizia in pos"""
+        char = self.data[pos:pos + 1]
+        if char == b'"':
+            match = STRING.match(self.data, pos)
+        elif char in (b"{", b"["):
+            return self.container_end(pos)
+        else:
+            match = SCALAR.match(self.data, pos)
+        if match is None:
+            raise ValueError(f"Valore JSON non valido alla posizione {pos}")
+        return match.end()
+
+    def container_end(self, pos):
+        depth = 0
+        for match in TOKEN.finditer(self.data, pos):
+            token = match.group()
+            if token[0] == 0x22:  # stringa
+                continue
+            if token in (b"{", b"["):
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+        raise ValueError(f"Contenitore JSON non chiuso alla posizione {pos}")
+
+    def scalar(self, offset):
+        """Decodifica un valore scalare (stringa, numero, booleano, null)"""
+        return json.loads(self.data[offset:self.value_end(offset)])
+
+    def preview(self, offset, limit=200):
+        kind = self.kind(offset)
+        if kind == OBJECT:
+            return "{...}"
+        if kind == ARRAY:
+            return "[...]"
+        end = self.value_end(offset)
+        if end - offset > limit * 4:
+            # Stringa molto lunga: mostra solo l'inizio senza decodificarla tutta
+            return self.data[offset:offset + limit].decode("utf-8", "replace") + "..."
+        return json.dumps(json.loads(self.data[offset:end]), ensure_ascii=False)
+
+    def children(self, offset):
+        """Genera (chiave o indice, offset del valore) dei figli di un oggetto o array
+
+        Il generatore avanza solo quanto richiesto: consumarlo a pagine
+        permette di mostrare oggetti enormi senza esaminarli interamente.
+        """
+        kind = self.kind(offset)
+        if kind == SCALAR_KIND:
+            return
+        closing = b"}" if kind == OBJECT else b"]"
+        pos = self.skip_whitespace(offset + 1)
+        if self.data[pos:pos + 1] == closing:
+            return
+        index = 0
+        while True:
+            if kind == OBJECT:
+                match = STRING.match(self.data, pos)
+                if match is None:
+                    raise ValueError(f"Chiave JSON non valida alla posizione {pos}")
+                key_start, pos = match.start(), match.end()
+                pos = self.skip_whitespace(pos)
+                if self.data[pos:pos + 1] != b":":
+                    raise ValueError(f"':' atteso alla posizione {pos}")
+                pos = self.skip_whitespace(pos + 1)
+                key = json.loads(self.data[key_start:match.end()])
+            else:
+                key = index
+            value_offset = pos
+            pos = self.skip_whitespace(self.value_end(pos))
+            yield key, value_offset
+            index += 1
+            separator = self.data[pos:pos + 1]
+            if separator == b",":
+                pos = self.skip_whitespace(pos + 1)
+            elif separator == closing:
+                return
+            else:
+                raise ValueError(f"',' o '{closing.decode()}' atteso alla posizione {pos}")
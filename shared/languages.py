@@ -0,0 +1,111 @@
+import os
+import re
+from shared.formats import format_for
+
+# Da dove ricavare la lingua di un file (campo "language_from" del progetto)
+FROM_FILENAME = "filename"    # it.json, messages_it.properties, app_pt_BR.arb
+FROM_DIRECTORY = "directory"  # locales/it/common.json, it/LC_MESSAGES/app.po, values-it/strings.xml
+FROM_PATTERN = "pattern"      # espressione regolare con il gruppo (?P<lang>...) sul percorso relativo
+
+# I file della stessa lingua si distinguono per namespace: la parte del percorso
+# relativo che resta togliendo la lingua (locales/it/errors.json -> "locales/errors").
+# Con FROM_PATTERN il namespace può essere indicato dal gruppo (?P<ns>...)
+
+# Codice di lingua in coda al nome del file, dopo "_", "-" o "."
+FILENAME_SUFFIX = re.compile(r"(?:^|[_.-])([a-z]{2,3}(?:[-_](?:[A-Z]{2}|[A-Z][a-z]{3}|\d{3}))?)$")
+
+def language_rules(project):
+    """Regole per riconoscere la lingua dei file del progetto"""
+    project = project or {}
+    return {
+        "from": project.get("language_from") or FROM_FILENAME,
+        "pattern": project.get("language_pattern") or None,
+    }
+
+def stem(filename):
+    catalog_format = format_for(filename)
+    if catalog_format is not None:
+        return os.path.splitext(filename)[0]
+    return filename.split('.')[0]
+
+def language_from_filename(filename):
+    """Lingua dal nome del file: "it.json" -> "it", "messages_pt_BR.properties" -> "pt_BR" """
+    return split_filename(filename)[1]
+
+def split_filename(filename):
+    """(prefisso, lingua) dal nome del file: "messages_pt_BR.properties" -> ("messages", "pt_BR")"""
+    name = stem(filename)
+    match = FILENAME_SUFFIX.search(name)
+    if match and match.group(1) != name:
+        return name[:match.start()], match.group(1)
+    return "", name.split('.')[0]
+
+def join_namespace(*parts):
+    # Senza separatori vuoti o ripetuti: "i18n/", "/sub" -> "i18n/sub"
+    pieces = (piece.strip("_.-") for part in parts for piece in part.split("/"))
+    return "/".join(piece for piece in pieces if piece)
+
+def language_from_directory(file_path):
+    directory = os.path.dirname(os.path.abspath(file_path))
+    name = os.path.basename(directory)
+    if name == "LC_MESSAGES":
+        # Struttura di gettext: <lingua>/LC_MESSAGES/<dominio>.po
+        name = os.path.basename(os.path.dirname(directory))
+    if name.startswith("values-"):
+        # Risorse Android: values-it, values-pt-rBR
+        name = name[len("values-"):].replace("-r", "_")
+    elif name.endswith(".lproj"):
+        # Risorse iOS: it.lproj
+        name = name[:-len(".lproj")]
+    return name or language_from_filename(os.path.basename(file_path))
+
+class LanguageDetector:
+    """Ricava la lingua di un file secondo le regole del progetto"""
+
+    def __init__(self, rules=None, project_path=None):
+        rules = rules or language_rules(None)
+        self.source = rules["from"]
+        self.pattern = re.compile(rules["pattern"]) if self.source == FROM_PATTERN and rules["pattern"] else None
+        self.project_path = os.path.abspath(project_path) if project_path else None
+
+    def relative_path(self, file_path):
+        path = os.path.abspath(file_path)
+        if self.project_path and path.startswith(self.project_path + os.sep):
+            path = path[len(self.project_path) + 1:]
+        return path.replace(os.sep, "/")
+
+    def language(self, file_path):
+        if self.source == FROM_DIRECTORY:
+            return language_from_directory(file_path)
+        if self.pattern is not None:
+            match = self.pattern.search(self.relative_path(file_path))
+            if match:
+                return match.group("lang") if "lang" in self.pattern.groupindex else match.group(1)
+        return language_from_filename(os.path.basename(file_path))
+
+    def namespace(self, file_path):
+        """Namespace del file: distingue i file della stessa lingua (it/common.json, it/errors.json)"""
+        relative = self.relative_path(file_path)
+        directory, _, filename = relative.rpartition("/")
+        if self.source == FROM_DIRECTORY:
+            parts = directory.split("/") if directory else []
+            # Si toglie la cartella della lingua (e LC_MESSAGES per gettext)
+            if parts and parts[-1] == "LC_MESSAGES":
+                parts.pop()
+            if parts:
+                parts.pop()
+            return join_namespace(*parts, stem(filename))
+        if self.pattern is not None:
+            match = self.pattern.search(relative)
+            if match:
+                if "ns" in self.pattern.groupindex:
+                    return match.group("ns") or ""
+                group = "lang" if "lang" in self.pattern.groupindex else 1
+                rest = relative[:match.start(group)] + "/" + relative[match.end(group):]
+                rest_directory, _, rest_filename = rest.rpartition("/")
+                return join_namespace(rest_directory, stem(rest_filename))
+        return join_namespace(directory, split_filename(filename)[0])
+
+def language_detector(project, project_path=None):
+    project = project or {}
+    return LanguageDetector(language_rules(project), project_path or project.get("path"))
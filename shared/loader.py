@@ -0,0 +1,146 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from shared.catalog import Catalog
+from shared.constants import LOADER_WORKERS
+from shared.languages import LanguageDetector
+from shared.profiling import span
+
+class BackgroundLoader:
+    """Esegue scansione e analisi dei file fuori dal thread di Tk
+
+    I risultati arrivano come messaggi (tipo, ...) in una coda thread-safe che
+    l'interfaccia svuota periodicamente con after():
+      ("file", info)            file trovato dalla scansione
+      ("scanned", files)        scansione completata
+      ("parsed", info, colonne) file analizzato (percorsi, valori)
+      ("error", info, errore)   errore su un file (info è None se l'errore è generale)
+      ("progress", fatti, totale)
+      ("done",)                 caricamento terminato
+    """
+
+    def __init__(self, cache, engine, max_workers=LOADER_WORKERS):
+        self.cache = cache
+        self.engine = engine
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.messages = queue.Queue()
+        self.cancelled = threading.Event()
+
+    def post(self, *message):
+        if not self.cancelled.is_set():
+            self.messages.put(message)
+
+    def poll(self, max_items=500):
+        """Restituisce i messaggi disponibili senza bloccare"""
+        result = []
+        while len(result) < max_items:
+            try:
+                result.append(self.messages.get_nowait())
+            except queue.Empty:
+                break
+        return result
+
+    def cancel(self):
+        """Interrompe il caricamento: i file non ancora analizzati vengono scartati"""
+        self.cancelled.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        """Libera i thread una volta terminato il caricamento"""
+        self.executor.shutdown(wait=False)
+
+    def scan(self, project_path, refresh=False, rules=None):
+        self.executor.submit(self.run_scan, project_path, refresh, rules, False)
+
+    def scan_and_parse(self, project_path, refresh=False, rules=None, first_path=None, select=None):
+        """Scansiona e analizza i file; first_path (es. il master) viene analizzato per primo
+
+        select(file), se indicato, sceglie i file da analizzare subito (es. i
+        namespace già aperti): gli altri arrivano solo come messaggi "file".
+        """
+        self.executor.submit(self.run_scan, project_path, refresh, rules, True, first_path, select)
+
+    def parse(self, files):
+        """Analizza solo i file indicati (es. quelli segnalati dal watcher)"""
+        self.executor.submit(self.run_parse, files)
+
+    def run_scan(self, project_path, refresh, rules, parse, first_path=None, select=None):
+        try:
+            files = self.cache.scan(project_path, refresh, on_file=lambda file: self.post("file", file), cancelled=self.cancelled, rules=rules)
+        except Exception as e:
+            self.post("error", None, e)
+            self.post("done")
+            return
+        self.post("scanned", files)
+        if parse:
+            selected = [file for file in files if select is None or select(file)]
+            self.run_parse(sorted(selected, key=lambda file: file["path"] != first_path))
+        else:
+            self.post("done")
+
+    def run_parse(self, files):
+        total = len(files)
+        done = 0
+
+        # I file ancora validi in cache non vanno analizzati di nuovo
+        pending = []
+        with span("cache.lookup", f"{total} file"):
+            for file in files:
+                if self.cancelled.is_set():
+                    return
+                try:
+                    columns = self.cache.get(file["path"])
+                except OSError:
+                    # File sparito o illeggibile: l'errore verrà segnalato dall'analisi
+                    columns = None
+                if columns is None:
+                    pending.append(file)
+                    continue
+                done += 1
+                self.post("parsed", file, columns)
+                self.post("progress", done, total)
+
+        # Gli altri vengono analizzati in parallelo (o in serie se sono pochi)
+        with span("parse", f"{len(pending)} file"):
+            for file, signature, columns, error in self.engine.parse_many(pending, self.cancelled):
+                if error is None:
+                    self.cache.store(file["path"], signature, columns)
+                    self.post("parsed", file, columns)
+                else:
+                    self.post("error", file, error)
+                done += 1
+                self.post("progress", done, total)
+
+        self.post("done")
+
+def load_catalog(cache, engine, project_path, master_file_path, rules=None, on_error=None, languages=None, cancelled=None):
+    """Versione sincrona del caricamento, per l'uso senza interfaccia
+
+    Usa la stessa scansione, la stessa cache e lo stesso motore di analisi
+    delle schermate; on_error(file, errore) riceve i file non leggibili,
+    languages è il LanguageDetector del progetto (predefinito: dal nome del file).
+    Tutti i namespace vengono caricati; cancelled (threading.Event) interrompe
+    scansione e analisi lasciando il catalogo incompleto.
+    """
+    languages = languages or LanguageDetector(project_path=project_path)
+    catalog = Catalog()
+    catalog.set_master(languages.language(master_file_path), languages.namespace(master_file_path))
+    files = cache.scan(project_path, rules=rules, cancelled=cancelled)
+    pending = []
+    for file in sorted(files, key=lambda file: file["path"] != master_file_path):
+        try:
+            columns = cache.get(file["path"])
+        except OSError:
+            columns = None
+        if columns is None:
+            pending.append(file)
+        else:
+            catalog.add_flat_locale(languages.language(file["path"]), columns, file["path"], languages.namespace(file["path"]))
+    with span("parse", f"{len(pending)} file"):
+        for file, signature, columns, error in engine.parse_many(pending, cancelled):
+            if error is None:
+                cache.store(file["path"], signature, columns)
+                catalog.add_flat_locale(languages.language(file["path"]), columns, file["path"], languages.namespace(file["path"]))
+            elif on_error:
+                on_error(file, error)
+    return catalog
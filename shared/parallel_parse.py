@@ -0,0 +1,105 @@
+import os
+import threading
+from shared.constants import PARSE_WORKERS, PARALLEL_MIN_FILES, PARALLEL_MIN_BYTES
+from shared.formats import parse_catalog
+
+def file_signature(stat_result):
+    """Firma di un file usata per validare la cache"""
+    return (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+
+def parse_file(file_path):
+    """Analizza un file e restituisce (firma, (percorsi, valori))
+
+    Gira anche nei processi di lavoro: restituisce colonne già appiattite,
+    più economiche da serializzare di un dizionario annidato. Il formato
+    (JSON, YAML, gettext, ...) dipende dall'estensione del file.
+    """
+    signature = file_signature(os.stat(file_path))
+    return signature, parse_catalog(file_path)
+
+class ParseEngine:
+    """Analizza più file in parallelo su un pool di processi"""
+
+    def __init__(self, workers=PARSE_WORKERS, min_files=PARALLEL_MIN_FILES, min_bytes=PARALLEL_MIN_BYTES):
+        self.workers = workers
+        self.min_files = min_files
+        self.min_bytes = min_bytes
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def use_parallel(self, files):
+        # Per pochi file o file piccoli il costo dei processi supera il guadagno
+        if self.workers <= 1 or len(files) < self.min_files:
+            return False
+        return sum(file.get("size", 0) for file in files) >= self.min_bytes
+
+    def get_pool(self):
+        # multiprocessing e concurrent.futures si importano al primo uso: la scansione
+        # e l'avvio dell'applicazione usano solo file_signature
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        with self.lock:
+            if self.pool is None:
+                # spawn: il fork di un processo con Tk e thread attivi non è sicuro
+                context = multiprocessing.get_context("spawn")
+                self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self.pool
+
+    def parse_many(self, files, cancelled=None):
+        """Genera (file, firma, colonne, errore) per ogni file, nell'ordine di completamento"""
+        if not self.use_parallel(files):
+            for file in files:
+                if cancelled is not None and cancelled.is_set():
+                    return
+                try:
+                    signature, columns = parse_file(file["path"])
+                    yield file, signature, columns, None
+                except Exception as e:
+                    yield file, None, None, e
+            return
+
+        from concurrent.futures import as_completed
+        pool = self.get_pool()
+        futures = {pool.submit(parse_file, file["path"]): file for file in files}
+        try:
+            for future in as_completed(futures):
+                if cancelled is not None and cancelled.is_set():
+                    return
+                file = futures[future]
+                try:
+                    signature, columns = future.result()
+                    yield file, signature, columns, None
+                except Exception as e:
+                    yield file, None, None, e
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def map_chunks(self, function, items, chunk_size):
+        """Applica function (a livello di modulo) a blocchi di items e concatena i risultati
+
+        Con un solo blocco si elabora in questo processo: il passaggio ai
+        processi di lavoro costa più del lavoro stesso.
+        """
+        if self.workers <= 1 or len(items) <= chunk_size:
+            return function(items)
+        chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+        result = []
+        for part in self.get_pool().map(function, chunks):
+            result.extend(part)
+        return result
+
+    def shutdown(self):
+        with self.lock:
+            if self.pool is not None:
+                self.pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = None
+
+_engine = None
+
+def get_parse_engine():
+    """Restituisce il motore di analisi condiviso"""
+    global _engine
+    if _engine is None:
+        _engine = ParseEngine()
+    return _engine
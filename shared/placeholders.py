@@ -0,0 +1,401 @@
+import re
+from shared.catalog import MISSING, format_key, ids_of, is_empty, mask_of
+from shared.constants import PLACEHOLDER_CACHE_MAX, PLACEHOLDER_CHUNK
+from shared.profiling import span
+
+# Conversioni printf (%s, %1$d, %(name)s, %.2f) e interpolazioni Ruby (%{name});
+# niente spazio tra i flag: "100% sicuro" non è un segnaposto
+PRINTF = re.compile(r"%(?:%|\{(\w+)\}|\((\w+)\)[-+0#]*\d*(?:\.\d+)?[a-zA-Z]|(\d+)\$[-+0#]*\d*(?:\.\d+)?[a-zA-Z]|[-+0#]*\d*(?:\.\d+)?[sdifuxXeEgGcobr@])")
+# Argomenti ICU con una struttura da confrontare; gli altri tipi (number, date, time) valgono come {nome}
+ICU_PLURAL = ("plural", "selectordinal")
+ICU_SELECT = "select"
+
+# Chiave di PlaceholderIndex.invalidated per le invalidazioni del master (valgono per tutte le lingue)
+MASTER = None
+
+# Firma di un valore: (segnaposto con nome, conversioni printf anonime nell'ordine,
+# argomenti ICU (nome, tipo, parole chiave), errori di sintassi)
+EMPTY = ((), (), (), ())
+
+# Punti in cui il parser si ferma: graffe, fine di nome/tipo di un argomento, parola chiave di un'opzione
+BRACE = re.compile(r"\{\{|[{}]")
+ARGUMENT_END = re.compile(r"[,}]")
+OPTION = re.compile(r"\s*([^\s{}]*)\s*")
+
+# Segnaposto semplici {nome} e {{nome}}: se dopo averli tolti non restano graffe non serve il parser
+SIMPLE = re.compile(r"\{\{([^{}]*)\}\}|\{([^{},]*)\}")
+
+class _Parser:
+    """Analizzatore di un messaggio con segnaposto {nome}, {{nome}} e strutture ICU"""
+
+    def __init__(self, text):
+        self.text = text
+        self.names = set()
+        self.icu = set()
+        self.errors = []
+
+    def message(self, position, depth):
+        # Restituisce la posizione della graffa che chiude il messaggio annidato (o la fine del testo).
+        # Gli apostrofi ICU ('{' letterale) non si interpretano: "dell'{item}" è comune nei
+        # cataloghi non ICU, e un testo letterale uguale nel master dà comunque la stessa firma
+        text = self.text
+        size = len(text)
+        while True:
+            match = BRACE.search(text, position)
+            if match is None:
+                break
+            token = match.group()
+            position = match.start()
+            if token == "{{":
+                end = text.find("}}", position + 2)
+                if end < 0:
+                    self.errors.append("{{ non chiusa")
+                    return size
+                self.names.add("{{" + text[position + 2:end].strip() + "}}")
+                position = end + 2
+            elif token == "{":
+                position = self.argument(position + 1, depth)
+            elif depth:
+                return position
+            else:
+                self.errors.append("} senza {")
+                position += 1
+        if depth:
+            self.errors.append("{ non chiusa")
+        return size
+
+    def argument(self, position, depth):
+        # {nome}, {nome, tipo, stile} o {nome, plural|select, chiave {messaggio} ...}
+        text = self.text
+        match = ARGUMENT_END.search(text, position)
+        if match is None:
+            self.errors.append("{ non chiusa")
+            return len(text)
+        end = match.start()
+        name = text[position:end].strip()
+        if not name:
+            self.errors.append("{} senza nome")
+        if text[end] == "}":
+            self.names.add("{" + name + "}")
+            return end + 1
+        match = ARGUMENT_END.search(text, end + 1)
+        if match is None:
+            self.errors.append("{ non chiusa")
+            return len(text)
+        type_end = match.start()
+        kind = text[end + 1:type_end].strip()
+        if kind not in ICU_PLURAL and kind != ICU_SELECT:
+            # Stile di number, date, time: si salta fino alla graffa che chiude l'argomento
+            self.names.add("{" + name + "}")
+            close = text.find("}", type_end)
+            if close < 0:
+                self.errors.append("{ non chiusa")
+                return len(text)
+            return close + 1
+        if text[type_end] == "}":
+            self.errors.append(f"{{{name}, {kind}}} senza opzioni")
+            return type_end + 1
+        return self.options(name, kind, type_end + 1, depth)
+
+    def options(self, name, kind, position, depth):
+        text = self.text
+        size = len(text)
+        keywords = []
+        while True:
+            match = OPTION.match(text, position)
+            keyword = match.group(1)
+            position = match.end()
+            if position >= size:
+                self.errors.append("{ non chiusa")
+                return size
+            if not keyword and text[position] == "}":
+                break
+            if keyword.startswith("offset:"):
+                continue
+            if text[position] != "{":
+                self.errors.append(f"opzione {keyword or '?'} di {{{name}, {kind}}} senza messaggio")
+                return position + 1
+            keywords.append(keyword)
+            position = self.message(position + 1, depth + 1)
+            if position >= size:
+                return size
+            position += 1
+        if kind in ICU_PLURAL:
+            # Le categorie (one, few, many) dipendono dalla lingua: si confronta solo l'argomento
+            if "other" not in keywords:
+                self.errors.append(f"{{{name}, {kind}}} senza other")
+            self.icu.add((name, kind, ()))
+        else:
+            self.icu.add((name, kind, tuple(sorted(set(keywords)))))
+        return position + 1
+
+def parse_signature(text):
+    """Firma dei segnaposto di un testo, confrontabile con ==
+
+    Conta quali segnaposto con nome compaiono (non quante volte né dove) e
+    l'ordine delle conversioni printf anonime, che dipendono dalla posizione.
+    """
+    if "{" not in text and "%" not in text:
+        return EMPTY
+    printf = []
+    names = set()
+    if "%" in text:
+        for match in PRINTF.finditer(text):
+            token = match.group()
+            if token == "%%":
+                continue
+            if match.group(1) or match.group(2) or match.group(3):
+                names.add(token)
+            else:
+                printf.append(token)
+        # %{nome} è già contato tra le conversioni: si toglie dal testo per non vederlo come {nome}
+        if "%{" in text:
+            text = PRINTF.sub(lambda match: " " if match.group(1) else match.group(), text)
+    if "{" not in text and "}" not in text:
+        return (tuple(sorted(names)), tuple(printf), (), ())
+    simple = list(SIMPLE.finditer(text))
+    braces = sum(2 if match.group(1) is not None else 1 for match in simple)
+    if text.count("{") == braces and text.count("}") == braces:
+        for match in simple:
+            if match.group(1) is not None:
+                names.add("{{" + match.group(1).strip() + "}}")
+                continue
+            name = match.group(2).strip()
+            if not name:
+                return parse_structure(text, names, printf)
+            names.add("{" + name + "}")
+        return (tuple(sorted(names)), tuple(printf), (), ())
+    return parse_structure(text, names, printf)
+
+def parse_structure(text, names, printf):
+    # Strutture ICU, graffe annidate o non bilanciate
+    parser = _Parser(text)
+    parser.message(0, 0)
+    names |= parser.names
+    return (tuple(sorted(names)), tuple(printf), tuple(sorted(parser.icu)), tuple(parser.errors))
+
+def parse_signatures(texts):
+    """Firme di un blocco di testi (gira anche nei processi di lavoro)"""
+    return [parse_signature(text) for text in texts]
+
+def compare_signatures(master, signature):
+    """Descrizione delle differenze tra la firma di una traduzione e quella del master"""
+    if signature == master:
+        return []
+    # Gli errori di sintassi presenti anche nel master (es. graffe usate come testo) non contano
+    issues = [error for error in signature[3] if error not in master[3]]
+    names, master_names = set(signature[0]), set(master[0])
+    issues.extend(f"manca {name}" for name in sorted(master_names - names))
+    issues.extend(f"in più {name}" for name in sorted(names - master_names))
+    if signature[1] != master[1]:
+        issues.append(f"printf {' '.join(signature[1]) or '-'} invece di {' '.join(master[1]) or '-'}")
+    icu = {(name, kind): keywords for name, kind, keywords in signature[2]}
+    master_icu = {(name, kind): keywords for name, kind, keywords in master[2]}
+    for (name, kind), keywords in master_icu.items():
+        if (name, kind) not in icu:
+            issues.append(f"manca {{{name}, {kind}}}")
+        elif icu[(name, kind)] != keywords:
+            issues.append(f"opzioni di {{{name}, {kind}}} diverse dal master")
+    issues.extend(f"in più {{{name}, {kind}}}" for name, kind in icu if (name, kind) not in master_icu)
+    return issues
+
+class PlaceholderIndex:
+    """Segnaposto e strutture ICU di ogni lingua confrontati con il master
+
+    Le firme sono in cache per valore: testi uguali in chiavi e lingue diverse
+    si analizzano una volta sola. Come value_index, il risultato è una bitmask
+    di id per lingua con le chiavi i cui segnaposto non corrispondono.
+    """
+
+    def __init__(self):
+        self.signatures = {}  # testo -> firma (solo i testi con { o %)
+        self.mismatches = {}  # lingua -> bitmask degli id con segnaposto diversi dal master
+        self.languages = set()  # lingue già verificate
+        # Contatore delle invalidazioni: una verifica in corso scarta le lingue cambiate dopo la sua copia
+        self.generation = 0
+        self.invalidated = {}  # lingua (o MASTER) -> generazione dell'ultima invalidazione
+        self.edits = None  # (lingua, id) modificati durante una verifica in corso
+
+    def signature(self, value):
+        if not isinstance(value, str):
+            return None
+        if "{" not in value and "%" not in value:
+            return EMPTY
+        signature = self.signatures.get(value)
+        if signature is None:
+            signature = parse_signature(value)
+            self.remember(value, signature)
+        return signature
+
+    def remember(self, value, signature):
+        # Oltre il limite le firme nuove non entrano in cache: si ricalcolano quando servono
+        if len(self.signatures) < PLACEHOLDER_CACHE_MAX:
+            self.signatures[value] = signature
+
+    def invalidate(self, catalog, language):
+        """Da verificare di nuovo (nuovi file o file modificati); il master invalida tutte le lingue"""
+        self.generation += 1
+        if language == catalog.master_language:
+            self.languages.clear()
+            self.invalidated = {MASTER: self.generation}
+        else:
+            self.languages.discard(language)
+            self.invalidated[language] = self.generation
+
+    def validate(self, catalog, engine=None):
+        """Verifica le lingue non ancora verificate; i testi nuovi si analizzano in parallelo"""
+        snapshot = self.snapshot(catalog)
+        if snapshot is not None:
+            self.apply(catalog, snapshot, self.check(snapshot, engine))
+
+    def snapshot(self, catalog):
+        """Copia delle colonne da verificare, per eseguire check in un altro thread; None se non serve
+
+        Le modifiche di singole celle arrivate mentre la verifica è in corso
+        vengono riapplicate da apply.
+        """
+        master = catalog.master_language
+        if master not in catalog.columns:
+            return None
+        for language in list(self.mismatches):
+            if language not in catalog.columns:
+                del self.mismatches[language]
+                self.languages.discard(language)
+        stale = [language for language in catalog.languages if language not in self.languages]
+        if not stale:
+            return None
+        master_index = catalog.value_index[master]
+        translated = master_index["present"] & ~master_index["empty"]
+        # Solo le chiavi tradotte in entrambe: mancanti e vuote sono già altri problemi
+        candidates = {}
+        for language in stale:
+            index = catalog.value_index[language]
+            candidates[language] = 0 if language == master else index["present"] & ~index["empty"] & translated
+        self.edits = []
+        return {
+            "generation": self.generation,
+            "master": master,
+            "columns": {language: list(catalog.columns[language]) for language in stale + [master]},
+            "candidates": candidates,
+        }
+
+    def check(self, snapshot, engine=None):
+        """Bitmask delle chiavi errate per ogni lingua della copia; non modifica i risultati dell'indice"""
+        columns = snapshot["columns"]
+        candidates = snapshot["candidates"]
+        with span("placeholders.validate", f"{len(candidates)} lingue"):
+            # Prima tutte le firme mancanti, in blocchi nei processi di lavoro se sono molte
+            signatures = self.signatures
+            pending = set()
+            for column in columns.values():
+                for value in column:
+                    if type(value) is str and ("{" in value or "%" in value) and value not in signatures:
+                        pending.add(value)
+            known = signatures
+            if pending:
+                texts = list(pending)
+                if engine is not None:
+                    parsed = engine.map_chunks(parse_signatures, texts, PLACEHOLDER_CHUNK)
+                else:
+                    parsed = parse_signatures(texts)
+                fresh = dict(zip(texts, parsed))
+                size = len(signatures)
+                for value, signature in fresh.items():
+                    self.remember(value, signature)
+                # Per questa verifica valgono anche le firme rimaste fuori dalla cache
+                if len(signatures) - size < len(fresh):
+                    known = {**signatures, **fresh}
+            master_signatures = [self.lookup(known, value) for value in columns[snapshot["master"]]]
+            return {language: self.check_language(columns[language], mask, known, master_signatures)
+                    for language, mask in candidates.items()}
+
+    def apply(self, catalog, snapshot, mismatches):
+        """Registra il risultato di check, tranne per le lingue invalidate nel frattempo"""
+        generation = snapshot["generation"]
+        edits, self.edits = self.edits, None
+        if self.invalidated.get(MASTER, 0) > generation or catalog.master_language != snapshot["master"]:
+            return
+        for language, mask in mismatches.items():
+            if language in catalog.columns and self.invalidated.get(language, 0) <= generation:
+                self.mismatches[language] = mask
+                self.languages.add(language)
+        # Le celle modificate durante la verifica si ricontrollano sul valore attuale
+        for language, key_id in edits or ():
+            self.update_cell(catalog, language, key_id)
+
+    def lookup(self, known, value):
+        if type(value) is not str:
+            return self.signature(value)
+        if "{" not in value and "%" not in value:
+            return EMPTY
+        signature = known.get(value)
+        return signature if signature is not None else self.signature(value)
+
+    def check_language(self, column, candidates, known, master_signatures):
+        wrong = []
+        for key_id in ids_of(candidates):
+            master_signature = master_signatures[key_id]
+            value = column[key_id]
+            # Caso comune: nessun segnaposto in entrambe le lingue
+            if master_signature is EMPTY and type(value) is str and "{" not in value and "%" not in value:
+                continue
+            signature = self.lookup(known, value)
+            if signature is None or master_signature is None or signature == master_signature:
+                continue
+            if compare_signatures(master_signature, signature):
+                wrong.append(key_id)
+        return mask_of(wrong)
+
+    def key_issues(self, master_value, value):
+        signature = self.signature(value)
+        master = self.signature(master_value)
+        if signature is None or master is None:
+            return []
+        return compare_signatures(master, signature)
+
+    def update_cell(self, catalog, language, key_id):
+        """Verifica una sola cella dopo una modifica; una modifica del master verifica la chiave in tutte le lingue"""
+        if self.edits is not None:
+            self.edits.append((language, key_id))
+        languages = self.languages if language == catalog.master_language else {language} & self.languages
+        for other in languages:
+            bit = 1 << key_id
+            if self.issues_of(catalog, other, key_id):
+                self.mismatches[other] |= bit
+            else:
+                self.mismatches[other] &= ~bit
+
+    def issues_of(self, catalog, language, key_id):
+        if language == catalog.master_language:
+            return []
+        value = catalog.get(language, key_id)
+        master_value = catalog.get(catalog.master_language, key_id)
+        # Come nella verifica completa: mancanti e vuote sono già altri problemi
+        if value is MISSING or master_value is MISSING or is_empty(value) or is_empty(master_value):
+            return []
+        return self.key_issues(master_value, value)
+
+    def issue_ids(self):
+        """Bitmask delle chiavi con segnaposto errati in almeno una lingua"""
+        result = 0
+        for mask in self.mismatches.values():
+            result |= mask
+        return result
+
+    def issues(self, catalog, key_id):
+        """Problemi di una chiave come [(lingua, descrizione)], nell'ordine delle lingue del catalogo"""
+        result = []
+        for language in catalog.languages:
+            if self.mismatches.get(language, 0) >> key_id & 1:
+                result.extend((language, issue) for issue in self.issues_of(catalog, language, key_id))
+        return result
+
+def placeholder_report(catalog, engine=None):
+    """Rapporto per lingua: {lingua: {chiave: [problemi]}}, solo le lingue con problemi"""
+    index = PlaceholderIndex()
+    index.validate(catalog, engine)
+    report = {}
+    for language, mask in index.mismatches.items():
+        if mask:
+            report[language] = {format_key(catalog.keys[key_id]): index.issues_of(catalog, language, key_id) for key_id in ids_of(mask)}
+    return report
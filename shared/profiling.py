@@ -0,0 +1,80 @@
+import collections
+import os
+import threading
+import time
+from shared.constants import PROFILE_BUFFER_SIZE, PROFILE_ENV
+
+Span = collections.namedtuple("Span", "name detail start duration thread")
+
+class _NullSpan:
+    """Intervallo che non registra nulla: usato quando la profilazione è spenta"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class _TimedSpan:
+    __slots__ = ("name", "detail", "start")
+
+    def __init__(self, name, detail):
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        record(self.name, self.start, time.perf_counter() - self.start, self.detail)
+        return False
+
+# deque.append è atomica: i thread del loader registrano senza lock
+spans = collections.deque(maxlen=PROFILE_BUFFER_SIZE)
+enabled = os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+def set_enabled(value):
+    global enabled
+    enabled = bool(value)
+
+def span(name, detail=None):
+    """Misura il blocco with; a profilazione spenta costa solo una chiamata di funzione
+
+    Esempio: with span("scan", project_path): ...
+    """
+    if not enabled:
+        return NULL_SPAN
+    return _TimedSpan(name, detail)
+
+def record(name, start, duration, detail=None):
+    spans.append(Span(name, detail, start, duration, threading.current_thread().name))
+
+def recent(limit=200):
+    """Gli ultimi intervalli registrati, dal più recente"""
+    result = []
+    for item in reversed(spans):
+        if len(result) >= limit:
+            break
+        result.append(item)
+    return result
+
+def summary():
+    """Statistiche per nome sugli intervalli nel buffer: {nome: {count, total, mean, max, last}}"""
+    result = {}
+    for item in list(spans):
+        stats = result.get(item.name)
+        if stats is None:
+            stats = result[item.name] = {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0}
+        stats["count"] += 1
+        stats["total"] += item.duration
+        stats["max"] = max(stats["max"], item.duration)
+        stats["last"] = item.duration
+    for stats in result.values():
+        stats["mean"] = stats["total"] / stats["count"]
+    return result
+
+def clear():
+    spans.clear()
@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import threading
+from shared.constants import DATA_DIR, PROJECTS_FILE, PROJECTS_DB
+
+# Campi con una colonna dedicata; tutti gli altri finiscono nella colonna JSON "data"
+BASE_FIELDS = ("id", "name", "path")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    data TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS projects_path ON projects (path);
+CREATE INDEX IF NOT EXISTS projects_name_path ON projects (name, path);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+class ProjectStore:
+    """Archivio dei progetti su SQLite: ricerca indicizzata e scritture atomiche
+
+    Ogni scrittura è una transazione: più istanze dell'applicazione possono
+    modificare i progetti senza perdere aggiornamenti e un'interruzione non
+    lascia mai il file a metà.
+    """
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.db_path = os.path.join(data_dir, PROJECTS_DB)
+        self.local = threading.local()
+        os.makedirs(data_dir, exist_ok=True)
+        self.connection().executescript(SCHEMA)
+        self.migrate_json()
+
+    def connection(self):
+        # sqlite3 non condivide le connessioni tra thread: una per thread
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            self.local.connection = connection
+        return connection
+
+    def transaction(self):
+        return Transaction(self.connection())
+
+    def migrate_json(self):
+        """Importa una sola volta il vecchio projects.json, conservando gli id"""
+        json_path = os.path.join(self.data_dir, PROJECTS_FILE)
+        with self.transaction() as connection:
+            if connection.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+                return
+            if os.path.exists(json_path):
+                try:
+                    with open(json_path, "r") as f:
+                        projects = json.load(f)
+                except Exception as e:
+                    print(f"Errore nella migrazione dei progetti: {e}")
+                    return
+                for project in projects:
+                    self.insert(connection, project)
+            connection.execute("INSERT INTO meta (key, value) VALUES ('migrated_json', '1')")
+
+    @staticmethod
+    def to_project(row):
+        project = {"id": row["id"], "name": row["name"], "path": row["path"]}
+        project.update(json.loads(row["data"]))
+        return project
+
+    @staticmethod
+    def insert(connection, project):
+        data = {k: v for k, v in project.items() if k not in BASE_FIELDS}
+        cursor = connection.execute(
+            "INSERT INTO projects (id, name, path, data) VALUES (?, ?, ?, ?)",
+            (project.get("id"), project["name"], project["path"], json.dumps(data))
+        )
+        return cursor.lastrowid
+
+    def all(self):
+        rows = self.connection().execute("SELECT * FROM projects ORDER BY id").fetchall()
+        return [self.to_project(row) for row in rows]
+
+    def get(self, project_id):
+        row = self.connection().execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return self.to_project(row) if row else None
+
+    def find(self, name, path):
+        row = self.connection().execute(
+            "SELECT * FROM projects WHERE name = ? AND path = ? ORDER BY id LIMIT 1", (name, path)
+        ).fetchone()
+        return self.to_project(row) if row else None
+
+    def find_by_path(self, path):
+        rows = self.connection().execute("SELECT * FROM projects WHERE path = ? ORDER BY id", (path,)).fetchall()
+        return [self.to_project(row) for row in rows]
+
+    def add(self, project):
+        """Aggiunge un progetto e ne restituisce l'id"""
+        with self.transaction() as connection:
+            return self.insert(connection, project)
+
+    def update(self, project_id, **fields):
+        """Aggiorna solo i campi indicati; un valore None rimuove il campo"""
+        with self.transaction() as connection:
+            row = connection.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
+            if row is None:
+                return False
+            project = self.to_project(row)
+            for key, value in fields.items():
+                if value is None and key not in BASE_FIELDS:
+                    project.pop(key, None)
+                else:
+                    project[key] = value
+            data = {k: v for k, v in project.items() if k not in BASE_FIELDS}
+            connection.execute(
+                "UPDATE projects SET name = ?, path = ?, data = ? WHERE id = ?",
+                (project["name"], project["path"], json.dumps(data), project_id)
+            )
+            return True
+
+    def delete(self, project_id):
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+
+class Transaction:
+    """Transazione BEGIN IMMEDIATE: acquisisce subito il lock di scrittura"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.connection.execute("COMMIT")
+        else:
+            self.connection.execute("ROLLBACK")
+        return False
+
+_store = None
+# L'archivio viene aperto anche dal thread che carica i progetti all'avvio
+_store_lock = threading.Lock()
+
+def get_project_store():
+    """Restituisce l'archivio dei progetti condiviso"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProjectStore()
+        return _store
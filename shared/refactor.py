@@ -0,0 +1,297 @@
+import json
+import os
+import re
+from shared.catalog import format_key
+from shared.catalog_writer import detect_format, write_atomic, write_temp
+from shared.formats import format_for, is_writable
+from shared.profiling import span
+
+# Modalità di rinomina
+PREFIX = "prefix"  # percorso o sottoalbero: "menu.file" -> "nav.file" sposta anche tutte le chiavi sotto
+REGEX = "regex"    # espressione regolare applicata al testo di ogni chiave (senza il namespace)
+
+# Stringhe e punteggiatura strutturale di JSON: tutto il resto (numeri, letterali,
+# spazi) viene copiato così com'è
+JSON_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]:,]')
+
+class RenamePlan:
+    """Rinomine da applicare: id della chiave -> nuovo percorso nel catalogo
+
+    I percorsi dei file non cambiano id: colonne, bitmask e modifiche non
+    salvate restano valide, cambia solo il testo della chiave.
+    """
+
+    def __init__(self):
+        self.renames = {}
+        self.conflicts = []
+
+    def __len__(self):
+        return len(self.renames)
+
+def parse_key(catalog, text):
+    """Percorso del catalogo dal testo mostrato nella griglia ("errors:title.short")"""
+    text = text.strip()
+    namespace, separator, rest = text.partition(":")
+    if separator and namespace in catalog.namespaces and namespace != catalog.default_namespace:
+        return catalog.namespaces[namespace] + tuple(rest.split("."))
+    return tuple(text.split("."))
+
+def plan_prefix(catalog, old, new):
+    """Sposta la chiave o il sottoalbero old in new (testi come nella griglia)"""
+    old_path = parse_key(catalog, old)
+    new_path = parse_key(catalog, new)
+    plan = RenamePlan()
+    size = len(old_path)
+    for key_id, path in enumerate(catalog.keys):
+        if path[:size] == old_path:
+            plan.renames[key_id] = new_path + path[size:]
+    return check_plan(catalog, plan)
+
+def plan_regex(catalog, pattern, replacement):
+    """Rinomina tutte le chiavi il cui testo (senza namespace) corrisponde al pattern"""
+    expression = re.compile(pattern)
+    plan = RenamePlan()
+    for key_id, path in enumerate(catalog.keys):
+        namespace, file_path = catalog.split_key(path)
+        text = ".".join(file_path)
+        renamed = expression.sub(replacement, text)
+        if renamed != text:
+            plan.renames[key_id] = path[:len(path) - len(file_path)] + tuple(renamed.split("."))
+    return check_plan(catalog, plan)
+
+def check_plan(catalog, plan):
+    """Scarta le rinomine senza effetto e raccoglie i conflitti che renderebbero i file ambigui"""
+    plan.renames = {key_id: path for key_id, path in plan.renames.items() if path != catalog.keys[key_id]}
+    if not plan.renames:
+        return plan
+    targets = {}
+    for key_id, path in plan.renames.items():
+        old = catalog.keys[key_id]
+        if catalog.split_key(old)[0] != catalog.split_key(path)[0]:
+            plan.conflicts.append(f"{format_key(old)}: non si può spostare in un altro namespace")
+        elif any(not part for part in catalog.split_key(path)[1]):
+            plan.conflicts.append(f"{format_key(old)}: il nuovo nome {format_key(path)} contiene una parte vuota")
+        if path in targets:
+            plan.conflicts.append(f"{format_key(old)} e {format_key(catalog.keys[targets[path]])} diventerebbero {format_key(path)}")
+        targets[path] = key_id
+        existing = catalog.index.get(path)
+        if existing is not None and existing not in plan.renames:
+            plan.conflicts.append(f"{format_key(path)} esiste già")
+
+    # Una chiave non può diventare anche il gruppo di un'altra (valore e oggetto insieme)
+    final = [plan.renames.get(key_id, path) for key_id, path in enumerate(catalog.keys)]
+    groups = {path[:depth] for path in final for depth in range(1, len(path))}
+    for key_id, path in plan.renames.items():
+        if path in groups:
+            plan.conflicts.append(f"{format_key(path)} sarebbe sia una chiave sia un gruppo")
+
+    # Le lingue in formati di sola lettura non potrebbero essere aggiornate
+    for (language, namespace), source in catalog.sources.items():
+        key_ids = affected_ids(catalog, plan, language, namespace)
+        if not key_ids:
+            continue
+        if not is_writable(source):
+            plan.conflicts.append(f"{source} è in un formato di sola lettura")
+        elif is_flat(source):
+            # ARB non ha gruppi: ogni chiave resta al primo livello del file
+            for key_id in key_ids:
+                if len(catalog.split_key(plan.renames[key_id])[1]) != 1:
+                    plan.conflicts.append(f"{format_key(catalog.keys[key_id])}: {source} è un file piatto, "
+                                          f"{format_key(plan.renames[key_id])} non può stare in un gruppo")
+    return plan
+
+def is_flat(file_path):
+    catalog_format = format_for(file_path)
+    return catalog_format is not None and catalog_format.name == "arb"
+
+def metadata_renames(text, renames):
+    """Nodi dei metadati ARB da rinominare con le chiavi: @vecchio -> @nuovo"""
+    data = json.loads(text)
+    nodes = {}
+    for old, new in renames.items():
+        if "@" + old[0] in data:
+            nodes[("@" + old[0],)] = "@" + new[0]
+    for node, name in nodes.items():
+        if name in data and (name,) not in nodes:
+            raise ValueError(f"{name} esiste già")
+    return nodes
+
+def affected_ids(catalog, plan, language, namespace):
+    segment = catalog.segments.get((language, namespace))
+    if segment is None:
+        return []
+    return [key_id for key_id in segment[0] if key_id in plan.renames]
+
+def node_renames(file_keys, renames):
+    """Rinomine dei nodi del file che producono le rinomine delle chiavi, o None
+
+    Se ogni chiave cambia un solo elemento del percorso, e tutte le chiavi sotto
+    quel nodo cambiano allo stesso modo, basta sostituire il nome del nodo nel
+    testo: il resto del file viene copiato byte per byte.
+    """
+    nodes = {}
+    for old, new in renames.items():
+        if len(old) != len(new):
+            return None
+        changed = [depth for depth in range(len(old)) if old[depth] != new[depth]]
+        if len(changed) != 1:
+            return None
+        node = old[:changed[0] + 1]
+        if nodes.setdefault(node, new[changed[0]]) != new[changed[0]]:
+            return None
+    # Ogni chiave del file sotto un nodo rinominato deve essere tra quelle rinominate allo stesso modo
+    for path in file_keys:
+        for depth in range(1, len(path) + 1):
+            name = nodes.get(path[:depth])
+            if name is not None and renames.get(path) != path[:depth - 1] + (name,) + path[depth:]:
+                return None
+    # Il nuovo nome non deve esistere già accanto al nodo
+    siblings = {path[:depth] for path in file_keys for depth in range(1, len(path) + 1)}
+    for node, name in nodes.items():
+        target = node[:-1] + (name,)
+        if target in siblings and target not in nodes:
+            return None
+    return nodes
+
+def rename_tokens(text, nodes, ensure_ascii):
+    """Sostituisce i nomi dei nodi indicati in un'unica passata sul testo JSON"""
+    output = []
+    position = 0
+    # Pila dei contenitori: per gli oggetti il percorso e se la prossima stringa è una chiave
+    stack = []
+    for match in JSON_TOKEN.finditer(text):
+        token = match.group()
+        if token == "{":
+            parent = stack[-1] if stack else None
+            if parent is None:
+                path = ()
+            elif parent["kind"] == "object" and parent["path"] is not None:
+                path = parent["path"] + (parent["key"],)
+            else:
+                path = None
+            stack.append({"kind": "object", "path": path, "key": None, "expect_key": True})
+        elif token == "[":
+            stack.append({"kind": "array"})
+        elif token in "}]":
+            stack.pop()
+        elif token == ",":
+            if stack and stack[-1]["kind"] == "object":
+                stack[-1]["expect_key"] = True
+        elif token == ":":
+            continue
+        elif stack and stack[-1]["kind"] == "object" and stack[-1]["expect_key"]:
+            frame = stack[-1]
+            frame["expect_key"] = False
+            key = json.loads(token)
+            frame["key"] = key
+            # Gli oggetti dentro un array non hanno un percorso nel catalogo
+            if frame["path"] is not None:
+                name = nodes.get(frame["path"] + (key,))
+                if name is not None:
+                    output.append(text[position:match.start()])
+                    output.append(json.dumps(name, ensure_ascii=ensure_ascii))
+                    position = match.end()
+    output.append(text[position:])
+    return "".join(output)
+
+def move_keys(data, renames):
+    """Sposta i valori dei percorsi rinominati nella struttura annidata; i gruppi rimasti vuoti spariscono"""
+    moved = []
+    for old in sorted(renames, key=len, reverse=True):
+        parents = [data]
+        node = data
+        for part in old[:-1]:
+            node = node.get(part) if isinstance(node, dict) else None
+            parents.append(node)
+        if not isinstance(node, dict) or old[-1] not in node:
+            continue
+        moved.append((renames[old], node.pop(old[-1])))
+        # Rimuove i gruppi svuotati risalendo verso la radice
+        for depth in range(len(old) - 1, 0, -1):
+            if parents[depth] == {}:
+                parents[depth - 1].pop(old[depth - 1], None)
+            else:
+                break
+    for new, value in moved:
+        node = data
+        for part in new[:-1]:
+            node = node.setdefault(part, {})
+        node[new[-1]] = value
+    return data
+
+def rewrite_file(file_path, file_keys, renames):
+    """Applica le rinomine {percorso: nuovo percorso} al testo di un file
+
+    Il file non viene scritto: restituisce (testo originale, nuovo testo).
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    file_format = detect_format(text)
+    nodes = node_renames(file_keys, renames)
+    if is_flat(file_path):
+        # Le chiavi sono tutte al primo livello (check_plan scarta i gruppi): i metadati seguono la chiave
+        if nodes is None:
+            raise ValueError(f"{file_path} è un file piatto: le chiavi non possono diventare gruppi")
+        nodes.update(metadata_renames(text, renames))
+    if nodes is not None:
+        output = rename_tokens(text, nodes, file_format["ensure_ascii"])
+    else:
+        # Spostamenti tra gruppi: la struttura cambia, si riscrive con lo stesso formato
+        data = move_keys(json.loads(text), renames)
+        output = json.dumps(data, indent=file_format["indent"], ensure_ascii=file_format["ensure_ascii"])
+        if file_format["trailing_newline"]:
+            output += "\n"
+    return text, output
+
+def replace_all(outputs):
+    """Sostituisce tutti i file {percorso: (testo originale, nuovo testo)} o nessuno
+
+    Prima si scrivono tutti i file temporanei, poi si sostituiscono con
+    os.replace; se una sostituzione fallisce i file già sostituiti tornano al
+    testo originale.
+    """
+    temps = {}
+    replaced = []
+    try:
+        for source, (original, output) in outputs.items():
+            temps[source] = write_temp(source, output)
+        for source in outputs:
+            os.replace(temps[source], source)
+            del temps[source]
+            replaced.append(source)
+    except BaseException:
+        for temp_path in temps.values():
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        for source in replaced:
+            try:
+                write_atomic(source, outputs[source][0])
+            except OSError as e:
+                print(f"Impossibile ripristinare il file {source}: {e}")
+        raise
+
+def apply_plan(catalog, plan, on_written=None):
+    """Scrive solo i file con chiavi rinominate, poi aggiorna il catalogo
+
+    I file vengono scritti tutti o nessuno: se uno fallisce gli altri tornano
+    come prima e il catalogo non cambia. on_written(percorso, testo) riceve
+    ogni file scritto (es. per aggiornare la cache). Restituisce l'elenco dei
+    file scritti.
+    """
+    if plan.conflicts:
+        raise ValueError("\n".join(plan.conflicts))
+    outputs = {}
+    with span("refactor.apply", f"{len(plan)} chiavi"):
+        for (language, namespace), source in sorted(catalog.sources.items()):
+            key_ids = affected_ids(catalog, plan, language, namespace)
+            if not key_ids:
+                continue
+            segment_keys = [catalog.split_key(catalog.keys[key_id])[1] for key_id in catalog.segments[(language, namespace)][0]]
+            renames = {catalog.split_key(catalog.keys[key_id])[1]: catalog.split_key(plan.renames[key_id])[1] for key_id in key_ids}
+            outputs[source] = rewrite_file(source, segment_keys, renames)
+        replace_all(outputs)
+        catalog.rename_keys(plan.renames)
+    if on_written:
+        for source, (original, output) in outputs.items():
+            on_written(source, output)
+    return list(outputs)
@@ -0,0 +1,102 @@
+import os
+import re
+from shared.constants import DEFAULT_IGNORE
+from shared.formats import is_catalog_file
+from shared.parallel_parse import file_signature
+
+def glob_to_regex(pattern, ignore_case=False):
+    """Converte un glob con supporto a ** in un'espressione regolare compilata"""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return re.compile("".join(parts) + r"\Z", re.IGNORECASE if ignore_case else 0)
+
+def scan_rules(project):
+    """Regole di scansione del progetto: glob da ignorare e pattern di inclusione"""
+    project = project or {}
+    ignore = project.get("ignore")
+    if ignore is None:
+        ignore = DEFAULT_IGNORE
+    return {"ignore": tuple(ignore), "include": project.get("include") or None}
+
+class Scanner:
+    """Scansione di un progetto basata su os.scandir con potatura delle directory"""
+
+    def __init__(self, ignore=(), include=None):
+        # I glob senza "/" si applicano al nome della directory, gli altri al percorso relativo
+        self.ignore_names = [glob_to_regex(p) for p in ignore if "/" not in p.strip("/")]
+        self.ignore_paths = [glob_to_regex(p.strip("/")) for p in ignore if "/" in p.strip("/")]
+        self.include = glob_to_regex(include, ignore_case=True) if include else None
+
+    def is_ignored(self, name, relative_path):
+        if any(regex.match(name) for regex in self.ignore_names):
+            return True
+        return any(regex.match(relative_path) for regex in self.ignore_paths)
+
+    def is_included(self, name, relative_path):
+        if self.include is not None:
+            return self.include.match(relative_path) is not None
+        return is_catalog_file(name)
+
+    def scan(self, project_path, on_file=None, cancelled=None):
+        """Restituisce i file trovati come dizionari (filename, path, size, signature)"""
+        files = []
+        stack = [(project_path, "")]
+        while stack:
+            if cancelled is not None and cancelled.is_set():
+                break
+            directory, relative_dir = stack.pop()
+            directory_files, subdirectories = self.scan_directory(directory, relative_dir)
+            for file in directory_files:
+                files.append(file)
+                if on_file:
+                    on_file(file)
+            # Ordine di visita simile a os.walk (dall'alto verso il basso)
+            stack.extend(reversed(subdirectories))
+        return files
+
+    def scan_directory(self, directory, relative_dir):
+        """Scansiona una sola directory: restituisce (file inclusi, sottodirectory non ignorate)"""
+        files = []
+        subdirectories = []
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            return files, subdirectories
+        with entries:
+            for entry in entries:
+                relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not self.is_ignored(entry.name, relative_path):
+                            subdirectories.append((entry.path, relative_path))
+                        continue
+                    if not self.is_included(entry.name, relative_path):
+                        continue
+                    # DirEntry riusa i dati di stat già ottenuti dove possibile
+                    stat_result = entry.stat()
+                except OSError:
+                    continue
+                files.append({
+                    "filename": entry.name,
+                    "path": entry.path,
+                    "size": stat_result.st_size,
+                    "signature": file_signature(stat_result)
+                })
+        return files, subdirectories
@@ -0,0 +1,194 @@
+import bisect
+import re
+from shared.catalog import MISSING, format_key, format_value
+from shared.profiling import span
+
+TOKEN = re.compile(r"\w+")
+
+# Le celle sono codificate come interi: id della chiave << SLOT_BITS | colonna
+SLOT_BITS = 10
+SLOT_MASK = (1 << SLOT_BITS) - 1
+KEY_SLOT = 0  # colonna riservata al percorso della chiave
+
+SUBSTRING = "substring"
+PREFIX = "prefix"
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class SearchIndex:
+    """Indice invertito su percorsi delle chiavi e valori di tutte le lingue
+
+    Le ricerche non distinguono maiuscole e minuscole. Le parole (token) di ogni
+    cella puntano alle celle che le contengono; un indice a trigrammi sul
+    vocabolario trova le parole che contengono una sottostringa senza
+    esaminare le celle una per una.
+    """
+
+    def __init__(self):
+        self.texts = {}          # cella -> testo normalizzato
+        self.token_cells = {}    # parola -> insieme di celle
+        self.token_trigrams = {} # trigramma -> insieme di parole
+        self.sorted_tokens = None
+        self.slots = {}          # lingua -> colonna
+        self.slot_languages = {} # colonna -> lingua
+        self.languages = set()   # lingue già indicizzate
+        self.indexed_keys = 0    # chiavi del catalogo già indicizzate
+
+    def slot(self, language):
+        if language is None:
+            return KEY_SLOT
+        slot = self.slots.get(language)
+        if slot is None:
+            slot = len(self.slots) + 1
+            if slot > SLOT_MASK:
+                raise ValueError("Troppe lingue per l'indice di ricerca")
+            self.slots[language] = slot
+            self.slot_languages[slot] = language
+        return slot
+
+    def add_text(self, cell, text):
+        text = text.casefold()
+        if not text:
+            return
+        self.texts[cell] = text
+        for token in set(TOKEN.findall(text)):
+            cells = self.token_cells.get(token)
+            if cells is None:
+                cells = self.token_cells[token] = set()
+                self.sorted_tokens = None
+                for trigram in trigrams(token):
+                    self.token_trigrams.setdefault(trigram, set()).add(token)
+            cells.add(cell)
+
+    def remove_text(self, cell):
+        text = self.texts.pop(cell, None)
+        if text is None:
+            return
+        for token in set(TOKEN.findall(text)):
+            cells = self.token_cells.get(token)
+            if cells is not None:
+                cells.discard(cell)
+                # Le parole rimaste senza celle restano nel vocabolario: vengono ignorate
+
+    def index_keys(self, catalog, start=0):
+        """Indicizza i percorsi delle chiavi a partire dall'id indicato"""
+        for key_id in range(start, len(catalog.keys)):
+            self.add_text(key_id << SLOT_BITS | KEY_SLOT, format_key(catalog.keys[key_id]))
+        self.indexed_keys = len(catalog.keys)
+
+    def index_language(self, catalog, language):
+        """(Re)indicizza tutte le celle di una lingua"""
+        with span("search.index", language):
+            self.remove_language(language)
+            self.index_keys(catalog, self.indexed_keys)
+            slot = self.slot(language)
+            for key_id, value in enumerate(catalog.columns[language]):
+                if value is not MISSING:
+                    self.add_text(key_id << SLOT_BITS | slot, format_value(value))
+            self.languages.add(language)
+
+    def remove_language(self, language):
+        if language not in self.languages:
+            return
+        slot = self.slots[language]
+        for cell in [cell for cell in self.texts if cell & SLOT_MASK == slot]:
+            self.remove_text(cell)
+        self.languages.discard(language)
+
+    def update_cell(self, catalog, key_id, language):
+        """Aggiorna una sola cella dopo una modifica"""
+        if language not in self.languages:
+            return
+        self.index_keys(catalog, self.indexed_keys)
+        cell = key_id << SLOT_BITS | self.slot(language)
+        self.remove_text(cell)
+        value = catalog.get(language, key_id)
+        if value is not MISSING:
+            self.add_text(cell, format_value(value))
+
+    def update_key(self, catalog, key_id):
+        """Aggiorna il testo di una chiave rinominata"""
+        if key_id >= self.indexed_keys:
+            return
+        cell = key_id << SLOT_BITS | KEY_SLOT
+        self.remove_text(cell)
+        self.add_text(cell, format_key(catalog.keys[key_id]))
+
+    def tokens_with_prefix(self, prefix):
+        if self.sorted_tokens is None:
+            self.sorted_tokens = sorted(self.token_cells)
+        start = bisect.bisect_left(self.sorted_tokens, prefix)
+        result = []
+        for token in self.sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            result.append(token)
+        return result
+
+    def tokens_containing(self, part):
+        if len(part) < 3:
+            # Troppo corta per i trigrammi: il vocabolario è molto più piccolo delle celle
+            return [token for token in self.token_cells if part in token]
+        candidates = None
+        for trigram in trigrams(part):
+            tokens = self.token_trigrams.get(trigram)
+            if not tokens:
+                return []
+            candidates = set(tokens) if candidates is None else candidates & tokens
+        return [token for token in candidates if part in token]
+
+    def cells_for_tokens(self, tokens):
+        cells = set()
+        for token in tokens:
+            cells |= self.token_cells.get(token, set())
+        return cells
+
+    def tokens_for_part(self, part, preceded, followed):
+        """Parole compatibili con un pezzo della ricerca
+
+        Se nella ricerca il pezzo è preceduto da altro testo la parola deve
+        iniziare con esso, se è seguito deve finire con esso.
+        """
+        if preceded and followed:
+            return [part]
+        if preceded:
+            return self.tokens_with_prefix(part)
+        tokens = self.tokens_containing(part)
+        if followed:
+            return [token for token in tokens if token.endswith(part)]
+        return tokens
+
+    def search(self, query, mode=SUBSTRING, limit=None):
+        """Restituisce le celle che corrispondono come lista ordinata di (id chiave, lingua o None)"""
+        query = query.casefold()
+        if not query:
+            return []
+        parts = list(TOKEN.finditer(query))
+        if mode == PREFIX:
+            # Basta il primo pezzo: è all'inizio del testo, quindi all'inizio di una parola
+            parts = parts[:1]
+        candidates = None
+        for match in parts:
+            preceded = match.start() > 0 or mode == PREFIX
+            followed = match.end() < len(query)
+            cells = self.cells_for_tokens(self.tokens_for_part(match.group(), preceded, followed))
+            candidates = cells if candidates is None else candidates & cells
+            if not candidates:
+                return []
+        if candidates is None:
+            # Solo punteggiatura: nessuna parola da cercare nell'indice
+            candidates = self.texts.keys()
+
+        if mode == PREFIX:
+            matches = [cell for cell in candidates if self.texts.get(cell, "").startswith(query)]
+        else:
+            matches = [cell for cell in candidates if query in self.texts.get(cell, "")]
+        matches.sort()
+        if limit is not None:
+            matches = matches[:limit]
+        return [(cell >> SLOT_BITS, self.slot_languages.get(cell & SLOT_MASK)) for cell in matches]
+
+    def matching_keys(self, query, mode=SUBSTRING):
+        """Id delle chiavi con almeno una cella corrispondente"""
+        return {key_id for key_id, language in self.search(query, mode)}
@@ -0,0 +1,386 @@
+import os
+import queue
+import sqlite3
+import threading
+from shared.catalog import format_key
+from shared.constants import DATA_DIR, MEMORY_DB, MEMORY_CANDIDATES, MEMORY_MAX_SOURCE_LENGTH, MEMORY_POSTINGS
+from shared.languages import language_detector
+from shared.loader import load_catalog
+from shared.profiling import span
+from shared.project_store import Transaction
+from shared.scanner import scan_rules
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sources_length ON sources (length);
+CREATE TABLE IF NOT EXISTS grams (
+    gram TEXT NOT NULL,
+    source_id INTEGER NOT NULL,
+    PRIMARY KEY (gram, source_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS grams_source ON grams (source_id);
+CREATE TABLE IF NOT EXISTS gram_counts (
+    gram TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS units (
+    project TEXT NOT NULL,
+    language TEXT NOT NULL,
+    key TEXT NOT NULL,
+    source_id INTEGER NOT NULL,
+    target TEXT NOT NULL,
+    PRIMARY KEY (project, language, key)
+);
+CREATE INDEX IF NOT EXISTS units_source ON units (source_id, language);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    project TEXT NOT NULL,
+    language TEXT NOT NULL,
+    signature TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_project ON files (project);
+"""
+
+def ngrams(text, size=3):
+    """Trigrammi del testo normalizzato; gli spazi ai bordi contano anche i testi brevi"""
+    padded = f" {' '.join(text.casefold().split())} "
+    return {padded[i:i + size] for i in range(max(len(padded) - size + 1, 1))}
+
+def edit_distance(a, b):
+    """Distanza di Levenshtein con l'algoritmo bit-parallelo di Myers (variante di Hyyrö)
+
+    Una colonna della matrice è una coppia di bitmask: il costo è lineare
+    nella lunghezza del testo più lungo, qualunque sia quella del più corto.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if m == 0:
+        return len(a)
+    peq = {}
+    for i, char in enumerate(b):
+        peq[char] = peq.get(char, 0) | 1 << i
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv = full
+    mv = 0
+    score = m
+    for char in a:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv & full
+    return score
+
+def similarity(a, b):
+    """Somiglianza tra 0 e 1: 1 - distanza / lunghezza del testo più lungo"""
+    longest = max(len(a), len(b))
+    return 1.0 - edit_distance(a, b) / longest if longest else 1.0
+
+def project_id(project):
+    return os.path.abspath(project["path"])
+
+class TranslationMemory:
+    """Memoria di traduzione: coppie (testo del master -> traduzione) di tutti i progetti
+
+    I testi sorgente sono indicizzati per trigrammi in SQLite: una ricerca
+    legge solo le liste dei trigrammi più rari del testo, sceglie i candidati
+    con più trigrammi in comune (e lunghezza compatibile) e solo su quelli
+    calcola la distanza di edit. L'indice resta su disco e si aggiorna per
+    lingua, solo per i file cambiati dall'ultima volta.
+    """
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.db_path = os.path.join(data_dir, MEMORY_DB)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.indexer = None
+        # Traduzioni salvate dall'editor, scritte da un thread: il lock di SQLite non blocca l'interfaccia
+        self.records = queue.Queue()
+        self.recorder = None
+        # Il passaggio su tutti i progetti si fa una volta per sessione
+        self.indexed_all = False
+        os.makedirs(data_dir, exist_ok=True)
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        # sqlite3 non condivide le connessioni tra thread: una per thread
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            self.local.connection = connection
+        return connection
+
+    def transaction(self):
+        return Transaction(self.connection())
+
+    def source_id(self, connection, text):
+        """Id del testo sorgente, aggiungendolo all'indice dei trigrammi se nuovo"""
+        row = connection.execute("SELECT id FROM sources WHERE text = ?", (text,)).fetchone()
+        if row is not None:
+            return row[0]
+        cursor = connection.execute("INSERT INTO sources (text, length) VALUES (?, ?)", (text, len(text)))
+        source_id = cursor.lastrowid
+        connection.executemany("INSERT INTO grams (gram, source_id) VALUES (?, ?)",
+                               ((gram, source_id) for gram in ngrams(text)))
+        return source_id
+
+    def index_project(self, project, cache, engine, cancelled=None):
+        """Aggiorna le coppie del progetto; restituisce le lingue reindicizzate
+
+        Si confrontano le firme dei file con quelle dell'ultima indicizzazione:
+        se non è cambiato nulla il progetto non viene nemmeno caricato. Se
+        cambia il master si reindicizzano tutte le lingue.
+        """
+        master_file = project.get("master_file")
+        if not master_file or not os.path.isdir(project["path"]):
+            return []
+        project_key = project_id(project)
+        rules = scan_rules(project)
+        detector = language_detector(project)
+        files = cache.scan(project["path"], refresh=True, rules=rules, cancelled=cancelled)
+        current = {file["path"]: ":".join(map(str, file["signature"])) for file in files}
+        stored = dict(self.connection().execute("SELECT path, signature FROM files WHERE project = ?", (project_key,)).fetchall())
+        changed = {path for path in current.keys() | stored.keys() if current.get(path) != stored.get(path)}
+        if not changed or (cancelled is not None and cancelled.is_set()):
+            return []
+
+        with span("memory.index", project["name"]):
+            catalog = load_catalog(cache, engine, project["path"], master_file, rules=rules, languages=detector)
+            master = catalog.master_language
+            languages = {detector.language(path) for path in changed}
+            if master in languages:
+                languages = set(catalog.languages) | languages
+            languages.discard(master)
+
+            # Coppie delle lingue cambiate: solo testi non vuoti, il master come sorgente
+            master_column = catalog.columns.get(master, [])
+            units = []
+            for key_id, source in enumerate(master_column):
+                if not isinstance(source, str) or not source.strip() or len(source) > MEMORY_MAX_SOURCE_LENGTH:
+                    continue
+                for language in languages:
+                    target = catalog.get(language, key_id)
+                    if isinstance(target, str) and target.strip():
+                        units.append((language, format_key(catalog.keys[key_id]), source, target))
+
+            with self.transaction() as connection:
+                connection.executemany("DELETE FROM units WHERE project = ? AND language = ?",
+                                       ((project_key, language) for language in languages))
+                source_ids = {}
+                for language, key, source, target in units:
+                    source_id = source_ids.get(source)
+                    if source_id is None:
+                        source_id = source_ids[source] = self.source_id(connection, source)
+                    connection.execute("INSERT OR REPLACE INTO units (project, language, key, source_id, target) VALUES (?, ?, ?, ?, ?)",
+                                       (project_key, language, key, source_id, target))
+                connection.execute("DELETE FROM files WHERE project = ?", (project_key,))
+                connection.executemany("INSERT OR REPLACE INTO files (path, project, language, signature) VALUES (?, ?, ?, ?)",
+                                       ((path, project_key, detector.language(path), signature) for path, signature in current.items()))
+        return sorted(languages)
+
+    def index_projects(self, projects, cache, engine, cancelled=None, on_progress=None):
+        """Aggiorna la memoria per tutti i progetti; on_progress(fatti, totale, progetto)"""
+        indexed = {}
+        for done, project in enumerate(projects, 1):
+            if cancelled is not None and cancelled.is_set():
+                break
+            try:
+                languages = self.index_project(project, cache, engine, cancelled)
+            except Exception as e:
+                print(f"Errore nell'indicizzazione di {project.get('name')}: {e}")
+                languages = []
+            if languages:
+                indexed[project["name"]] = languages
+            if on_progress:
+                on_progress(done, len(projects), project)
+        # I progetti non più registrati escono dalla memoria
+        registered = [project_id(project) for project in projects]
+        if cancelled is None or not cancelled.is_set():
+            removed = self.forget_projects(registered)
+            if indexed or removed:
+                self.update_gram_counts()
+        return indexed
+
+    def forget_projects(self, keep):
+        """Toglie le coppie dei progetti non indicati; restituisce il numero di righe eliminate"""
+        connection = self.connection()
+        changes = connection.total_changes
+        with self.transaction() as connection:
+            connection.execute("CREATE TEMP TABLE IF NOT EXISTS keep_projects (project TEXT PRIMARY KEY)")
+            connection.execute("DELETE FROM keep_projects")
+            connection.executemany("INSERT OR IGNORE INTO keep_projects VALUES (?)", ((path,) for path in keep))
+            connection.execute("DELETE FROM units WHERE project NOT IN (SELECT project FROM keep_projects)")
+            connection.execute("DELETE FROM files WHERE project NOT IN (SELECT project FROM keep_projects)")
+            # Testi sorgente non più usati da nessuna coppia, con i loro trigrammi
+            connection.execute("DELETE FROM grams WHERE source_id IN (SELECT id FROM sources WHERE id NOT IN (SELECT source_id FROM units))")
+            connection.execute("DELETE FROM sources WHERE id NOT IN (SELECT source_id FROM units)")
+        return connection.total_changes - changes
+
+    def update_gram_counts(self):
+        # Frequenza di ogni trigramma, per scegliere i più selettivi nelle ricerche.
+        # I trigrammi aggiunti dopo l'ultimo conteggio valgono 0: vengono sempre letti
+        with span("memory.gram_counts"):
+            with self.transaction() as connection:
+                connection.execute("DELETE FROM gram_counts")
+                connection.execute("INSERT INTO gram_counts (gram, count) SELECT gram, COUNT(*) FROM grams GROUP BY gram")
+
+    def probe_grams(self, connection, grams):
+        """I trigrammi più rari, finché le loro liste restano sotto MEMORY_POSTINGS voci (almeno tre)"""
+        placeholders = ",".join("?" * len(grams))
+        counts = dict(connection.execute(f"SELECT gram, count FROM gram_counts WHERE gram IN ({placeholders})", grams).fetchall())
+        selected = []
+        total = 0
+        for gram in sorted(grams, key=lambda gram: counts.get(gram, 0)):
+            count = counts.get(gram, 0)
+            if len(selected) >= 3 and total + count > MEMORY_POSTINGS:
+                break
+            selected.append(gram)
+            total += count
+        return selected
+
+    def record(self, project, language, changes):
+        """Registra subito le traduzioni salvate dall'editor: [(chiave, sorgente, traduzione)]"""
+        project_key = project_id(project)
+        with self.transaction() as connection:
+            for key, source, target in changes:
+                if not isinstance(source, str) or not source.strip() or len(source) > MEMORY_MAX_SOURCE_LENGTH:
+                    continue
+                if isinstance(target, str) and target.strip():
+                    connection.execute("INSERT OR REPLACE INTO units (project, language, key, source_id, target) VALUES (?, ?, ?, ?, ?)",
+                                       (project_key, language, key, self.source_id(connection, source), target))
+                else:
+                    connection.execute("DELETE FROM units WHERE project = ? AND language = ? AND key = ?", (project_key, language, key))
+
+    def record_in_background(self, project, language, changes):
+        """Accoda le traduzioni salvate per record, scritte in ordine da un thread dedicato
+
+        Se l'applicazione si chiude prima della scrittura le coppie non vanno
+        perse: il file è cambiato e la prossima indicizzazione le rilegge.
+        """
+        self.records.put((project, language, changes))
+        with self.lock:
+            if self.recorder is None:
+                self.recorder = threading.Thread(target=self.write_records, daemon=True)
+                self.recorder.start()
+
+    def write_records(self):
+        while True:
+            project, language, changes = self.records.get()
+            try:
+                self.record(project, language, changes)
+            except Exception as e:
+                print(f"Errore nella memoria di traduzione: {e}")
+
+    def suggest(self, text, language, limit=5, min_similarity=0.6, exclude=None):
+        """Le traduzioni migliori per un testo del master: [(somiglianza, traduzione, sorgente, occorrenze, origine)]
+
+        exclude=(progetto, chiave) esclude la cella stessa da cui parte la ricerca.
+        """
+        if not isinstance(text, str) or not text.strip():
+            return []
+        with span("memory.suggest", language):
+            connection = self.connection()
+            grams = self.probe_grams(connection, list(ngrams(text)))
+            # Con somiglianza s la lunghezza del candidato è tra len*s e len/s
+            low = int(len(text) * min_similarity)
+            high = int(len(text) / min_similarity) + 1
+            placeholders = ",".join("?" * len(grams))
+            candidates = connection.execute(f"""
+                SELECT s.id, s.text FROM (
+                    SELECT source_id, COUNT(*) AS shared FROM grams
+                    WHERE gram IN ({placeholders}) GROUP BY source_id
+                ) AS g JOIN sources AS s ON s.id = g.source_id
+                WHERE s.length BETWEEN ? AND ?
+                  AND EXISTS (SELECT 1 FROM units AS u WHERE u.source_id = s.id AND u.language = ?)
+                ORDER BY g.shared DESC LIMIT ?
+            """, (*grams, low, high, language, MEMORY_CANDIDATES)).fetchall()
+
+            # Distanza di edit solo sui candidati
+            scored = []
+            for source_id, source in candidates:
+                score = similarity(text, source)
+                if score >= min_similarity:
+                    scored.append((score, source_id, source))
+            scored.sort(key=lambda item: -item[0])
+
+            exclude_project, exclude_key = (project_id(exclude[0]), exclude[1]) if exclude else (None, None)
+            suggestions = []
+            for score, source_id, source in scored:
+                rows = connection.execute("""
+                    SELECT target, COUNT(*), MIN(project), MIN(key) FROM units
+                    WHERE source_id = ? AND language = ? AND NOT (project IS ? AND key IS ?)
+                    GROUP BY target ORDER BY COUNT(*) DESC
+                """, (source_id, language, exclude_project, exclude_key)).fetchall()
+                for target, count, project, key in rows:
+                    suggestions.append((round(score, 3), target, source, count, (project, key)))
+                if len(suggestions) >= limit:
+                    break
+            return suggestions[:limit]
+
+    def update_project(self, project, cache, engine):
+        """Aggiorna solo i file cambiati di un progetto, senza toccare gli altri
+
+        I conteggi dei trigrammi non si ricalcolano: quelli nuovi valgono 0 e
+        vengono comunque letti, il conteggio completo resta al passaggio su
+        tutti i progetti.
+        """
+        try:
+            return self.index_project(project, cache, engine)
+        except Exception as e:
+            print(f"Errore nell'indicizzazione di {project.get('name')}: {e}")
+            return []
+
+    def start_indexer(self, target, *args):
+        with self.lock:
+            if self.indexer is not None and self.indexer.is_alive():
+                return None
+            self.indexer = threading.Thread(target=target, args=args, daemon=True)
+            self.indexer.start()
+            return self.indexer
+
+    def index_in_background(self, projects, cache, engine):
+        """Avvia l'aggiornamento di tutti i progetti in un thread, se non è già in corso"""
+        indexer = self.start_indexer(self.index_projects, projects, cache, engine)
+        if indexer is not None:
+            self.indexed_all = True
+        return indexer
+
+    def update_in_background(self, project, cache, engine):
+        """Avvia in un thread l'aggiornamento del solo progetto indicato, se non è già in corso"""
+        return self.start_indexer(self.update_project, project, cache, engine)
+
+    def stats(self):
+        connection = self.connection()
+        return {
+            "sources": connection.execute("SELECT COUNT(*) FROM sources").fetchone()[0],
+            "units": connection.execute("SELECT COUNT(*) FROM units").fetchone()[0],
+            "projects": connection.execute("SELECT COUNT(DISTINCT project) FROM files").fetchone()[0],
+        }
+
+_memory = None
+# La memoria viene aperta sia dal thread di Tk sia dai thread di indicizzazione
+_memory_lock = threading.Lock()
+
+def get_translation_memory():
+    """Restituisce la memoria di traduzione condivisa"""
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = TranslationMemory()
+        return _memory
@@ -1,31 +1,17 @@
-import json
-import os
+from shared.project_store import get_project_store
 
 def load_projects():
-    """Carica i progetti dal file JSON"""
-    projects_file = os.path.join("data", "projects.json")
-    
-    if not os.path.exists(projects_file):
-        return []
-    
+    """Carica i progetti dall'archivio"""
     try:
-        with open(projects_file, "r") as f:
-            return json.load(f)
+        return get_project_store().all()
     except Exception as e:
         print(f"Errore nel caricamento dei progetti: {e}")
         return []
 
-def save_projects(projects):
-    """Salva i progetti nel file JSON"""
-    projects_file = os.path.join("data", "projects.json")
-    
-    # Assicurati che la directory data esista
-    os.makedirs("data", exist_ok=True)
-    
+def find_project(name, path):
+    """Trova il progetto con il nome e il percorso indicati (ricerca indicizzata)"""
     try:
-        with open(projects_file, "w") as f:
-            json.dump(projects, f, indent=4)
-        return True
+        return get_project_store().find(name, path)
     except Exception as e:
-        print(f"Errore nel salvataggio dei progetti: {e}")
-        return False
\ No newline at end of file
+        print(f"Errore nel caricamento dei progetti: {e}")
+        return None
@@ -0,0 +1,253 @@
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+from shared.constants import WATCH_INTERVAL
+from shared.parallel_parse import file_signature
+from shared.scanner import Scanner, scan_rules
+
+# Costanti di inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+# Tempo di raccolta degli eventi inotify prima di elaborarli (secondi)
+DEBOUNCE = 0.1
+
+def load_inotify():
+    """Restituisce la libc se inotify è disponibile, altrimenti None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+class ProjectWatcher:
+    """Osserva il percorso di un progetto e segnala i file aggiunti, modificati o rimossi
+
+    Usa inotify dove disponibile, altrimenti confronta periodicamente le firme
+    dei file e l'mtime delle directory. Gli eventi arrivano in una coda che
+    l'interfaccia svuota con after():
+      ("added", info)     nuovo file
+      ("modified", info)  file cambiato
+      ("removed", path)   file eliminato
+    """
+
+    def __init__(self, project_path, rules=None, interval=WATCH_INTERVAL):
+        rules = rules or scan_rules(None)
+        self.project_path = project_path
+        self.scanner = Scanner(rules["ignore"], rules["include"])
+        self.interval = interval
+        self.events = queue.Queue()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.files = {}        # percorso file -> firma
+        self.directories = {}  # percorso directory -> (percorso relativo, mtime_ns)
+        self.libc = None
+        self.fd = None
+        self.watches = {}      # descrittore inotify -> percorso directory
+
+    def start(self, files=None):
+        """Avvia l'osservazione; files è l'ultima scansione, usata come istantanea iniziale"""
+        self.thread = threading.Thread(target=self.run, args=(files,), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def poll(self, max_items=500):
+        """Restituisce gli eventi disponibili senza bloccare"""
+        result = []
+        while len(result) < max_items:
+            try:
+                result.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return result
+
+    def run(self, files):
+        if files is not None:
+            self.files = {file["path"]: file["signature"] for file in files}
+        self.libc = load_inotify()
+        if self.libc is not None:
+            self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if self.fd < 0:
+                self.libc = None
+        try:
+            self.snapshot_directories(self.project_path, "", emit=files is not None)
+            if self.libc is not None:
+                self.run_inotify()
+            else:
+                self.run_polling()
+        finally:
+            if self.fd is not None and self.fd >= 0:
+                os.close(self.fd)
+
+    def snapshot_directories(self, directory, relative_dir, emit):
+        """Registra l'albero delle directory; con emit segnala i file non ancora noti"""
+        stack = [(directory, relative_dir)]
+        while stack and not self.stopped.is_set():
+            current, relative = stack.pop()
+            self.add_directory(current, relative)
+            directory_files, subdirectories = self.scanner.scan_directory(current, relative)
+            for file in directory_files:
+                self.update_file(file, emit)
+            stack.extend(subdirectories)
+
+    def add_directory(self, directory, relative_dir):
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return
+        self.directories[directory] = (relative_dir, mtime)
+        if self.libc is not None:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                self.watches[wd] = directory
+
+    def update_file(self, file, emit=True):
+        previous = self.files.get(file["path"])
+        if previous == file["signature"]:
+            return
+        self.files[file["path"]] = file["signature"]
+        if emit:
+            self.events.put(("added" if previous is None else "modified", file))
+
+    def remove_file(self, path):
+        if self.files.pop(path, None) is not None:
+            self.events.put(("removed", path))
+
+    def remove_directory(self, directory):
+        prefix = directory + os.sep
+        for path in [p for p in self.directories if p == directory or p.startswith(prefix)]:
+            del self.directories[path]
+        for path in [p for p in self.files if p.startswith(prefix)]:
+            self.remove_file(path)
+
+    def check_file(self, path):
+        """Confronta un singolo file con l'istantanea"""
+        directory, name = os.path.split(path)
+        known = self.directories.get(directory)
+        if known is None:
+            return
+        relative_path = f"{known[0]}/{name}" if known[0] else name
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            self.remove_file(path)
+            return
+        if not self.scanner.is_included(name, relative_path):
+            return
+        self.update_file({
+            "filename": name,
+            "path": path,
+            "size": stat_result.st_size,
+            "signature": file_signature(stat_result)
+        })
+
+    def check_directory(self, path):
+        """Gestisce una directory creata, spostata o eliminata"""
+        parent, name = os.path.split(path)
+        known = self.directories.get(parent)
+        if known is None:
+            return
+        if not os.path.isdir(path):
+            self.remove_directory(path)
+            return
+        relative_path = f"{known[0]}/{name}" if known[0] else name
+        if path not in self.directories and not self.scanner.is_ignored(name, relative_path):
+            self.snapshot_directories(path, relative_path, emit=True)
+
+    def run_inotify(self):
+        while not self.stopped.is_set():
+            readable, _, _ = select.select([self.fd], [], [], self.interval)
+            if not readable:
+                continue
+            # Raccoglie gli eventi per un breve intervallo, poi li elabora insieme
+            self.stopped.wait(DEBOUNCE)
+            try:
+                data = os.read(self.fd, 256 * 1024)
+            except BlockingIOError:
+                continue
+            changed_files = set()
+            changed_directories = set()
+            overflow = False
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                directory = self.watches.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self.watches[wd]
+                    continue
+                if mask & IN_DELETE_SELF:
+                    changed_directories.add(directory)
+                elif mask & IN_ISDIR:
+                    changed_directories.add(os.path.join(directory, name))
+                elif name:
+                    changed_files.add(os.path.join(directory, name))
+            if overflow:
+                # Troppi eventi persi: confronto completo con l'istantanea
+                self.full_rescan()
+                continue
+            for path in changed_directories:
+                self.check_directory(path)
+            for path in changed_files:
+                self.check_file(path)
+
+    def run_polling(self):
+        while not self.stopped.wait(self.interval):
+            # Le firme dei file noti rivelano modifiche ed eliminazioni
+            for path in list(self.files):
+                self.check_file(path)
+            # L'mtime di una directory cambia quando vi si creano o rimuovono voci
+            for directory, (relative_dir, mtime) in list(self.directories.items()):
+                try:
+                    current = os.stat(directory).st_mtime_ns
+                except OSError:
+                    self.remove_directory(directory)
+                    continue
+                if current == mtime:
+                    continue
+                self.directories[directory] = (relative_dir, current)
+                directory_files, subdirectories = self.scanner.scan_directory(directory, relative_dir)
+                for file in directory_files:
+                    self.update_file(file)
+                for subdirectory, relative_path in subdirectories:
+                    if subdirectory not in self.directories:
+                        self.snapshot_directories(subdirectory, relative_path, emit=True)
+
+    def full_rescan(self):
+        seen = set()
+        for file in self.scanner.scan(self.project_path, cancelled=self.stopped):
+            seen.add(file["path"])
+            self.update_file(file)
+        for path in [p for p in self.files if p not in seen]:
+            self.remove_file(path)